@@ -1,16 +1,54 @@
 from enum import Enum
 import logging
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
+from fastapi.responses import Response, StreamingResponse
 from app.services.data_upload import DataUploadService
-from app.services.db_explorer import DBExplorerService
+from app.services.column_profiler import ColumnProfiler
+from app.services.data_catalog import ColumnCatalog
+from app.services.db_explorer import DBExplorerService, SchemaCache
 from app.services.query_generator import QueryGeneratorService
-from app.services.nlp_processor import NLPProcessor, DatabaseType
+from app.services.translation_cache import TranslationCache
+from app.services.sql_builder import SQLQueryBuilder
+from app.services.result_cache import (
+    ResultCache,
+    is_ddl_sql,
+    is_read_only_sql,
+    pipeline_collections,
+    sql_tables,
+)
+from app.services.result_encoder import FastJSONResponse, encode_columnar
+from app.services.memory_engine import InMemoryEngine
+from app.services.index_advisor import IndexAdvisor
+from app.services.batch_upload import BatchUploadService, prepare_jobs
+from app.services.nlp_processor import (
+    DatabaseType,
+    ParsedQuery,
+    get_nlp_processor,
+    parse_query,
+)
 from app.database.mysql_manager import MySQLManager
 from app.database.mongo_manager import MongoManager
+from app.database.mongo_pipeline import MongoQueryCompiler, PipelineValidationError
+from app.database.async_executor import AsyncDBExecutor
+from app.database.cursor_registry import (
+    CursorLimitError,
+    CursorNotFoundError,
+    CursorRegistry,
+    ResultCursor,
+)
+from app.metrics import REGISTRY, RESPONSE_BYTES, observe_rows, observe_stage, stage
 from app.config import settings
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, List, Literal, Optional
+import asyncio
+import json
 import os
+import posixpath
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -18,17 +56,183 @@ logging.basicConfig(
 
 router = APIRouter()
 
-mysql_manager = MySQLManager(settings.mysql_connection_string)
-mongo_manager = MongoManager(settings.mongo_connection_string)
-data_upload_service = DataUploadService(mysql_manager, mongo_manager)
-db_explorer_service = DBExplorerService(mysql_manager, mongo_manager)
-query_generator_service = QueryGeneratorService(mysql_manager, mongo_manager)
-nlp_processor = NLPProcessor()
+mysql_manager = MySQLManager(
+    settings.mysql_connection_string,
+    local_infile=settings.mysql_local_infile,
+    pool_size=settings.mysql_pool_size,
+    max_overflow=settings.mysql_max_overflow,
+    pool_recycle=settings.mysql_pool_recycle,
+    pool_pre_ping=settings.mysql_pool_pre_ping,
+    pool_timeout=settings.mysql_pool_timeout,
+    max_engines=settings.mysql_max_engines,
+)
+mongo_manager = MongoManager(
+    settings.mongo_connection_string,
+    schema_sample_size=settings.mongo_schema_sample_size,
+    schema_max_workers=settings.mongo_schema_max_workers,
+)
+schema_cache = SchemaCache(
+    ttl_seconds=settings.schema_cache_ttl_seconds,
+    max_entries=settings.schema_cache_max_entries,
+)
+result_cache = ResultCache(
+    max_bytes=settings.result_cache_max_bytes,
+    ttl_seconds=settings.result_cache_ttl_seconds,
+    max_entry_bytes=settings.result_cache_max_entry_bytes,
+)
+memory_engine = (
+    InMemoryEngine(
+        mysql_manager,
+        mongo_manager,
+        max_bytes=settings.memory_engine_max_bytes,
+        max_table_bytes=settings.memory_engine_max_table_bytes,
+    )
+    if settings.memory_engine_enabled
+    else None
+)
+column_catalog = (
+    ColumnCatalog(mysql_manager, mongo_manager) if settings.column_stats_enabled else None
+)
+db_explorer_service = DBExplorerService(
+    mysql_manager,
+    mongo_manager,
+    schema_cache,
+    ColumnProfiler(mysql_manager, mongo_manager, sample_rows=settings.profile_sample_rows),
+    column_catalog,
+)
+index_advisor = (
+    IndexAdvisor(
+        mysql_manager,
+        mongo_manager,
+        db_explorer_service,
+        min_uses=settings.index_advisor_min_uses,
+        min_rows=settings.index_advisor_min_rows,
+        auto_apply=settings.index_advisor_auto_apply,
+    )
+    if settings.index_advisor_enabled
+    else None
+)
+data_upload_service = DataUploadService(
+    mysql_manager,
+    mongo_manager,
+    schema_cache,
+    result_cache,
+    memory_engine,
+    column_catalog,
+    index_advisor,
+    csv_chunk_rows=settings.csv_chunk_rows,
+    csv_sample_rows=settings.csv_sample_rows,
+    insert_batch_size=settings.insert_batch_size,
+    use_load_data=settings.mysql_local_infile,
+    infer_column_types=settings.csv_infer_column_types,
+    mongo_insert_workers=settings.mongo_insert_workers,
+)
+sql_query_builder = SQLQueryBuilder(max_entries=settings.sql_statement_cache_max_entries)
+query_generator_service = QueryGeneratorService(
+    mysql_manager, mongo_manager, db_explorer_service, sql_query_builder
+)
+mongo_query_compiler = MongoQueryCompiler(
+    max_entries=settings.mongo_plan_cache_max_entries
+)
+cursor_registry = CursorRegistry(
+    ttl_seconds=settings.query_cursor_ttl_seconds,
+    max_cursors=settings.query_max_open_cursors,
+    # Leave pooled connections for plain queries on the same database
+    max_per_scope=max(
+        1,
+        min(
+            settings.query_max_open_cursors_per_database,
+            settings.mysql_pool_size + settings.mysql_max_overflow - 1,
+        ),
+    ),
+)
+translation_cache = TranslationCache(
+    max_entries=settings.translation_cache_max_entries,
+    persist_path=settings.translation_cache_path,
+)
+db_executor = AsyncDBExecutor(
+    {
+        "mysql": settings.mysql_max_concurrency,
+        "mongodb": settings.mongo_max_concurrency,
+    },
+    process_limits={
+        backend: workers
+        for backend, workers in (
+            ("nlp", settings.nlp_process_workers),
+            ("ingest", settings.upload_process_workers),
+        )
+        if workers
+    },
+)
+batch_upload_service = BatchUploadService(
+    data_upload_service,
+    db_executor,
+    {"mysql": settings.upload_mysql_concurrency, "mongodb": settings.upload_mongo_concurrency},
+)
 
 logger = logging.getLogger(__name__)
 logger.info(f"MySQL manager: {mysql_manager.base_connection_string}")
 
 
+def get_nlp():
+    return get_nlp_processor(settings.nlp_resources, settings.nlp_allow_download)
+
+
+def _get_schema(db_type: str, table_name: str, database_name: str):
+    available_tables = db_explorer_service.get_all_tables_and_columns(
+        db_type, database_name=database_name
+    )
+    columns = available_tables.get(table_name)
+    if columns is None:
+        columns = db_explorer_service.get_columns(db_type, table_name, database_name)
+    return available_tables, columns
+
+
+def _generate_sample_queries(
+    db_type: str, table_name: str, database_name: str, construct: Optional[str]
+):
+    available_tables, columns = _get_schema(db_type, table_name, database_name)
+    return query_generator_service.generate_sample_queries(
+        table_name=table_name,
+        columns=columns,
+        db_type=db_type,
+        database_name=database_name,
+        available_tables=available_tables,
+        construct=construct,
+    )
+
+
+def _generate_database_sample_queries(
+    db_type: str, database_name: str, construct: Optional[str]
+):
+    available_tables = db_explorer_service.get_all_tables_and_columns(
+        db_type, database_name=database_name
+    )
+    return query_generator_service.generate_database_sample_queries(
+        db_type, database_name, available_tables, construct
+    )
+
+
+def _encode_result(rows, db_type: str, result_format: str):
+    if result_format == "columnar":
+        exclude = ("_id",) if db_type == "mongodb" else ()
+        return encode_columnar(rows, exclude=exclude)
+    return {"result": rows}
+
+
+def _render_response(result, db_type: str) -> FastJSONResponse:
+    # Rendering happens in the constructor, so this times the whole encode
+    with stage("serialize", db_type):
+        return FastJSONResponse(result)
+
+
+async def _json_response(result, endpoint: str, db_type: str) -> FastJSONResponse:
+    # Large results take a while to encode, so keep it off the event loop
+    response = await asyncio.to_thread(_render_response, result, db_type)
+    RESPONSE_BYTES.observe(len(response.body), endpoint=endpoint, db_type=db_type)
+    return response
+
+
 class DatabaseUploadRequest(BaseModel):
     db_type: str
     database_name: Optional[str] = None
@@ -45,18 +249,20 @@ async def upload_file(
     if not database_name:
         raise HTTPException(status_code=400, detail="Database name is required")
 
-    file_path = f"/tmp/{file.filename}"
-    with open(file_path, "wb") as buffer:
-        buffer.write(await file.read())
+    suffix = os.path.splitext(file.filename or "")[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as buffer:
+        file_path = buffer.name
+        while chunk := await file.read(settings.upload_chunk_bytes):
+            buffer.write(chunk)
 
     try:
         if db_type == "mysql":
-            result = data_upload_service.upload_to_mysql(
-                file_path, table_name, database_name
+            result = await db_executor.run(
+                db_type, data_upload_service.upload_to_mysql, file_path, table_name, database_name
             )
         elif db_type == "mongodb":
-            result = data_upload_service.upload_to_mongo(
-                file_path, table_name, database_name
+            result = await db_executor.run(
+                db_type, data_upload_service.upload_to_mongo, file_path, table_name, database_name
             )
         else:
             raise HTTPException(status_code=400, detail="Invalid database type")
@@ -69,14 +275,57 @@ async def upload_file(
             os.remove(file_path)
 
 
+@router.post("/upload/batch")
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    database_name: Optional[str] = Form(None),
+    manifest: Optional[str] = Form(None),
+):
+    directory = tempfile.mkdtemp(prefix="chatdb-upload-")
+    try:
+        # Archives are unpacked next to this, into their own directories
+        upload_dir = os.path.join(directory, "files")
+        os.makedirs(upload_dir)
+        uploads = {}
+        for file in files:
+            name = posixpath.basename((file.filename or "").replace("\\", "/"))
+            if not name or name in uploads:
+                raise HTTPException(
+                    status_code=400, detail=f"Missing or duplicate file name: {file.filename}"
+                )
+            uploads[name] = os.path.join(upload_dir, name)
+            with open(uploads[name], "wb") as buffer:
+                while chunk := await file.read(settings.upload_chunk_bytes):
+                    buffer.write(chunk)
+
+        try:
+            jobs = await asyncio.to_thread(
+                prepare_jobs,
+                directory,
+                uploads,
+                manifest,
+                database_name,
+                settings.upload_archive_max_bytes,
+            )
+        except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await batch_upload_service.run(jobs)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
 @router.get("/explore")
 async def explore_database(db_type: str = "mysql", database_name: Optional[str] = None):
     try:
         if db_type == "mysql":
-            tables = db_explorer_service.get_mysql_tables(database_name)
+            tables = await db_executor.run(
+                db_type, db_explorer_service.get_mysql_tables, database_name
+            )
             return {"tables": tables}
         elif db_type == "mongodb":
-            collections = db_explorer_service.get_mongo_collections(database_name)
+            collections = await db_executor.run(
+                db_type, db_explorer_service.get_mongo_collections, database_name
+            )
             return {"collections": collections}
         else:
             raise HTTPException(status_code=400, detail="Invalid database type")
@@ -84,23 +333,38 @@ async def explore_database(db_type: str = "mysql", database_name: Optional[str]
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sample_data(db_type: str, table_name: str, database_name: str, result_format: str):
+    clean = result_format == "rows"
+    if db_type == "mysql":
+        load = lambda: db_explorer_service.get_mysql_sample_data(table_name, database_name)
+    else:
+        load = lambda: db_explorer_service.get_mongo_sample_data(
+            database_name, table_name, clean=clean
+        )
+    key = result_cache.make_key(
+        db_type, database_name, table_name, "sample-data", variant=clean
+    )
+    rows = result_cache.get_or_execute(key, [table_name], load)
+    if result_format == "columnar":
+        return _encode_result(rows, db_type, result_format)
+    return rows
+
+
 @router.get("/sample-data")
 async def get_sample_data(
-    db_type: str, table_name: str, database_name: Optional[str] = None
+    db_type: str,
+    table_name: str,
+    database_name: Optional[str] = None,
+    format: Literal["rows", "columnar"] = "rows",
 ):
-    if db_type == "mysql":
-        return db_explorer_service.get_mysql_sample_data(
-            table_name=table_name,
-            database_name=database_name
-        )
-    elif db_type == "mongodb":
-        return db_explorer_service.get_mongo_sample_data(
-            collection_name=table_name,
-            database_name=database_name
-        )
-    else:
+    if db_type not in ("mysql", "mongodb"):
         raise HTTPException(status_code=400, detail="Invalid database type")
 
+    result = await db_executor.run(
+        db_type, _sample_data, db_type, table_name, database_name, format
+    )
+    return await _json_response(result, "sample-data", db_type)
+
 
 @router.get("/sample-queries")
 async def get_sample_queries(
@@ -110,30 +374,83 @@ async def get_sample_queries(
     construct: Optional[str] = None,
 ):
     try:
-        available_tables = db_explorer_service.get_all_tables_and_columns(
-            db_type, database_name=database_name
-        )
-        
-        if db_type == "mysql":
-            columns = db_explorer_service.get_mysql_columns(table_name, database_name)
-        elif db_type == "mongodb":
-            columns = db_explorer_service.get_mongo_fields(table_name, database_name)
-        else:
+        if db_type not in ("mysql", "mongodb"):
             raise HTTPException(status_code=400, detail="Invalid database type")
 
-        queries = query_generator_service.generate_sample_queries(
-            table_name=table_name,
-            columns=columns,
-            db_type=db_type,
-            database_name=database_name,
-            available_tables=available_tables,
-            construct=construct
+        queries = await db_executor.run(
+            db_type,
+            _generate_sample_queries,
+            db_type,
+            table_name,
+            database_name,
+            construct,
+        )
+        return {"sample_queries": queries}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/sample-queries/batch")
+async def get_database_sample_queries(
+    db_type: str,
+    database_name: str,
+    construct: Optional[str] = None,
+):
+    if db_type not in ("mysql", "mongodb"):
+        raise HTTPException(status_code=400, detail="Invalid database type")
+    try:
+        queries = await db_executor.run(
+            db_type,
+            _generate_database_sample_queries,
+            db_type,
+            database_name,
+            construct,
         )
         return {"sample_queries": queries}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/profile")
+async def get_table_profile(db_type: str, table_name: str, database_name: str):
+    if db_type not in ("mysql", "mongodb"):
+        raise HTTPException(status_code=400, detail="Invalid database type")
+    try:
+        profile = await db_executor.run(
+            db_type,
+            db_explorer_service.get_table_profile,
+            db_type,
+            table_name,
+            database_name,
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return profile.as_dict()
+
+
+@router.get("/column-stats")
+async def get_column_stats(db_type: str, table_name: str, database_name: str):
+    if db_type not in ("mysql", "mongodb"):
+        raise HTTPException(status_code=400, detail="Invalid database type")
+    try:
+        stats = await db_executor.run(
+            db_type,
+            db_explorer_service.get_column_stats,
+            db_type,
+            table_name,
+            database_name,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if stats is None:
+        raise HTTPException(
+            status_code=404, detail=f"No column stats recorded for '{table_name}'"
+        )
+    return stats.as_dict()
+
+
 class NLQueryRequest(BaseModel):
     query: str
     db_type: str
@@ -141,46 +458,99 @@ class NLQueryRequest(BaseModel):
     database_name: Optional[str] = None
 
 
+def _generate_nl_query(
+    request: NLQueryRequest, parsed: ParsedQuery, columns: List[str]
+) -> Dict[str, Any]:
+    if request.db_type == "mysql":
+        # Times itself as the "generate" stage
+        sql_query = get_nlp().generate_sql(parsed, request.table_name)
+        logging.info(f"Generated query: {sql_query.statement} {sql_query.parameters}")
+        return {
+            "matched_pattern": parsed.intent,
+            "generated_query": sql_query.render(),
+            "parameterized_query": sql_query.statement,
+            "parameters": sql_query.parameters,
+            "db_type": request.db_type,
+        }
+    generated_query = get_nlp().generate_query(
+        parsed,
+        request.table_name,
+        columns,
+        request.db_type,
+    )
+    logging.info(f"Generated query: {generated_query}")
+    return {
+        "matched_pattern": parsed.intent,
+        "generated_query": generated_query,
+        "db_type": request.db_type,
+    }
+
+
 @router.post("/natural-language-query")
 async def process_nl_query(request: NLQueryRequest):
     logging.info(f"Received NLQueryRequest: {request}")
     try:
-        processed_query = nlp_processor.process_query(request.query)
-        logging.info(f"Processed query: {processed_query}")
-        pattern = nlp_processor.match_query_pattern(processed_query)
-        logging.info(f"Matched pattern: {pattern}")
-
-        if pattern:
-            available_tables = db_explorer_service.get_all_tables_and_columns(
-                request.db_type, database_name=request.database_name
-            )
+        if request.db_type not in ("mysql", "mongodb"):
+            raise HTTPException(status_code=400, detail="Invalid database type")
 
-            if request.db_type == "mysql":
-                columns = db_explorer_service.get_mysql_columns(
-                    request.table_name, request.database_name
-                )
-            elif request.db_type == "mongodb":
-                columns = db_explorer_service.get_mongo_fields(
-                    request.table_name, request.database_name
-                )
-            else:
-                raise HTTPException(status_code=400, detail="Invalid database type")
-
-            generated_query = nlp_processor.generate_query(
-                pattern,
-                request.table_name,
-                columns,
-                request.db_type,
+        columns = await db_executor.run(
+            request.db_type,
+            db_explorer_service.get_columns,
+            request.db_type,
+            request.table_name,
+            request.database_name,
+        )
+
+        cache_key = translation_cache.make_key(
+            request.query,
+            request.db_type,
+            request.database_name,
+            request.table_name,
+            columns,
+        )
+        cached = translation_cache.get(cache_key)
+        if cached is not None:
+            return {**cached, "cached": True}
+
+        started = time.perf_counter()
+        if db_executor.supports("nlp"):
+            parsed = await db_executor.run(
+                "nlp",
+                parse_query,
+                request.query,
+                settings.nlp_resources,
+                settings.nlp_allow_download,
             )
+        else:
+            # Off the event loop; the first call also loads the NLP resources
+            parsed = await asyncio.to_thread(
+                parse_query,
+                request.query,
+                settings.nlp_resources,
+                settings.nlp_allow_download,
+            )
+        # Includes the hop to the NLP worker pool or thread
+        observe_stage(
+            "translate",
+            time.perf_counter() - started,
+            request.db_type,
+            parsed.intent or "none",
+        )
+        logging.info(f"Processed query: {parsed.processed}")
+        logging.info(f"Matched pattern: {parsed.intent}")
 
-            logging.info(f"Generated query: {generated_query}")
-            return {
-                "matched_pattern": pattern,
-                "generated_query": generated_query,
-                "db_type": request.db_type,
-            }
+        if parsed.intent:
+            response = await asyncio.to_thread(_generate_nl_query, request, parsed, columns)
         else:
-            return {"message": "No matching query pattern found"}
+            response = {"message": "No matching query pattern found"}
+
+        translation_cache.put(cache_key, response)
+        return {**response, "cached": False}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        logging.error(f"Could not translate query: {str(e)}, request: {request}")
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logging.error(f"Error in process_nl_query: {str(e)}, request: {request}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -191,19 +561,315 @@ class QueryRequest(BaseModel):
     db_type: str
     table_name: str
     database_name: Optional[str] = None
+    page_size: Optional[int] = None
+    cursor: Optional[str] = None
+    format: Literal["rows", "columnar"] = "rows"
+    parameters: Optional[Dict[str, Any]] = None
 
 
-@router.post("/execute-query")
-async def execute_query(request: QueryRequest):
+def _validate_query_request(request: QueryRequest):
+    if request.db_type not in ("mysql", "mongodb"):
+        raise HTTPException(status_code=400, detail="Invalid database type")
+    if request.parameters is not None and request.db_type != "mysql":
+        raise HTTPException(
+            status_code=400, detail="Query parameters are only supported for MySQL"
+        )
+
+
+def _validate_cursor_request(request: QueryRequest):
+    # Cursors stream rows; writes and DDL have none, and would bypass the
+    # cache invalidation of the unpaged path
+    if request.db_type == "mysql" and not is_read_only_sql(request.query):
+        raise HTTPException(
+            status_code=400,
+            detail="Only read-only statements can be paged or streamed",
+        )
+
+
+def _record_workload(request: QueryRequest, compiled=None):
+    if index_advisor is None:
+        return
+    if request.db_type == "mongodb":
+        index_advisor.record_pipeline(
+            request.database_name, request.table_name, compiled.query
+        )
+        return
+    plan = sql_query_builder.describe(request.query, request.parameters)
+    if plan is not None:
+        intent, table_name, components = plan
+        index_advisor.record_intent(
+            request.database_name,
+            table_name,
+            intent,
+            components,
+            request.query,
+            request.parameters,
+        )
+
+
+def _open_cursor(request: QueryRequest) -> ResultCursor:
     if request.db_type == "mysql":
-        result = mysql_manager.execute_query(
-            request.query, database_name=request.database_name
+        _record_workload(request)
+        return mysql_manager.open_cursor(
+            request.query, request.database_name, request.parameters
+        )
+    compiled = mongo_query_compiler.compile(request.query)
+    _record_workload(request, compiled)
+    return mongo_manager.open_cursor(
+        request.table_name,
+        compiled.query,
+        request.database_name,
+        batch_size=settings.query_stream_batch_size,
+        clean=request.format == "rows",
+    )
+
+
+def _execute_page(request: QueryRequest, page_size: int):
+    if request.cursor:
+        rows, next_cursor = cursor_registry.next_page(request.cursor, page_size)
+    else:
+        rows, next_cursor = cursor_registry.first_page(
+            (request.db_type, request.database_name),
+            lambda: _open_cursor(request),
+            page_size,
         )
-    elif request.db_type == "mongodb":
-        result = mongo_manager.execute_query(
-            request.table_name, eval(request.query), database_name=request.database_name
+    observe_rows("page", request.db_type, len(rows))
+    return {
+        **_encode_result(rows, request.db_type, request.format),
+        "next_cursor": next_cursor,
+    }
+
+
+def _execute_in_memory(request: QueryRequest, compiled=None):
+    if memory_engine is None:
+        return None
+    if request.db_type == "mongodb":
+        return memory_engine.execute_pipeline(
+            request.database_name, request.table_name, compiled.query
         )
+    # Only statements built by the SQL builder map back to an intent
+    plan = sql_query_builder.describe(request.query, request.parameters)
+    if plan is None:
+        return None
+    intent, table_name, components = plan
+    return memory_engine.execute_intent(
+        "mysql", request.database_name, table_name, intent, components
+    )
+
+
+def _execute_query(request: QueryRequest):
+    clean = request.format == "rows"
+    if request.db_type == "mysql":
+        if not is_read_only_sql(request.query):
+            try:
+                affected_rows = mysql_manager.execute_statement(
+                    request.query, request.database_name, request.parameters
+                )
+            finally:
+                # The statement may have changed any table in the database,
+                # and DDL commits even when a later part of it fails
+                result_cache.invalidate("mysql", request.database_name)
+                if memory_engine is not None:
+                    memory_engine.drop("mysql", request.database_name)
+                if is_ddl_sql(request.query):
+                    schema_cache.invalidate("mysql", request.database_name)
+            return {
+                **_encode_result([], request.db_type, request.format),
+                "affected_rows": affected_rows,
+            }
+        load = lambda: mysql_manager.execute_query(
+            request.query, request.database_name, request.parameters
+        )
+        _record_workload(request)
+        rows = _execute_in_memory(request)
+        if rows is not None:
+            return _encode_result(rows, request.db_type, request.format)
+        tables = sql_tables(request.query) | {request.table_name}
     else:
+        compiled = mongo_query_compiler.compile(request.query)
+        _record_workload(request, compiled)
+        rows = _execute_in_memory(request, compiled)
+        if rows is not None:
+            return _encode_result(rows, request.db_type, request.format)
+        load = lambda: mongo_manager.execute_query(
+            request.table_name, compiled.query, request.database_name, clean=clean
+        )
+        tables = pipeline_collections(compiled.query) | {request.table_name}
+
+    key = result_cache.make_key(
+        request.db_type,
+        request.database_name,
+        request.table_name,
+        request.query,
+        request.parameters,
+        # Mongo rows are cleaned differently for the two formats
+        variant=clean if request.db_type == "mongodb" else None,
+    )
+    rows = result_cache.get_or_execute(key, tables, load)
+    return _encode_result(rows, request.db_type, request.format)
+
+
+@router.post("/execute-query")
+async def execute_query(request: QueryRequest):
+    _validate_query_request(request)
+
+    if request.page_size is not None or request.cursor:
+        _validate_cursor_request(request)
+        page_size = min(
+            request.page_size or settings.query_page_size, settings.query_page_size_max
+        )
+        try:
+            result = await db_executor.run(
+                request.db_type, _execute_page, request, page_size
+            )
+        except CursorNotFoundError:
+            raise HTTPException(status_code=404, detail="Cursor expired or not found")
+        except CursorLimitError as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except PipelineValidationError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return await _json_response(result, "execute-query", request.db_type)
+
+    try:
+        result = await db_executor.run(request.db_type, _execute_query, request)
+    except PipelineValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await _json_response(result, "execute-query", request.db_type)
+
+
+@router.post("/execute-query/stream")
+async def execute_query_stream(request: QueryRequest):
+    _validate_query_request(request)
+    _validate_cursor_request(request)
+
+    try:
+        # Holds one of the database's cursor slots until the stream closes
+        cursor = await db_executor.run(
+            request.db_type,
+            cursor_registry.open_stream,
+            (request.db_type, request.database_name),
+            lambda: _open_cursor(request),
+        )
+    except CursorLimitError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except PipelineValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def ndjson_rows():
+        total_rows = total_bytes = 0
+        try:
+            while True:
+                rows = await db_executor.run(
+                    request.db_type, cursor.fetch, settings.query_stream_batch_size
+                )
+                if rows:
+                    with stage("serialize", request.db_type):
+                        chunk = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+                    total_rows += len(rows)
+                    total_bytes += len(chunk)
+                    yield chunk
+                if cursor.exhausted:
+                    break
+        finally:
+            await db_executor.run(request.db_type, cursor.close)
+            observe_rows("stream", request.db_type, total_rows)
+            RESPONSE_BYTES.observe(
+                total_bytes, endpoint="execute-query/stream", db_type=request.db_type
+            )
+
+    return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson")
+
+
+class IndexApplyRequest(BaseModel):
+    db_type: str
+    database_name: str
+    table_name: Optional[str] = None
+
+
+def _require_index_advisor(db_type: str) -> IndexAdvisor:
+    if index_advisor is None:
+        raise HTTPException(status_code=404, detail="Index advisor is disabled")
+    if db_type not in ("mysql", "mongodb"):
         raise HTTPException(status_code=400, detail="Invalid database type")
+    return index_advisor
+
+
+@router.get("/indexes/recommendations")
+async def get_index_recommendations(
+    db_type: str, database_name: str, table_name: Optional[str] = None
+):
+    advisor = _require_index_advisor(db_type)
+    recommendations = await db_executor.run(
+        db_type, advisor.recommend, db_type, database_name, table_name
+    )
+    return {
+        "recommendations": recommendations,
+        "applied": advisor.history(db_type, database_name),
+    }
+
+
+@router.post("/indexes/apply")
+async def apply_index_recommendations(request: IndexApplyRequest):
+    advisor = _require_index_advisor(request.db_type)
+    try:
+        results = await db_executor.run(
+            request.db_type,
+            advisor.apply,
+            request.db_type,
+            request.database_name,
+            request.table_name,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"results": [result.as_dict() for result in results]}
+
+
+async def expire_cursors_periodically(interval_seconds: float):
+    # Abandoned cursors would otherwise hold their connections until the
+    # next paged request happens to expire them
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(cursor_registry.expire)
+        except Exception as e:
+            logger.warning(f"Expiring cursors failed: {e}")
+
+
+async def apply_index_recommendations_periodically(interval_seconds: float):
+    while True:
+        await asyncio.sleep(interval_seconds)
+        for db_type, database_name in index_advisor.databases():
+            try:
+                await db_executor.run(db_type, index_advisor.apply, db_type, database_name)
+            except Exception as e:
+                logger.warning(
+                    f"Scheduled index advisor run failed for {db_type}/{database_name}: {e}"
+                )
+
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    return {
+        "schema": schema_cache.stats(),
+        "translation": translation_cache.stats(),
+        "mongo_plans": mongo_query_compiler.stats(),
+        "sql_statements": sql_query_builder.stats(),
+        "results": result_cache.stats(),
+        "memory_engine": memory_engine.stats() if memory_engine is not None else None,
+    }
+
+
+@router.get("/executor/stats")
+async def get_executor_stats():
+    return {
+        **db_executor.stats(),
+        "cursors": cursor_registry.stats(),
+        "mysql_engines": mysql_manager.engine_stats(),
+    }
+
 
-    return {"result": result}
+@router.get("/metrics")
+async def get_metrics():
+    return Response(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import Optional
 
 import logging
 logger = logging.getLogger(__name__)
@@ -7,16 +8,85 @@ class Settings(BaseSettings):
     # MySQL Configuration
     mysql_connection_string: str
     mysql_default_db: str
+    mysql_local_infile: bool = False
+    mysql_max_concurrency: int = 16
+    sql_statement_cache_max_entries: int = 1024
+    mysql_pool_size: int = 5
+    mysql_max_overflow: int = 10
+    mysql_pool_recycle: int = 1800
+    mysql_pool_pre_ping: bool = True
+    mysql_pool_timeout: float = 30
+    mysql_max_engines: int = 32
 
     # MongoDB Configuration
     mongo_connection_string: str
     mongo_default_db: str
+    mongo_schema_sample_size: int = 200
+    mongo_schema_max_workers: int = 8
+    mongo_max_concurrency: int = 16
+    mongo_plan_cache_max_entries: int = 512
 
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8000
     api_debug: bool = True
 
+    # Schema Cache
+    schema_cache_ttl_seconds: float = 300
+    schema_cache_max_entries: int = 512
+    profile_sample_rows: int = 10_000
+
+    # Upload Ingest
+    upload_chunk_bytes: int = 1024 * 1024
+    csv_chunk_rows: int = 50_000
+    csv_sample_rows: int = 10_000
+    csv_infer_column_types: bool = True
+    insert_batch_size: int = 1_000
+    mongo_insert_workers: int = 4
+    column_stats_enabled: bool = True
+    upload_process_workers: int = 0
+    upload_mysql_concurrency: int = 2
+    upload_mongo_concurrency: int = 4
+    upload_archive_max_bytes: int = 1024 * 1024 * 1024
+
+    # Query Execution
+    query_page_size: int = 30
+    query_page_size_max: int = 1000
+    query_stream_batch_size: int = 500
+    query_cursor_ttl_seconds: float = 300
+    query_max_open_cursors: int = 64
+    query_max_open_cursors_per_database: int = 5
+    query_cursor_reap_seconds: float = 30
+
+    # Query result cache
+    result_cache_max_bytes: int = 64 * 1024 * 1024
+    result_cache_max_entry_bytes: int = 8 * 1024 * 1024
+    result_cache_ttl_seconds: float = 60
+
+    # In-memory execution engine
+    memory_engine_enabled: bool = False
+    memory_engine_max_bytes: int = 256 * 1024 * 1024
+    memory_engine_max_table_bytes: int = 64 * 1024 * 1024
+
+    # Index advisor
+    index_advisor_enabled: bool = True
+    index_advisor_auto_apply: bool = False
+    index_advisor_interval_seconds: float = 0
+    index_advisor_min_uses: int = 3
+    index_advisor_min_rows: int = 1_000
+
+    # Workload recording
+    workload_record_path: Optional[str] = None
+    workload_record_max_bytes: int = 64 * 1024 * 1024
+
+    # NLP
+    nlp_resources: str = "auto"
+    nlp_allow_download: bool = False
+    nlp_preload: bool = True
+    nlp_process_workers: int = 0
+    translation_cache_max_entries: int = 2048
+    translation_cache_path: Optional[str] = None
+
     # Security
     cors_origins: str = "http://localhost:3000"
 
@@ -0,0 +1,65 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import functools
+import logging
+import multiprocessing
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDBExecutor:
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        process_limits: Optional[Dict[str, int]] = None,
+    ):
+        # Thread pools suit blocking driver I/O; process pools suit CPU-bound
+        # work that needs to scale past the GIL and must take picklable calls
+        self.limits = dict(limits)
+        self._executors: Dict[str, Executor] = {
+            backend: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"{backend}-db")
+            for backend, limit in limits.items()
+        }
+        # Workers are spawned rather than forked: a fork of this process
+        # would inherit locks held by its driver, pool and server threads
+        context = multiprocessing.get_context("spawn")
+        for backend, limit in (process_limits or {}).items():
+            self.limits[backend] = limit
+            self._executors[backend] = ProcessPoolExecutor(
+                max_workers=limit, mp_context=context
+            )
+        self._in_flight = {backend: 0 for backend in self.limits}
+        self._completed = {backend: 0 for backend in self.limits}
+
+    def supports(self, backend: str) -> bool:
+        return backend in self._executors
+
+    async def run(self, backend: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        if backend not in self._executors:
+            raise ValueError(f"Unsupported database type: {backend}")
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        # Counters are only touched from the event loop thread, so no lock
+        self._in_flight[backend] += 1
+        try:
+            return await loop.run_in_executor(self._executors[backend], call)
+        finally:
+            self._in_flight[backend] -= 1
+            self._completed[backend] += 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            backend: {
+                "limit": self.limits[backend],
+                "in_flight": self._in_flight[backend],
+                "completed": self._completed[backend],
+            }
+            for backend in self.limits
+        }
+
+    def shutdown(self, wait: bool = True):
+        for backend, executor in self._executors.items():
+            logger.info(f"Shutting down {backend} executor")
+            executor.shutdown(wait=wait)
@@ -0,0 +1,219 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+import itertools
+import secrets
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCursor:
+    def __init__(self, rows: Iterator[Dict], close: Callable[[], None]):
+        self._rows = rows
+        self._close = close
+        self._lookahead: List[Dict] = []
+        self.closed = False
+
+    def fetch(self, size: int) -> List[Dict]:
+        rows = self._lookahead + list(itertools.islice(self._rows, size - len(self._lookahead)))
+        # Read one row ahead so callers know whether another page exists
+        self._lookahead = list(itertools.islice(self._rows, 1))
+        return rows
+
+    @property
+    def exhausted(self) -> bool:
+        return not self._lookahead
+
+    def __iter__(self) -> Iterator[Dict]:
+        yield from self._lookahead
+        self._lookahead = []
+        yield from self._rows
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._close()
+
+
+class CursorNotFoundError(KeyError):
+    pass
+
+
+class CursorLimitError(RuntimeError):
+    pass
+
+
+@dataclass
+class _Entry:
+    cursor: ResultCursor
+    lock: threading.Lock
+    expires: float
+    scope: Hashable
+
+
+class CursorRegistry:
+    """Open paged cursors, each pinning a database connection until closed.
+
+    Cursors are capped in total and per scope, the (db_type, database)
+    whose connection pool they draw from. Room is made before a new cursor
+    opens its connection, by closing the scope's cursor closest to expiry,
+    so opening never waits on a pool that open cursors have drained.
+    Streams take a slot the same way but hold it until they are closed;
+    they have no token and are never evicted.
+    """
+
+    def __init__(
+        self, ttl_seconds: float = 300, max_cursors: int = 64, max_per_scope: int = 5
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_cursors = max_cursors
+        self.max_per_scope = max_per_scope
+        self._cursors: Dict[str, _Entry] = {}
+        # Slots held without a token: cursors being opened and open streams
+        self._held: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def first_page(
+        self, scope: Hashable, open_cursor: Callable[[], ResultCursor], page_size: int
+    ) -> Tuple[List[Dict], Optional[str]]:
+        self._reserve(scope)
+        try:
+            cursor = open_cursor()
+            try:
+                rows = cursor.fetch(page_size)
+            except Exception:
+                cursor.close()
+                raise
+            if cursor.exhausted:
+                cursor.close()
+                return rows, None
+            return rows, self._register(scope, cursor)
+        finally:
+            self._release(scope)
+
+    def open_stream(
+        self, scope: Hashable, open_cursor: Callable[[], ResultCursor]
+    ) -> ResultCursor:
+        # The returned cursor gives its slot back when it is closed
+        self._reserve(scope)
+        try:
+            cursor = open_cursor()
+        except Exception:
+            self._release(scope)
+            raise
+
+        def close():
+            try:
+                cursor.close()
+            finally:
+                self._release(scope)
+
+        return ResultCursor(iter(cursor), close)
+
+    def next_page(self, token: str, page_size: int) -> Tuple[List[Dict], Optional[str]]:
+        self.expire()
+        with self._lock:
+            entry = self._cursors.get(token)
+        if entry is None:
+            raise CursorNotFoundError(token)
+
+        with entry.lock:
+            if entry.cursor.closed:
+                # Expired or evicted while this request waited for the lock
+                raise CursorNotFoundError(token)
+            try:
+                rows = entry.cursor.fetch(page_size)
+            except Exception:
+                self._discard(token)
+                entry.cursor.close()
+                raise
+            if entry.cursor.exhausted:
+                self._discard(token)
+                entry.cursor.close()
+                return rows, None
+            with self._lock:
+                entry.expires = time.monotonic() + self.ttl_seconds
+        return rows, token
+
+    def close(self, token: str):
+        entry = self._discard(token)
+        if entry is not None:
+            self._close_entry(entry)
+
+    def expire(self):
+        now = time.monotonic()
+        with self._lock:
+            expired = [token for token, entry in self._cursors.items() if entry.expires <= now]
+        for token in expired:
+            logger.info(f"Closing expired cursor {token[:8]}")
+            self.close(token)
+
+    def close_all(self):
+        with self._lock:
+            tokens = list(self._cursors)
+        for token in tokens:
+            self.close(token)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "open_cursors": len(self._cursors),
+                "held_cursors": sum(self._held.values()),
+                "max_cursors": self.max_cursors,
+                "max_per_scope": self.max_per_scope,
+            }
+
+    def _reserve(self, scope: Hashable):
+        self.expire()
+        evicted = []
+        with self._lock:
+            held = self._held.get(scope, 0)
+            in_scope = sorted(
+                (token for token, entry in self._cursors.items() if entry.scope == scope),
+                key=lambda token: self._cursors[token].expires,
+            )
+            # Each open cursor pins a connection, so drop the ones closest to expiry
+            while in_scope and len(in_scope) + held >= self.max_per_scope:
+                evicted.append(self._cursors.pop(in_scope.pop(0)))
+            if len(in_scope) + held >= self.max_per_scope:
+                raise CursorLimitError(
+                    f"Too many cursors or streams open at once (limit {self.max_per_scope})"
+                )
+            while (
+                self._cursors
+                and len(self._cursors) + sum(self._held.values()) >= self.max_cursors
+            ):
+                oldest = min(self._cursors, key=lambda token: self._cursors[token].expires)
+                evicted.append(self._cursors.pop(oldest))
+            if len(self._cursors) + sum(self._held.values()) >= self.max_cursors:
+                raise CursorLimitError(
+                    f"Too many cursors or streams open at once (limit {self.max_cursors})"
+                )
+            self._held[scope] = held + 1
+        for entry in evicted:
+            self._close_entry(entry)
+
+    def _release(self, scope: Hashable):
+        with self._lock:
+            self._held[scope] -= 1
+            if not self._held[scope]:
+                del self._held[scope]
+
+    def _register(self, scope: Hashable, cursor: ResultCursor) -> str:
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._cursors[token] = _Entry(
+                cursor, threading.Lock(), time.monotonic() + self.ttl_seconds, scope
+            )
+        return token
+
+    def _discard(self, token: str) -> Optional[_Entry]:
+        with self._lock:
+            return self._cursors.pop(token, None)
+
+    def _close_entry(self, entry: _Entry):
+        # Waits for a fetch running on another thread to finish first
+        with entry.lock:
+            entry.cursor.close()
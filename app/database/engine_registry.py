@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import threading
+import logging
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+def pool_status(engine: Engine) -> Dict[str, Any]:
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    # Only QueuePool-style pools expose counters
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            status[name] = method()
+    return status
+
+
+class EngineRegistry:
+    def __init__(
+        self,
+        base_connection_string: str,
+        connect_args: Optional[Dict[str, Any]] = None,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        pool_timeout: float = 30,
+        max_engines: int = 32,
+    ):
+        self.base_connection_string = base_connection_string
+        self.connect_args = connect_args or {}
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+        self.pool_timeout = pool_timeout
+        self.max_engines = max_engines
+        self._engines: "OrderedDict[str, Engine]" = OrderedDict()
+        self._sessionmakers: Dict[str, sessionmaker] = {}
+        self._server_engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+        self.created = 0
+        self.disposed = 0
+
+    def get(self, database_name: str) -> Engine:
+        with self._lock:
+            engine = self._engines.get(database_name)
+            if engine is not None:
+                self._engines.move_to_end(database_name)
+                return engine
+
+            engine = self._create(
+                f"{self.base_connection_string}/{database_name}",
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+            )
+            self._engines[database_name] = engine
+            self.created += 1
+            evicted = self._evict_idle(keep=database_name)
+
+        for name, old in evicted:
+            logger.info(f"Disposing idle engine for database {name}")
+            old.dispose()
+        return engine
+
+    def get_sessionmaker(self, database_name: str) -> sessionmaker:
+        engine = self.get(database_name)
+        with self._lock:
+            factory = self._sessionmakers.get(database_name)
+            if factory is None or factory.kw.get("bind") is not engine:
+                factory = self._sessionmakers[database_name] = sessionmaker(bind=engine)
+            return factory
+
+    def server_engine(self) -> Engine:
+        # One small pool without a default schema, shared by all DDL
+        with self._lock:
+            if self._server_engine is None:
+                self._server_engine = self._create(
+                    self.base_connection_string, pool_size=1, max_overflow=2
+                )
+            return self._server_engine
+
+    def dispose(self, database_name: str):
+        with self._lock:
+            engine = self._engines.pop(database_name, None)
+            self._sessionmakers.pop(database_name, None)
+            if engine is not None:
+                self.disposed += 1
+        if engine is not None:
+            engine.dispose()
+
+    def dispose_all(self):
+        with self._lock:
+            engines = list(self._engines.values())
+            if self._server_engine is not None:
+                engines.append(self._server_engine)
+            self.disposed += len(self._engines)
+            self._engines.clear()
+            self._sessionmakers.clear()
+            self._server_engine = None
+        for engine in engines:
+            engine.dispose()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            engines = dict(self._engines)
+            server = self._server_engine
+        per_database = {name: pool_status(engine) for name, engine in engines.items()}
+        return {
+            "engines": len(engines),
+            "max_engines": self.max_engines,
+            "created": self.created,
+            "disposed": self.disposed,
+            "checked_out": sum(s.get("checkedout", 0) for s in per_database.values()),
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "databases": per_database,
+            "server": pool_status(server) if server is not None else None,
+        }
+
+    def _create(self, url: str, pool_size: int, max_overflow: int) -> Engine:
+        return create_engine(
+            url,
+            connect_args=self.connect_args,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=self.pool_recycle,
+            pool_pre_ping=self.pool_pre_ping,
+            pool_timeout=self.pool_timeout,
+        )
+
+    def _evict_idle(self, keep: str):
+        # Least recently used first; engines with connections checked out
+        # (open cursors, running queries) are skipped rather than disposed
+        evicted = []
+        if len(self._engines) <= self.max_engines:
+            return evicted
+        for name in list(self._engines):
+            if len(self._engines) <= self.max_engines:
+                break
+            engine = self._engines[name]
+            if name == keep or pool_status(engine).get("checkedout", 0):
+                continue
+            del self._engines[name]
+            self._sessionmakers.pop(name, None)
+            self.disposed += 1
+            evicted.append((name, engine))
+        if len(self._engines) > self.max_engines:
+            logger.warning(
+                f"{len(self._engines)} MySQL engines open (limit {self.max_engines}); "
+                "all others have connections checked out"
+            )
+        return evicted
@@ -1,12 +1,23 @@
 from pymongo import MongoClient
 from typing import Optional, List, Dict, Any
 from bson import ObjectId
+from app.database.mongo_schema import CollectionSchema, MongoSchemaInferer
+from app.database.cursor_registry import ResultCursor
+from app.metrics import observe_rows, stage
 import math
 
 
 class MongoManager:
-    def __init__(self, connection_string: str):
+    def __init__(
+        self,
+        connection_string: str,
+        schema_sample_size: int = 200,
+        schema_max_workers: int = 8,
+    ):
         self.client = MongoClient(connection_string)
+        self.schema_inferer = MongoSchemaInferer(
+            self, sample_size=schema_sample_size, max_workers=schema_max_workers
+        )
 
     def get_database(self, database_name: str):
         if not database_name:
@@ -18,40 +29,67 @@ class MongoManager:
         return db.list_collection_names()
 
     def get_fields(self, collection_name: str, database_name: str) -> List[str]:
-        db = self.get_database(database_name)
-        sample_doc = db[collection_name].find_one()
-        if not sample_doc:
-            return []
-        fields = list(sample_doc.keys())
-        if "_id" in fields:
-            fields.remove("_id")
-        return fields
+        return self.get_schema(collection_name, database_name).field_names()
+
+    def get_schema(self, collection_name: str, database_name: str) -> CollectionSchema:
+        return self.schema_inferer.infer(collection_name, database_name)
+
+    def get_schemas(self, database_name: str) -> Dict[str, CollectionSchema]:
+        return self.schema_inferer.infer_many(
+            self.get_collections(database_name), database_name
+        )
 
     def execute_query(
-        self, collection_name: str, query: Dict[str, Any], database_name: str
+        self,
+        collection_name: str,
+        query: Dict[str, Any],
+        database_name: str,
+        clean: bool = True,
     ) -> List[Dict]:
         db = self.get_database(database_name)
         collection = db[collection_name]
 
-        # Check if the query is an aggregation pipeline
-        if isinstance(query, list):
-            has_limit = any('$limit' in stage for stage in query)
-            if not has_limit:
-                query.append({'$limit': 30})
-            results = list(collection.aggregate(query))
-        else:
-            results = list(collection.find(query).limit(30))
-        return self._clean_mongo_results(results)
+        with stage("execute", "mongodb"):
+            # Check if the query is an aggregation pipeline
+            if isinstance(query, list):
+                has_limit = any('$limit' in step for step in query)
+                if not has_limit:
+                    query = query + [{'$limit': 30}]
+                results = list(collection.aggregate(query))
+            else:
+                results = list(collection.find(query).limit(30))
+        observe_rows("execute", "mongodb", len(results))
+        # Callers that encode the documents themselves can skip the cleaning walk
+        if not clean:
+            return results
+        with stage("clean", "mongodb"):
+            return self._clean_mongo_results(results)
+
+    def open_cursor(
+        self,
+        collection_name: str,
+        query: Any,
+        database_name: str,
+        batch_size: int = 500,
+        clean: bool = True,
+    ) -> ResultCursor:
+        collection = self.get_database(database_name)[collection_name]
+        with stage("open_cursor", "mongodb"):
+            if isinstance(query, list):
+                cursor = collection.aggregate(query, batchSize=batch_size)
+            else:
+                cursor = collection.find(query).batch_size(batch_size)
+        rows = (self._clean_mongo_document(doc) for doc in cursor) if clean else cursor
+        return ResultCursor(rows, cursor.close)
 
     def _clean_mongo_results(self, results: List[Dict]) -> List[Dict]:
-        cleaned_results = []
-        for doc in results:
-            doc_copy = doc.copy()
-            doc_copy.pop("_id", None)
-            # Handle non-JSON compliant values
-            cleaned_doc = self._handle_non_json_values(doc_copy)
-            cleaned_results.append(cleaned_doc)
-        return cleaned_results
+        return [self._clean_mongo_document(doc) for doc in results]
+
+    def _clean_mongo_document(self, doc: Dict) -> Dict:
+        doc_copy = doc.copy()
+        doc_copy.pop("_id", None)
+        # Handle non-JSON compliant values
+        return self._handle_non_json_values(doc_copy)
 
     def _handle_non_json_values(self, obj):
         if isinstance(obj, dict):
@@ -0,0 +1,254 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+import ast
+import hashlib
+import json
+import threading
+from bson import json_util
+
+STAGE_OPERATORS = frozenset(
+    {
+        "$match", "$project", "$group", "$sort", "$limit", "$skip", "$unwind",
+        "$count", "$addFields", "$set", "$unset", "$sortByCount", "$bucket",
+        "$bucketAuto", "$facet", "$lookup", "$sample", "$replaceRoot", "$replaceWith",
+    }
+)
+
+# Query, accumulator and expression operators. Anything that writes ($out,
+# $merge) or runs server-side JavaScript ($where, $function, $accumulator) is
+# deliberately absent.
+OPERATORS = frozenset(
+    {
+        # comparison / logical / element
+        "$eq", "$ne", "$gt", "$gte", "$lt", "$lte", "$in", "$nin", "$cmp",
+        "$and", "$or", "$nor", "$not", "$exists", "$type", "$regex", "$options",
+        "$all", "$elemMatch", "$size", "$expr", "$mod",
+        # accumulators
+        "$sum", "$avg", "$min", "$max", "$first", "$last", "$push", "$addToSet",
+        "$count", "$stdDevPop", "$stdDevSamp",
+        # arithmetic
+        "$add", "$subtract", "$multiply", "$divide", "$abs", "$ceil", "$floor",
+        "$round", "$trunc", "$sqrt", "$pow", "$exp", "$ln", "$log", "$log10",
+        # strings
+        "$concat", "$substr", "$substrCP", "$toLower", "$toUpper", "$trim",
+        "$split", "$strLenCP", "$regexMatch",
+        # conditionals, conversion, dates, arrays, objects
+        "$cond", "$ifNull", "$switch", "$toString", "$toInt", "$toLong",
+        "$toDouble", "$toDecimal", "$toDate", "$convert", "$year", "$month",
+        "$dayOfMonth", "$dayOfWeek", "$hour", "$minute", "$dateToString",
+        "$arrayElemAt", "$filter", "$map", "$slice", "$isArray", "$literal",
+        "$mergeObjects",
+    }
+)
+
+_PROJECTION_FLAGS = (0, 1, True, False)
+
+
+class PipelineValidationError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    digest: str
+    stages: Optional[Tuple[Dict[str, Any], ...]] = None
+    filter: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_pipeline(self) -> bool:
+        return self.stages is not None
+
+    @property
+    def query(self) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+        # Plans are shared between requests, so hand out a fresh top-level
+        # list; callers must not mutate the stage documents themselves
+        return list(self.stages) if self.is_pipeline else self.filter
+
+
+def parse_query_text(text: str) -> Any:
+    try:
+        return json_util.loads(text)
+    except ValueError:
+        pass
+    # Python literal syntax (single quotes, True/None) was accepted when the
+    # query was eval'd; literal_eval parses it without executing anything
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError) as e:
+        raise PipelineValidationError(f"Query is not valid extended JSON: {str(e)}") from e
+    try:
+        text = json.dumps(value)
+    except TypeError as e:
+        # Literals with no JSON form: sets, bytes, complex numbers, tuple keys
+        raise PipelineValidationError(f"Query is not valid extended JSON: {str(e)}") from e
+    return json_util.loads(text)
+
+
+def _validate_value(value: Any, path: str):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key.startswith("$") and key not in OPERATORS:
+                raise PipelineValidationError(f"Operator {key} is not allowed (at {path})")
+            _validate_value(item, f"{path}.{key}")
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            _validate_value(item, f"{path}[{index}]")
+
+
+def validate_pipeline(stages: Any, path: str = "pipeline"):
+    if not isinstance(stages, list):
+        raise PipelineValidationError(f"{path} must be a list of stages")
+    for index, stage in enumerate(stages):
+        stage_path = f"{path}[{index}]"
+        if not isinstance(stage, dict) or len(stage) != 1:
+            raise PipelineValidationError(f"{stage_path} must be a single-operator document")
+        (name, spec), = stage.items()
+        if name not in STAGE_OPERATORS:
+            raise PipelineValidationError(f"Stage {name} is not allowed ({stage_path})")
+        if name == "$facet" and isinstance(spec, dict):
+            for facet, sub_pipeline in spec.items():
+                validate_pipeline(sub_pipeline, f"{stage_path}.{facet}")
+        elif name == "$lookup" and isinstance(spec, dict) and "pipeline" in spec:
+            validate_pipeline(spec["pipeline"], f"{stage_path}.pipeline")
+            _validate_value({k: v for k, v in spec.items() if k != "pipeline"}, stage_path)
+        else:
+            _validate_value(spec, f"{stage_path}.{name}")
+
+
+def _match_fields(match: Dict[str, Any]) -> Optional[Set[str]]:
+    # Field paths a $match filters on, or None when it cannot be analysed
+    fields: Set[str] = set()
+    for key, value in match.items():
+        if key in ("$and", "$or", "$nor"):
+            for clause in value:
+                clause_fields = _match_fields(clause) if isinstance(clause, dict) else None
+                if clause_fields is None:
+                    return None
+                fields |= clause_fields
+        elif key.startswith("$"):
+            return None
+        else:
+            fields.add(key)
+    return fields
+
+
+def _overlaps(field: str, other: str) -> bool:
+    return field == other or field.startswith(f"{other}.") or other.startswith(f"{field}.")
+
+
+def _passes_projection(fields: Set[str], spec: Dict[str, Any]) -> bool:
+    if not all(value in _PROJECTION_FLAGS for value in spec.values()):
+        return False  # computed fields may shadow what the $match reads
+    # Any included field, _id too, makes this an inclusion projection
+    included = [key for key, value in spec.items() if value]
+    excluded = [key for key, value in spec.items() if not value]
+    for field in fields:
+        if any(_overlaps(field, key) for key in excluded):
+            return False
+        if field == "_id" or field.startswith("_id."):
+            continue
+        if included and not any(field == key or field.startswith(f"{key}.") for key in included):
+            return False
+    return True
+
+
+def _push_match_before(stage: Dict[str, Any], match: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    (name, spec), = stage.items()
+    if name == "$sort":
+        return [{"$match": match}, stage]
+
+    fields = _match_fields(match)
+    if fields is None:
+        return None
+    if name == "$project" and isinstance(spec, dict) and _passes_projection(fields, spec):
+        return [{"$match": match}, stage]
+    if name in ("$addFields", "$set") and isinstance(spec, dict):
+        if not any(_overlaps(field, key) for field in fields for key in spec):
+            return [{"$match": match}, stage]
+    if name == "$unset":
+        removed = [spec] if isinstance(spec, str) else spec
+        if not any(_overlaps(field, key) for field in fields for key in removed):
+            return [{"$match": match}, stage]
+    return None
+
+
+def _merge_matches(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    if first.keys().isdisjoint(second.keys()):
+        return {**first, **second}
+    return {"$and": [first, second]}
+
+
+def optimize_pipeline(stages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Move $match stages as early as they can go without changing results and
+    # fold adjacent ones together. The server's dependency analysis already
+    # prunes unused fields ahead of $group, so projections are left in place.
+    # A $match never moves past a $group, not even one on the group key:
+    # when the key holds arrays, {f: v} on the documents and {_id: v} on the
+    # groups need not select the same groups.
+    stages = list(stages)
+    changed = True
+    while changed:
+        changed = False
+        for index in range(1, len(stages)):
+            previous, stage = stages[index - 1], stages[index]
+            if "$match" not in stage or not isinstance(stage["$match"], dict):
+                continue
+            if "$match" in previous and isinstance(previous["$match"], dict):
+                replacement = [{"$match": _merge_matches(previous["$match"], stage["$match"])}]
+            else:
+                replacement = _push_match_before(previous, stage["$match"])
+            if replacement is not None:
+                stages[index - 1 : index + 1] = replacement
+                changed = True
+                break
+    return stages
+
+
+class MongoQueryCompiler:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._plans: "OrderedDict[str, CompiledQuery]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def compile(self, text: str) -> CompiledQuery:
+        digest = hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+        with self._lock:
+            plan = self._plans.get(digest)
+            if plan is not None:
+                self._plans.move_to_end(digest)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = self._compile(text, digest)
+        with self._lock:
+            self._plans[digest] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+    def _compile(self, text: str, digest: str) -> CompiledQuery:
+        value = parse_query_text(text.strip())
+        if isinstance(value, dict):
+            _validate_value(value, "filter")
+            return CompiledQuery(digest=digest, filter=value)
+        validate_pipeline(value)
+        return CompiledQuery(digest=digest, stages=tuple(optimize_pipeline(value)))
+
+    def clear(self):
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._plans),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
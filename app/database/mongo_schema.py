@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List
+from bson import Decimal128, ObjectId
+import logging
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_TYPES = {"int", "double", "decimal"}
+
+
+def bson_type_name(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "double"
+    if isinstance(value, (Decimal128, Decimal)):
+        return "decimal"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "date"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    return type(value).__name__
+
+
+@dataclass
+class FieldStats:
+    path: str
+    count: int = 0
+    types: Dict[str, int] = field(default_factory=dict)
+    presence: float = 0.0
+
+    @property
+    def dominant_type(self) -> str:
+        non_null = {t: c for t, c in self.types.items() if t != "null"}
+        if not non_null:
+            return "null"
+        return max(non_null, key=non_null.get)
+
+    @property
+    def is_numeric(self) -> bool:
+        non_null = sum(c for t, c in self.types.items() if t != "null")
+        numeric = sum(c for t, c in self.types.items() if t in NUMERIC_TYPES)
+        return non_null > 0 and numeric * 2 > non_null
+
+    @property
+    def is_container(self) -> bool:
+        return self.dominant_type == "object"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "types": dict(self.types),
+            "presence": self.presence,
+            "dominant_type": self.dominant_type,
+        }
+
+
+@dataclass
+class CollectionSchema:
+    collection_name: str
+    sample_size: int = 0
+    fields: Dict[str, FieldStats] = field(default_factory=dict)
+
+    def field_names(self) -> List[str]:
+        return [path for path, stats in self.fields.items() if not stats.is_container]
+
+    def numeric_fields(self) -> List[str]:
+        return [path for path, stats in self.fields.items() if stats.is_numeric]
+
+    def categorical_fields(self) -> List[str]:
+        return [
+            path
+            for path, stats in self.fields.items()
+            if not stats.is_numeric and not stats.is_container
+        ]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection_name,
+            "sample_size": self.sample_size,
+            "fields": [stats.as_dict() for stats in self.fields.values()],
+        }
+
+    @classmethod
+    def from_documents(
+        cls, collection_name: str, documents: Iterable[Dict]
+    ) -> "CollectionSchema":
+        schema = cls(collection_name)
+        for doc in documents:
+            schema.sample_size += 1
+            schema._observe(doc, "")
+        for stats in schema.fields.values():
+            stats.presence = stats.count / schema.sample_size
+        return schema
+
+    def _observe(self, doc: Dict, prefix: str):
+        for key, value in doc.items():
+            if not prefix and key == "_id":
+                continue
+            path = f"{prefix}{key}"
+            stats = self.fields.get(path)
+            if stats is None:
+                stats = self.fields[path] = FieldStats(path)
+            stats.count += 1
+            type_name = bson_type_name(value)
+            stats.types[type_name] = stats.types.get(type_name, 0) + 1
+            if type_name == "object":
+                self._observe(value, f"{path}.")
+
+
+class MongoSchemaInferer:
+    def __init__(self, mongo_manager, sample_size: int = 200, max_workers: int = 8):
+        self.mongo_manager = mongo_manager
+        self.sample_size = sample_size
+        self.max_workers = max_workers
+
+    def infer(self, collection_name: str, database_name: str) -> CollectionSchema:
+        db = self.mongo_manager.get_database(database_name)
+        documents = db[collection_name].aggregate(
+            [{"$sample": {"size": self.sample_size}}]
+        )
+        return CollectionSchema.from_documents(collection_name, documents)
+
+    def infer_many(
+        self, collection_names: List[str], database_name: str
+    ) -> Dict[str, CollectionSchema]:
+        if not collection_names:
+            return {}
+
+        workers = min(self.max_workers, len(collection_names))
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="mongo-schema"
+        ) as executor:
+            schemas = executor.map(
+                lambda name: self.infer(name, database_name), collection_names
+            )
+            return dict(zip(collection_names, schemas))
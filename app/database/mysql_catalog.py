@@ -0,0 +1,160 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+NUMERIC_DATA_TYPES = {
+    "tinyint",
+    "smallint",
+    "mediumint",
+    "int",
+    "integer",
+    "bigint",
+    "decimal",
+    "numeric",
+    "float",
+    "double",
+    "real",
+}
+
+COLUMNS_QUERY = text(
+    """
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE, c.DATA_TYPE,
+           c.IS_NULLABLE, c.COLUMN_DEFAULT, c.COLUMN_KEY
+    FROM information_schema.COLUMNS c
+    JOIN information_schema.TABLES t
+      ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+    WHERE c.TABLE_SCHEMA = :database_name AND t.TABLE_TYPE = 'BASE TABLE'
+    ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+    """
+)
+
+KEYS_QUERY = text(
+    """
+    SELECT 'index' AS kind, TABLE_NAME, INDEX_NAME AS name, COLUMN_NAME,
+           SEQ_IN_INDEX AS position, NON_UNIQUE AS non_unique,
+           NULL AS referred_table, NULL AS referred_column
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = :database_name
+    UNION ALL
+    SELECT 'foreign_key', TABLE_NAME, CONSTRAINT_NAME, COLUMN_NAME,
+           ORDINAL_POSITION, NULL,
+           REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME
+    FROM information_schema.KEY_COLUMN_USAGE
+    WHERE TABLE_SCHEMA = :database_name AND REFERENCED_TABLE_NAME IS NOT NULL
+    ORDER BY TABLE_NAME, kind, name, position
+    """
+)
+
+
+@dataclass(frozen=True)
+class ColumnInfo:
+    name: str
+    type: str
+    data_type: str
+    nullable: bool
+    default: Optional[str] = None
+    key: str = ""
+
+    @property
+    def is_numeric(self) -> bool:
+        return self.data_type in NUMERIC_DATA_TYPES
+
+    def as_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "nullable": self.nullable,
+            "default": self.default,
+        }
+
+
+@dataclass
+class IndexInfo:
+    name: str
+    unique: bool
+    columns: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ForeignKeyInfo:
+    name: str
+    referred_table: str
+    columns: List[str] = field(default_factory=list)
+    referred_columns: List[str] = field(default_factory=list)
+
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[ColumnInfo] = field(default_factory=list)
+    indexes: Dict[str, IndexInfo] = field(default_factory=dict)
+    foreign_keys: Dict[str, ForeignKeyInfo] = field(default_factory=dict)
+
+    @property
+    def column_names(self) -> List[str]:
+        return [col.name for col in self.columns]
+
+
+@dataclass
+class MySQLCatalog:
+    database_name: str
+    tables: Dict[str, TableInfo] = field(default_factory=dict)
+
+    def table_names(self) -> List[str]:
+        return list(self.tables)
+
+    def get_table(self, table_name: str) -> TableInfo:
+        if table_name not in self.tables:
+            raise KeyError(
+                f"Table '{table_name}' not found in database '{self.database_name}'"
+            )
+        return self.tables[table_name]
+
+    def get_columns(self, table_name: str) -> List[Dict]:
+        return [col.as_dict() for col in self.get_table(table_name).columns]
+
+    def get_column_names(self, table_name: str) -> List[str]:
+        return self.get_table(table_name).column_names
+
+    def as_columns_map(self) -> Dict[str, List[str]]:
+        return {name: table.column_names for name, table in self.tables.items()}
+
+    @classmethod
+    def load(cls, engine: Engine, database_name: str) -> "MySQLCatalog":
+        catalog = cls(database_name)
+        params = {"database_name": database_name}
+
+        with engine.connect() as conn:
+            for row in conn.execute(COLUMNS_QUERY, params).mappings():
+                table = catalog.tables.setdefault(
+                    row["TABLE_NAME"], TableInfo(row["TABLE_NAME"])
+                )
+                table.columns.append(
+                    ColumnInfo(
+                        name=row["COLUMN_NAME"],
+                        type=row["COLUMN_TYPE"],
+                        data_type=row["DATA_TYPE"].lower(),
+                        nullable=row["IS_NULLABLE"] == "YES",
+                        default=row["COLUMN_DEFAULT"],
+                        key=row["COLUMN_KEY"] or "",
+                    )
+                )
+
+            for row in conn.execute(KEYS_QUERY, params).mappings():
+                table = catalog.tables.get(row["TABLE_NAME"])
+                if table is None:
+                    continue
+                if row["kind"] == "index":
+                    index = table.indexes.setdefault(
+                        row["name"], IndexInfo(row["name"], not row["non_unique"])
+                    )
+                    index.columns.append(row["COLUMN_NAME"])
+                else:
+                    fk = table.foreign_keys.setdefault(
+                        row["name"], ForeignKeyInfo(row["name"], row["referred_table"])
+                    )
+                    fk.columns.append(row["COLUMN_NAME"])
+                    fk.referred_columns.append(row["referred_column"])
+
+        return catalog
@@ -1,31 +1,49 @@
-from sqlalchemy import create_engine, inspect
-from sqlalchemy.orm import sessionmaker
-from typing import Optional, Dict, List
+from sqlalchemy import inspect, text
+from typing import Any, Optional, Dict, List
 from sqlalchemy.engine import Engine
 from urllib.parse import urlparse, urlunparse
+from app.database.engine_registry import EngineRegistry
+from app.database.mysql_catalog import MySQLCatalog
+from app.database.cursor_registry import ResultCursor
+from app.metrics import observe_rows, stage
 import logging
 
 logger = logging.getLogger(__name__)
 
 class MySQLManager:
-    def __init__(self, connection_string: str):
+    def __init__(
+        self,
+        connection_string: str,
+        local_infile: bool = False,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        pool_timeout: float = 30,
+        max_engines: int = 32,
+    ):
         self.base_connection_string = connection_string
-        self.engines: Dict[str, Engine] = {}
+        self.local_infile = local_infile
+        self.engines = EngineRegistry(
+            connection_string,
+            connect_args=self._connect_args(),
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
+            pool_timeout=pool_timeout,
+            max_engines=max_engines,
+        )
 
     def get_engine(self, database_name: str) -> Engine:
         if not database_name:
             raise ValueError("Database name is required")
-
-        if database_name not in self.engines:
-            # Create a new connection string with the specified database
-            db_connection_string = f"{self.base_connection_string}/{database_name}"
-            self.engines[database_name] = create_engine(db_connection_string)
-        return self.engines[database_name]
+        return self.engines.get(database_name)
 
     def get_session(self, database_name: str):
-        engine = self.get_engine(database_name)
-        Session = sessionmaker(bind=engine)
-        return Session()
+        if not database_name:
+            raise ValueError("Database name is required")
+        return self.engines.get_sessionmaker(database_name)()
 
     def get_tables(self, database_name: str) -> List[str]:
         engine = self.get_engine(database_name)
@@ -37,16 +55,84 @@ class MySQLManager:
         inspector = inspect(engine)
         return inspector.get_columns(table_name)
 
-    def execute_query(self, query: str, database_name: str) -> List[Dict]:
+    def get_catalog(self, database_name: str) -> MySQLCatalog:
+        engine = self.get_engine(database_name)
+        return MySQLCatalog.load(engine, database_name)
+
+    def execute_query(
+        self,
+        query: str,
+        database_name: str,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict]:
         query = query.strip()
         if 'LIMIT' not in query.upper():
             query = f"{query} LIMIT 30"
-        
-        with self.get_session(database_name) as session:
-            result = session.execute(query)
-            return [dict(row) for row in result]
+
+        with stage("execute", "mysql"), self.get_engine(database_name).connect() as conn:
+            result = self._execute(conn, query, parameters)
+            rows = [dict(row) for row in result.mappings()]
+        observe_rows("execute", "mysql", len(rows))
+        return rows
+
+    def execute_statement(
+        self,
+        query: str,
+        database_name: str,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> Optional[int]:
+        # Writes and DDL run as sent, in a transaction that commits, and
+        # report the number of affected rows (None when the driver cannot
+        # tell) instead of returning rows
+        with stage("execute", "mysql"), self.get_engine(database_name).begin() as conn:
+            result = self._execute(conn, query.strip().rstrip(";"), parameters)
+            return result.rowcount if result.rowcount >= 0 else None
+
+    def open_cursor(
+        self,
+        query: str,
+        database_name: str,
+        parameters: Optional[Dict[str, Any]] = None,
+    ) -> ResultCursor:
+        # Unbuffered server-side cursor: rows are read off the wire as pages
+        # are requested instead of being materialized up front
+        conn = self.get_engine(database_name).connect()
+        try:
+            with stage("open_cursor", "mysql"):
+                result = self._execute(
+                    conn.execution_options(stream_results=True),
+                    query.strip().rstrip(";"),
+                    parameters,
+                )
+        except Exception:
+            conn.close()
+            raise
+
+        def close():
+            result.close()
+            conn.close()
+
+        return ResultCursor((dict(row) for row in result.mappings()), close)
+
+    def _execute(self, conn, query: str, parameters: Optional[Dict[str, Any]]):
+        if parameters is None:
+            # Free-form SQL is sent without a parameter set, so the driver
+            # does not %-format it and '%' in LIKE patterns or ':' in
+            # literals reach the server as written
+            return conn.execution_options(no_parameters=True).exec_driver_sql(query)
+        # Generated statements use :name placeholders; values are sent as
+        # bound parameters and the compiled text() is reused per statement
+        return conn.execute(text(query), parameters)
 
     def create_database_if_not_exists(self, database_name: str):
-        engine = create_engine(self.base_connection_string)
-        with engine.connect() as conn:
-            conn.execute(f"CREATE DATABASE IF NOT EXISTS {database_name}")
+        with self.engines.server_engine().begin() as conn:
+            conn.execute(text(f"CREATE DATABASE IF NOT EXISTS `{database_name}`"))
+
+    def engine_stats(self) -> Dict[str, Any]:
+        return self.engines.stats()
+
+    def dispose(self):
+        self.engines.dispose_all()
+
+    def _connect_args(self) -> Dict:
+        return {"local_infile": True} if self.local_infile else {}
@@ -1,9 +1,56 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routes import router
+from app.api.routes import (
+    router,
+    db_executor,
+    translation_cache,
+    cursor_registry,
+    mysql_manager,
+    get_nlp,
+    index_advisor,
+    apply_index_recommendations_periodically,
+    expire_cursors_periodically,
+)
 from app.config import settings
+from app.metrics import HTTP_SECONDS
+from app.services.workload_recorder import WorkloadRecorder
+import asyncio
+import time
+
+workload_recorder = (
+    WorkloadRecorder(settings.workload_record_path, settings.workload_record_max_bytes)
+    if settings.workload_record_path
+    else None
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.nlp_preload:
+        # Load NLP resources before serving so missing data fails the startup
+        get_nlp().parse("warm up the query parser")
+    cursor_task = asyncio.create_task(
+        expire_cursors_periodically(settings.query_cursor_reap_seconds)
+    )
+    index_task = None
+    if index_advisor is not None and settings.index_advisor_interval_seconds > 0:
+        index_task = asyncio.create_task(
+            apply_index_recommendations_periodically(settings.index_advisor_interval_seconds)
+        )
+    yield
+    cursor_task.cancel()
+    if index_task is not None:
+        index_task.cancel()
+    translation_cache.save()
+    cursor_registry.close_all()
+    db_executor.shutdown()
+    mysql_manager.dispose()
+    if workload_recorder is not None:
+        workload_recorder.close()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Allow Cors
 app.add_middleware(
@@ -13,6 +60,40 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    recording = workload_recorder is not None and workload_recorder.wants(request.url.path)
+    body = await request.body() if recording else b""
+    received = time.time()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep cardinality bounded
+        elapsed = time.perf_counter() - started
+        route = request.scope.get("route")
+        HTTP_SECONDS.observe(
+            elapsed,
+            method=request.method,
+            path=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+        if recording:
+            workload_recorder.record(
+                request.method,
+                request.url.path,
+                dict(request.query_params),
+                body,
+                status,
+                elapsed,
+                received,
+            )
+
+
 app.include_router(router)
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+import threading
+import time
+
+LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+ROW_BUCKETS = (0, 1, 10, 30, 100, 1_000, 10_000, 100_000, 1_000_000)
+BYTE_BUCKETS = (256, 1024, 4096, 16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_number(float(bound))}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            yield f"{self.name}_bucket{labels} {int(values[-2])}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_count{labels} {int(values[-2])}"
+            yield f"{self.name}_sum{labels} {_format_number(float(values[-1]))}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "chatdb_stage_duration_seconds",
+    "Time spent in each stage of a request.",
+    ("stage", "db_type", "intent"),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "chatdb_stage_errors_total",
+    "Stages that raised an exception.",
+    ("stage", "db_type", "intent"),
+)
+RESULT_ROWS = REGISTRY.histogram(
+    "chatdb_result_rows",
+    "Rows returned by a query execution stage.",
+    ("stage", "db_type"),
+    buckets=ROW_BUCKETS,
+)
+RESPONSE_BYTES = REGISTRY.histogram(
+    "chatdb_response_bytes",
+    "Serialized response body size.",
+    ("endpoint", "db_type"),
+    buckets=BYTE_BUCKETS,
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "chatdb_http_request_duration_seconds",
+    "End-to-end HTTP request latency.",
+    ("method", "path", "status"),
+)
+
+
+@contextmanager
+def stage(name: str, db_type: str = "", intent: str = ""):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=name, db_type=db_type, intent=intent)
+        raise
+    finally:
+        STAGE_SECONDS.observe(
+            time.perf_counter() - started, stage=name, db_type=db_type, intent=intent
+        )
+
+
+def observe_stage(name: str, seconds: float, db_type: str = "", intent: str = ""):
+    # For stages whose labels are only known once they finish
+    STAGE_SECONDS.observe(seconds, stage=name, db_type=db_type, intent=intent)
+
+
+def observe_rows(name: str, db_type: str, rows: int):
+    RESULT_ROWS.observe(rows, stage=name, db_type=db_type)
@@ -0,0 +1,332 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import posixpath
+import tarfile
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz")
+DB_TYPE_BY_EXTENSION = {
+    ".csv": "mysql",
+    ".json": "mongodb",
+    ".ndjson": "mongodb",
+    ".jsonl": "mongodb",
+}
+COPY_CHUNK_BYTES = 1024 * 1024
+
+
+def is_archive(name: str) -> bool:
+    return name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def _member_path(name: str) -> Optional[str]:
+    # Archive member name as a safe relative path, or None to skip it
+    path = posixpath.normpath(name.replace("\\", "/"))
+    parts = path.split("/")
+    if path.startswith("/") or ".." in parts or path == ".":
+        raise ValueError(f"Unsafe path in archive: {name}")
+    if any(part.startswith(".") or part == "__MACOSX" for part in parts):
+        return None
+    return path
+
+
+def extract_archive(archive_path: str, target_dir: str, max_bytes: int) -> List[str]:
+    """Extract the regular files of a zip or tar archive into ``target_dir``.
+
+    Returns their paths relative to ``target_dir``. Hidden files are
+    skipped; absolute or ``..`` member paths and archives that expand past
+    ``max_bytes`` are rejected.
+    """
+    extracted: List[str] = []
+    budget = [max_bytes]
+
+    def copy(source, relative: str):
+        destination = os.path.join(target_dir, *relative.split("/"))
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        with open(destination, "wb") as out:
+            # Declared sizes can lie, so count what is actually written
+            while chunk := source.read(COPY_CHUNK_BYTES):
+                budget[0] -= len(chunk)
+                if budget[0] < 0:
+                    raise ValueError(f"Archive expands past {max_bytes} bytes")
+                out.write(chunk)
+        extracted.append(relative)
+
+    if archive_path.lower().endswith(".zip"):
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                relative = _member_path(member.filename)
+                if member.is_dir() or relative is None:
+                    continue
+                with archive.open(member) as source:
+                    copy(source, relative)
+    else:
+        with tarfile.open(archive_path, "r:*") as archive:
+            for member in archive:
+                relative = _member_path(member.name)
+                if not member.isfile() or relative is None:
+                    continue
+                with archive.extractfile(member) as source:
+                    copy(source, relative)
+    return extracted
+
+
+@dataclass(frozen=True)
+class BatchUploadJob:
+    file: str
+    path: str
+    db_type: str
+    table_name: str
+    database_name: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "file": self.file,
+            "db_type": self.db_type,
+            "database_name": self.database_name,
+            "table_name": self.table_name,
+        }
+
+
+def plan_jobs(
+    files: Dict[str, str],
+    manifest: Optional[Dict[str, Any]] = None,
+    database_name: Optional[str] = None,
+) -> List[BatchUploadJob]:
+    """Map uploaded files (name -> local path) to the tables they load.
+
+    A manifest looks like::
+
+        {"database_name": "shop",
+         "files": [{"file": "data/sellers.json", "table_name": "sellers",
+                    "db_type": "mongodb", "database_name": "shop"}]}
+
+    Only ``file`` is required per entry; a manifest lists exactly the files
+    to load. Without one every CSV/JSON file is loaded. Missing values
+    default to the table named after the file, the database type implied by
+    its extension and the manifest's or the request's database name.
+    """
+    default_database = database_name
+    if manifest is None:
+        entries = [
+            {"file": name}
+            for name in sorted(files)
+            if os.path.splitext(name)[1].lower() in DB_TYPE_BY_EXTENSION
+        ]
+    else:
+        if not isinstance(manifest, dict) or not isinstance(manifest.get("files"), list):
+            raise ValueError("Manifest must be an object with a 'files' list")
+        default_database = manifest.get("database_name") or database_name
+        entries = manifest["files"]
+    if not entries:
+        raise ValueError("No CSV or JSON files to upload")
+
+    # Manifests may name archive members by basename when that is unambiguous
+    basenames: Dict[str, Optional[str]] = {}
+    for name in files:
+        base = posixpath.basename(name)
+        basenames[base] = None if base in basenames else name
+
+    jobs: List[BatchUploadJob] = []
+    targets = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("file"):
+            raise ValueError(f"Manifest entry needs a 'file': {entry!r}")
+        name = entry["file"]
+        if name not in files:
+            name = basenames.get(posixpath.basename(name))
+        if name is None:
+            raise ValueError(f"File not found in upload: {entry['file']}")
+
+        stem, extension = os.path.splitext(posixpath.basename(name))
+        db_type = entry.get("db_type") or DB_TYPE_BY_EXTENSION.get(extension.lower())
+        if db_type not in ("mysql", "mongodb"):
+            raise ValueError(f"Cannot tell the database type of {name}")
+        table_name = entry.get("table_name") or stem
+        target_database = entry.get("database_name") or default_database
+        if not target_database:
+            raise ValueError(f"Database name is required for {name}")
+
+        target = (db_type, target_database, table_name)
+        if target in targets:
+            raise ValueError(
+                f"More than one file loads {db_type} table {target_database}.{table_name}"
+            )
+        targets.add(target)
+        jobs.append(BatchUploadJob(name, files[name], db_type, table_name, target_database))
+    return jobs
+
+
+def parse_manifest(text: str) -> Dict[str, Any]:
+    try:
+        return json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Invalid manifest: {str(e)}")
+
+
+def prepare_jobs(
+    directory: str,
+    uploads: Dict[str, str],
+    manifest_text: Optional[str] = None,
+    database_name: Optional[str] = None,
+    max_archive_bytes: int = 1024**3,
+) -> List[BatchUploadJob]:
+    # Unpacks archives under ``directory`` and plans the loads. The manifest
+    # comes from the request or, failing that, a manifest.json among the files
+    files: Dict[str, str] = {}
+    for index, (name, path) in enumerate(uploads.items()):
+        if not is_archive(name):
+            files[name] = path
+            continue
+        target = os.path.join(directory, f"archive-{index}")
+        for relative in extract_archive(path, target, max_archive_bytes):
+            if relative in files:
+                raise ValueError(f"More than one upload contains {relative}")
+            files[relative] = os.path.join(target, *relative.split("/"))
+
+    manifest = parse_manifest(manifest_text) if manifest_text else None
+    if manifest is None:
+        found = sorted(name for name in files if posixpath.basename(name) == MANIFEST_NAME)
+        if len(found) > 1:
+            raise ValueError(f"More than one {MANIFEST_NAME} in the upload")
+        if found:
+            with open(files.pop(found[0]), encoding="utf-8") as f:
+                manifest = parse_manifest(f.read())
+    return plan_jobs(files, manifest, database_name)
+
+
+_worker_service = None
+
+
+def ingest_in_worker(
+    db_type: str, file_path: str, table_name: str, database_name: str, collect_stats: bool
+):
+    # Module-level entry point for ingest worker processes. Each process
+    # opens its own connections; caches live in the API process, which
+    # finishes the upload with what this returns
+    global _worker_service
+    if _worker_service is None:
+        from app.config import settings
+        from app.database.mongo_manager import MongoManager
+        from app.database.mysql_manager import MySQLManager
+        from app.services.data_upload import DataUploadService
+
+        _worker_service = DataUploadService(
+            MySQLManager(
+                settings.mysql_connection_string,
+                local_infile=settings.mysql_local_infile,
+                pool_size=1,
+                max_overflow=1,
+                pool_recycle=settings.mysql_pool_recycle,
+                pool_pre_ping=settings.mysql_pool_pre_ping,
+                pool_timeout=settings.mysql_pool_timeout,
+                max_engines=settings.mysql_max_engines,
+            ),
+            MongoManager(settings.mongo_connection_string),
+            csv_chunk_rows=settings.csv_chunk_rows,
+            csv_sample_rows=settings.csv_sample_rows,
+            insert_batch_size=settings.insert_batch_size,
+            use_load_data=settings.mysql_local_infile,
+            infer_column_types=settings.csv_infer_column_types,
+            mongo_insert_workers=settings.mongo_insert_workers,
+        )
+    return _worker_service.ingest_file(
+        db_type, file_path, table_name, database_name, collect_stats
+    )
+
+
+class BatchUploadService:
+    """Loads many files at once, at most ``limits[db_type]`` per backend.
+
+    When the executor has an ``ingest`` process pool, parsing and loading
+    run there, past the GIL; otherwise on the backend's thread pool. The
+    caches, column stats and indexes of this process are updated on the
+    backend's thread pool once each file is in.
+    """
+
+    def __init__(self, data_upload_service, executor, limits: Dict[str, int]):
+        self.data_upload_service = data_upload_service
+        self.executor = executor
+        self._slots = {
+            db_type: asyncio.Semaphore(max(1, limit)) for db_type, limit in limits.items()
+        }
+
+    async def run(self, jobs: List[BatchUploadJob]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        files = await asyncio.gather(*(self._run_job(job) for job in jobs))
+        elapsed = time.perf_counter() - started
+        row_count = sum(result.get("row_count") or 0 for result in files)
+        failed = sum(1 for result in files if result["status"] != "ok")
+        return {
+            "message": f"Uploaded {len(files) - failed} of {len(files)} files",
+            "files": files,
+            "failed": failed,
+            "row_count": row_count,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(row_count / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    async def _run_job(self, job: BatchUploadJob) -> Dict[str, Any]:
+        service = self.data_upload_service
+        queued = time.perf_counter()
+        async with self._slots[job.db_type]:
+            started = time.perf_counter()
+            try:
+                result, stats = await self._ingest(job)
+            except Exception as e:
+                logger.error(f"Batch upload of {job.file} failed: {str(e)}")
+                try:
+                    await self.executor.run(
+                        job.db_type,
+                        service.finish_upload,
+                        job.db_type,
+                        job.database_name,
+                        job.table_name,
+                    )
+                except Exception as cleanup_error:
+                    logger.warning(
+                        f"Could not invalidate caches for {job.table_name}: {str(cleanup_error)}"
+                    )
+                return {
+                    **job.as_dict(),
+                    "status": "error",
+                    "error": str(e),
+                    "queued_seconds": round(started - queued, 3),
+                }
+            await self.executor.run(
+                job.db_type,
+                service.finish_upload,
+                job.db_type,
+                job.database_name,
+                job.table_name,
+                result,
+                stats,
+            )
+            elapsed = time.perf_counter() - started
+
+        row_count = result["row_count"]
+        return {
+            **job.as_dict(),
+            "status": "ok",
+            "row_count": row_count,
+            **({"method": result["method"]} if "method" in result else {}),
+            "queued_seconds": round(started - queued, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(row_count / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    async def _ingest(self, job: BatchUploadJob):
+        collect_stats = self.data_upload_service.column_catalog is not None
+        args = (job.db_type, job.path, job.table_name, job.database_name, collect_stats)
+        if self.executor.supports("ingest"):
+            return await self.executor.run("ingest", ingest_in_worker, *args)
+        return await self.executor.run(
+            job.db_type, self.data_upload_service.ingest_file, *args
+        )
@@ -0,0 +1,331 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import random
+from app.database.mongo_schema import CollectionSchema
+from app.database.mysql_catalog import MySQLCatalog
+from app.services.csv_ingest import quote_identifier
+from app.services.data_catalog import TableStats
+
+QUANTILES = (0.25, 0.5, 0.75)
+# Grouping on more distinct values than this produces unreadable samples
+MAX_GROUPS = 50
+INTEGER_DATA_TYPES = {"tinyint", "smallint", "mediumint", "int", "integer", "bigint"}
+# MIN/MAX/COUNT(DISTINCT) are skipped for columns that cannot be compared
+# meaningfully or are expensive to compare
+OPAQUE_DATA_TYPES = {
+    "json",
+    "blob",
+    "tinyblob",
+    "mediumblob",
+    "longblob",
+    "binary",
+    "varbinary",
+    "geometry",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def _round(value: float, integral: bool):
+    return int(round(value)) if integral else round(value, 2)
+
+
+def _quantiles(values: List[float]) -> Tuple[float, ...]:
+    if not values:
+        return ()
+    values = sorted(values)
+    last = len(values) - 1
+    return tuple(values[min(last, int(last * q + 0.5))] for q in QUANTILES)
+
+
+def _identifies_rows(integral: bool, distinct: int, non_null: int, row_count: int) -> bool:
+    # Unique whole numbers on every row are ids, not measures or groups. The
+    # slack covers distinct counts that are sketch estimates.
+    return (
+        integral
+        and row_count > MAX_GROUPS
+        and non_null == row_count
+        and distinct >= non_null * 0.98
+    )
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+@dataclass(frozen=True)
+class ColumnProfile:
+    name: str
+    kind: str  # "numeric", "categorical" or "other"
+    non_null: int
+    distinct: int
+    minimum: Any = None
+    maximum: Any = None
+    mean: Optional[float] = None
+    quantiles: Tuple[float, ...] = ()
+    integral: bool = False
+    key: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        minimum, maximum = self.minimum, self.maximum
+        if isinstance(minimum, (date, datetime)):
+            minimum, maximum = minimum.isoformat(), maximum.isoformat()
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "non_null": self.non_null,
+            "distinct": self.distinct,
+            "min": minimum,
+            "max": maximum,
+            "mean": self.mean,
+            "quantiles": dict(zip((f"p{int(q * 100)}" for q in QUANTILES), self.quantiles)),
+            "key": self.key,
+        }
+
+
+@dataclass(frozen=True)
+class TableProfile:
+    table_name: str
+    row_count: int
+    columns: Dict[str, ColumnProfile]
+
+    def measures(self, columns: Optional[Sequence[str]] = None) -> List[str]:
+        # Numeric columns that vary and do not just identify rows
+        return [
+            profile.name
+            for profile in self._profiles(columns)
+            if profile.kind == "numeric" and profile.distinct > 1 and not profile.key
+        ]
+
+    def groupings(self, columns: Optional[Sequence[str]] = None) -> List[str]:
+        # Columns whose values repeat enough to form a handful of groups;
+        # categorical columns first, low-cardinality numeric codes after
+        candidates = [
+            profile
+            for profile in self._profiles(columns)
+            if profile.kind != "other"
+            and not profile.key
+            and 2 <= profile.distinct <= MAX_GROUPS
+            and profile.distinct < profile.non_null
+        ]
+        candidates.sort(key=lambda profile: profile.kind == "numeric")
+        return [profile.name for profile in candidates]
+
+    def threshold(self, column: str) -> Optional[float]:
+        # A quartile of the column, so the filter keeps a useful share of rows
+        profile = self.columns.get(column)
+        if profile is None or profile.kind != "numeric" or not profile.quantiles:
+            return None
+        return _round(random.choice(profile.quantiles), profile.integral)
+
+    def group_total(self, measure: str, grouping: str) -> Optional[float]:
+        # The typical SUM(measure) of one group, for HAVING thresholds
+        measure_profile = self.columns.get(measure)
+        grouping_profile = self.columns.get(grouping)
+        if (
+            measure_profile is None
+            or grouping_profile is None
+            or measure_profile.mean is None
+            or not grouping_profile.distinct
+        ):
+            return None
+        total = measure_profile.mean * measure_profile.non_null / grouping_profile.distinct
+        return _round(total, measure_profile.integral)
+
+    @classmethod
+    def from_stats(cls, stats: TableStats) -> "TableProfile":
+        columns = {
+            name: ColumnProfile(
+                name=name,
+                kind=column.kind,
+                non_null=column.non_null,
+                distinct=column.distinct,
+                minimum=column.minimum,
+                maximum=column.maximum,
+                mean=column.mean,
+                quantiles=column.quantiles,
+                integral=column.integral,
+                key=_identifies_rows(
+                    column.integral, column.distinct, column.non_null, stats.row_count
+                ),
+            )
+            for name, column in stats.columns.items()
+        }
+        return cls(stats.table_name, stats.row_count, columns)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "table": self.table_name,
+            "row_count": self.row_count,
+            "columns": [profile.as_dict() for profile in self.columns.values()],
+            "measures": self.measures(),
+            "groupings": self.groupings(),
+        }
+
+    def _profiles(self, columns: Optional[Sequence[str]]) -> Iterable[ColumnProfile]:
+        if columns is None:
+            return self.columns.values()
+        return (self.columns[name] for name in columns if name in self.columns)
+
+
+class ColumnProfiler:
+    """Per-table column statistics used to pick sample query columns and values.
+
+    Counts, cardinality, min/max and means come from one aggregate query
+    over the whole table; quartiles come from a uniform random sample of it.
+    """
+
+    def __init__(self, mysql_manager, mongo_manager, sample_rows: int = 10_000):
+        self.mysql_manager = mysql_manager
+        self.mongo_manager = mongo_manager
+        self.sample_rows = sample_rows
+
+    def profile_mysql(
+        self, table_name: str, database_name: str, catalog: MySQLCatalog
+    ) -> TableProfile:
+        table = catalog.get_table(table_name)
+        source = quote_identifier(table_name)
+        expressions = ["COUNT(*) AS row_count"]
+        for i, column in enumerate(table.columns):
+            name = quote_identifier(column.name)
+            expressions.append(f"COUNT({name}) AS c{i}_count")
+            if column.data_type in OPAQUE_DATA_TYPES:
+                continue
+            expressions.append(f"COUNT(DISTINCT {name}) AS c{i}_distinct")
+            expressions.append(f"MIN({name}) AS c{i}_min")
+            expressions.append(f"MAX({name}) AS c{i}_max")
+            if column.is_numeric:
+                expressions.append(f"AVG({name}) AS c{i}_avg")
+        numeric = [column for column in table.columns if column.is_numeric]
+
+        engine = self.mysql_manager.get_engine(database_name)
+        with engine.connect() as conn:
+            summary = dict(
+                conn.exec_driver_sql(f"SELECT {', '.join(expressions)} FROM {source}")
+                .mappings()
+                .one()
+            )
+            sample = []
+            if numeric and summary["row_count"]:
+                names = ", ".join(quote_identifier(column.name) for column in numeric)
+                sample = conn.exec_driver_sql(
+                    f"SELECT {names} FROM {source}{self._sample_clause(summary['row_count'])}"
+                ).all()
+
+        columns = {}
+        for i, column in enumerate(table.columns):
+            kind = "other"
+            if column.data_type not in OPAQUE_DATA_TYPES:
+                kind = "numeric" if column.is_numeric else "categorical"
+            quantiles: Tuple[float, ...] = ()
+            if column.is_numeric:
+                position = numeric.index(column)
+                quantiles = _quantiles(
+                    [float(row[position]) for row in sample if row[position] is not None]
+                )
+            mean = summary.get(f"c{i}_avg")
+            integral = column.data_type in INTEGER_DATA_TYPES
+            non_null = summary[f"c{i}_count"]
+            distinct = summary.get(f"c{i}_distinct") or 0
+            columns[column.name] = ColumnProfile(
+                name=column.name,
+                kind=kind,
+                non_null=non_null,
+                distinct=distinct,
+                minimum=_plain(summary.get(f"c{i}_min")),
+                maximum=_plain(summary.get(f"c{i}_max")),
+                mean=float(mean) if mean is not None else None,
+                quantiles=quantiles,
+                integral=integral,
+                key=column.key in ("PRI", "UNI")
+                or _identifies_rows(integral, distinct, non_null, summary["row_count"]),
+            )
+        return TableProfile(table_name, summary["row_count"], columns)
+
+    def _sample_clause(self, row_count: int) -> str:
+        # A plain LIMIT reads the first rows in storage order, which skews
+        # quantiles on tables loaded in sorted order. Each row is kept with
+        # the same probability instead; the LIMIT only bounds an unlucky draw
+        if row_count <= self.sample_rows:
+            return ""
+        fraction = self.sample_rows / row_count
+        return f" WHERE RAND() < {fraction!r} LIMIT {int(self.sample_rows) * 2}"
+
+    def profile_mongo(
+        self, collection_name: str, database_name: str, schema: CollectionSchema
+    ) -> TableProfile:
+        fields = schema.field_names()
+        numeric = set(schema.numeric_fields())
+        group: Dict[str, Any] = {"_id": None, "row_count": {"$sum": 1}}
+        for i, path in enumerate(fields):
+            group[f"f{i}_min"] = {"$min": f"${path}"}
+            group[f"f{i}_max"] = {"$max": f"${path}"}
+            if path in numeric:
+                group[f"f{i}_avg"] = {"$avg": f"${path}"}
+
+        collection = self.mongo_manager.get_database(database_name)[collection_name]
+        summary = next(iter(collection.aggregate([{"$group": group}])), {"row_count": 0})
+        row_count = summary["row_count"]
+        documents = []
+        if row_count:
+            documents = list(
+                collection.aggregate(
+                    [{"$sample": {"size": self.sample_rows}}, {"$project": {"_id": 0}}]
+                )
+            )
+
+        # Mongo has no cheap exact COUNT(DISTINCT) across every field, so
+        # presence and cardinality are estimated from the sample
+        scale = row_count / len(documents) if documents else 0
+        columns = {}
+        for i, path in enumerate(fields):
+            values = [_get_path(doc, path) for doc in documents]
+            present = [value for value in values if value is not None]
+            kind = "categorical"
+            if path in numeric:
+                kind = "numeric"
+            elif schema.fields[path].dominant_type in ("array", "object"):
+                kind = "other"
+
+            hashable = [value for value in present if not isinstance(value, (dict, list))]
+            distinct = len(set(map(repr, hashable)))
+            if scale > 1 and hashable and distinct == len(hashable):
+                # Every sampled value was unique: assume the field is too
+                distinct = round(len(hashable) * scale)
+
+            numbers = [value for value in present if _is_number(value)]
+            minimum, maximum = summary.get(f"f{i}_min"), summary.get(f"f{i}_max")
+            if kind == "numeric" and not (_is_number(minimum) and _is_number(maximum)):
+                minimum = min(numbers, default=None)
+                maximum = max(numbers, default=None)
+            mean = summary.get(f"f{i}_avg")
+            integral = bool(numbers) and all(isinstance(value, int) for value in numbers)
+            non_null = round(len(present) * scale)
+            columns[path] = ColumnProfile(
+                name=path,
+                kind=kind,
+                non_null=non_null,
+                distinct=distinct,
+                minimum=_plain(minimum),
+                maximum=_plain(maximum),
+                mean=float(mean) if _is_number(mean) else None,
+                quantiles=_quantiles([float(value) for value in numbers]),
+                integral=integral,
+                key=_identifies_rows(integral, distinct, non_null, row_count),
+            )
+        return TableProfile(collection_name, row_count, columns)
@@ -0,0 +1,181 @@
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import Column, MetaData, Table
+from sqlalchemy.engine import Engine
+import pandas as pd
+import time
+from app.services.type_inference import InferredColumn, SchemaInferrer, convert_chunk
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def quote_identifier(name: str) -> str:
+    return "`" + str(name).replace("`", "``") + "`"
+
+
+class CSVIngestPipeline:
+    def __init__(
+        self,
+        mysql_manager,
+        type_resolver: Callable[[Any], Any],
+        chunk_rows: int = 50_000,
+        sample_rows: int = 10_000,
+        insert_batch_size: int = 1_000,
+        use_load_data: bool = True,
+        infer_types: bool = True,
+    ):
+        self.mysql_manager = mysql_manager
+        self.type_resolver = type_resolver
+        self.chunk_rows = chunk_rows
+        self.sample_rows = sample_rows
+        self.insert_batch_size = insert_batch_size
+        self.use_load_data = use_load_data
+        self.infer_types = infer_types
+
+    def ingest(
+        self,
+        file_path: str,
+        table_name: str,
+        database_name: str,
+        stats: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+
+        columns = self._infer_columns(file_path, stats) if self.infer_types else None
+        if columns:
+            # The inference pass already showed every row to the stats
+            stats = None
+        else:
+            sample = pd.read_csv(file_path, nrows=self.sample_rows)
+            columns = [
+                InferredColumn(name, str(dtype), self.type_resolver(dtype))
+                for name, dtype in sample.dtypes.items()
+            ]
+        self.mysql_manager.create_database_if_not_exists(database_name)
+        engine = self.mysql_manager.get_engine(database_name)
+        table = self._create_table(engine, table_name, columns)
+
+        row_count = None
+        method = "batched_insert"
+        if self.use_load_data and self._local_infile_enabled(engine):
+            try:
+                row_count = self._load_data_infile(engine, table, columns, file_path)
+                method = "load_data_infile"
+                if stats is not None:
+                    # The server read the file, so stats need their own pass
+                    for chunk in pd.read_csv(file_path, chunksize=self.chunk_rows):
+                        stats.observe(chunk)
+            except Exception as e:
+                logger.warning(
+                    f"LOAD DATA LOCAL INFILE failed for {table_name}, "
+                    f"falling back to batched inserts: {str(e)}"
+                )
+                with engine.begin() as conn:
+                    conn.execute(table.delete())
+
+        if row_count is None:
+            row_count = self._batched_insert(engine, table, columns, file_path, stats)
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Ingested {row_count} rows into {database_name}.{table_name} "
+            f"via {method} in {elapsed:.2f}s"
+        )
+        return {
+            "row_count": row_count,
+            "columns": [column.name for column in columns],
+            "column_types": {
+                column.name: column.type.compile(dialect=engine.dialect) for column in columns
+            },
+            "method": method,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(row_count / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def _infer_columns(self, file_path: str, stats: Optional[Any]) -> List[InferredColumn]:
+        # A full pass before the table exists, so every row fits the types
+        inferrer = SchemaInferrer()
+        for chunk in pd.read_csv(file_path, chunksize=self.chunk_rows):
+            inferrer.observe(chunk)
+            if stats is not None:
+                stats.observe(chunk)
+        return inferrer.finish()
+
+    def _create_table(
+        self, engine: Engine, table_name: str, columns: List[InferredColumn]
+    ) -> Table:
+        metadata = MetaData()
+        table = Table(
+            table_name, metadata, *(Column(column.name, column.type) for column in columns)
+        )
+        with engine.begin() as conn:
+            table.drop(conn, checkfirst=True)
+            table.create(conn)
+        return table
+
+    def _local_infile_enabled(self, engine: Engine) -> bool:
+        if engine.dialect.name != "mysql":
+            return False
+        try:
+            with engine.connect() as conn:
+                return bool(conn.exec_driver_sql("SELECT @@GLOBAL.local_infile").scalar())
+        except Exception as e:
+            logger.debug(f"Could not read local_infile setting: {str(e)}")
+            return False
+
+    def _load_data_infile(
+        self, engine: Engine, table: Table, columns: List[InferredColumn], file_path: str
+    ) -> int:
+        with open(file_path, "rb") as f:
+            header = f.readline()
+        line_terminator = "\\r\\n" if header.endswith(b"\r\n") else "\\n"
+
+        variables = [f"@c{i}" for i in range(len(table.columns))]
+        assignments = ", ".join(
+            f"{quote_identifier(column.name)} = {self._load_expression(column, var)}"
+            for column, var in zip(columns, variables)
+        )
+        statement = (
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote_identifier(table.name)} "
+            f"CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+            f"LINES TERMINATED BY '{line_terminator}' IGNORE 1 LINES "
+            f"({', '.join(variables)}) SET {assignments}"
+        )
+        with engine.begin() as conn:
+            result = conn.exec_driver_sql(statement, (file_path,))
+            return result.rowcount
+
+    def _load_expression(self, column: InferredColumn, var: str) -> str:
+        if column.kind == "boolean":
+            # pandas reads True/False text as booleans; MySQL wants 1/0
+            return (
+                f"CASE LOWER({var}) WHEN 'true' THEN 1 WHEN 'false' THEN 0 "
+                f"ELSE NULLIF({var}, '') END"
+            )
+        return f"NULLIF({var}, '')"
+
+    def _batched_insert(
+        self,
+        engine: Engine,
+        table: Table,
+        columns: List[InferredColumn],
+        file_path: str,
+        stats: Optional[Any] = None,
+    ) -> int:
+        row_count = 0
+        insert = table.insert()
+        for chunk in pd.read_csv(file_path, chunksize=self.chunk_rows):
+            if stats is not None:
+                stats.observe(chunk)
+            records = self._to_records(convert_chunk(chunk, columns))
+            with engine.begin() as conn:
+                for start in range(0, len(records), self.insert_batch_size):
+                    conn.execute(insert, records[start : start + self.insert_batch_size])
+            row_count += len(records)
+        return row_count
+
+    def _to_records(self, chunk: pd.DataFrame) -> List[Dict[str, Any]]:
+        # object dtype boxes numpy scalars into Python values the driver can bind
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        return chunk.to_dict("records")
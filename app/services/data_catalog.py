@@ -0,0 +1,402 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import numpy as np
+import pandas as pd
+from sqlalchemy import BigInteger, Column, MetaData, String, Table, Text, delete, select
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+# Uploaded tables never start with this prefix; explorer listings hide it
+METADATA_PREFIX = "_chatdb_"
+METADATA_TABLE = f"{METADATA_PREFIX}column_stats"
+
+HLL_PRECISION = 12  # 4096 one-byte registers per column, ~1.6% standard error
+HISTOGRAM_BINS = 10
+TOP_K = 10
+QUANTILES = (0.25, 0.5, 0.75)
+NUMERIC_INFERRED = {"integer", "floating", "mixed-integer-float", "decimal"}
+SCALAR_INFERRED = {"string", "boolean", "date", "datetime", "datetime64", "time"}
+
+
+def is_metadata_name(name: str) -> bool:
+    return name.startswith(METADATA_PREFIX)
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if not len(hashes):
+            return
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.intp)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        # frexp is exact here: the suffix fits in a double's mantissa
+        _, bit_length = np.frexp(suffix.astype(np.float64))
+        rank = (suffix_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is far more accurate for small cardinalities
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class _ColumnAccumulator:
+    def __init__(self, name: str, sample_size: int, top_capacity: int, rng: np.random.Generator):
+        self.name = name
+        self.sample_size = sample_size
+        self.top_capacity = top_capacity
+        self.rng = rng
+        self.count = 0
+        self.nulls = 0
+        self.numeric_count = 0
+        self.other_count = 0
+        self.integral = True
+        self.total = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.text_minimum: Any = None
+        self.text_maximum: Any = None
+        self.sketch = HyperLogLog()
+        self.top: Dict[Any, int] = {}
+        self._sample_keys = np.empty(0)
+        self._sample_values = np.empty(0)
+
+    def observe(self, series: pd.Series):
+        self.count += len(series)
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        if not len(values):
+            return
+        numbers, scalars, strings = self._split(values)
+        if len(numbers):
+            self._observe_numbers(numbers)
+        if len(scalars):
+            self.sketch.add_hashes(pd.util.hash_pandas_object(scalars, index=False).to_numpy())
+            self._observe_top(scalars)
+        if strings:
+            low, high = scalars.min(), scalars.max()
+            self.text_minimum = low if self.text_minimum is None else min(self.text_minimum, low)
+            self.text_maximum = high if self.text_maximum is None else max(self.text_maximum, high)
+
+    def finish(self) -> "ColumnStats":
+        non_null = self.count - self.nulls
+        kind = "categorical"
+        if non_null and self.numeric_count * 2 > non_null:
+            kind = "numeric"
+        elif non_null and self.other_count * 2 > non_null:
+            kind = "other"
+
+        histogram: List[Dict[str, Any]] = []
+        quantiles: Tuple[float, ...] = ()
+        minimum, maximum = self.text_minimum, self.text_maximum
+        mean = None
+        if kind == "numeric":
+            minimum, maximum = self.minimum, self.maximum
+            if self.integral:
+                minimum, maximum = int(minimum), int(maximum)
+            mean = self.total / self.numeric_count
+            sample = np.sort(self._sample_values)
+            quantiles = tuple(float(q) for q in np.quantile(sample, QUANTILES, method="nearest"))
+            histogram = self._histogram(sample)
+
+        top = sorted(self.top.items(), key=lambda item: item[1], reverse=True)[:TOP_K]
+        integral = kind == "numeric" and self.integral
+        if integral:
+            top = [(int(v) if isinstance(v, float) else v, count) for v, count in top]
+        return ColumnStats(
+            name=self.name,
+            kind=kind,
+            count=self.count,
+            nulls=self.nulls,
+            distinct=min(self.sketch.estimate(), non_null),
+            minimum=_plain(minimum),
+            maximum=_plain(maximum),
+            mean=mean,
+            quantiles=quantiles,
+            histogram=histogram,
+            top_values=[{"value": _plain(value), "count": count} for value, count in top],
+            integral=integral,
+        )
+
+    def _split(self, values: pd.Series) -> Tuple[pd.Series, pd.Series, bool]:
+        # Returns (numbers, other scalars, whether the scalars are all strings)
+        if pd.api.types.is_bool_dtype(values):
+            return values.iloc[:0], values, False
+        if pd.api.types.is_numeric_dtype(values):
+            return values.astype("float64"), values.iloc[:0], False
+        inferred = pd.api.types.infer_dtype(values, skipna=False)
+        if inferred in NUMERIC_INFERRED:
+            return values.astype("float64"), values.iloc[:0], False
+        if inferred in SCALAR_INFERRED:
+            return values.iloc[:0], values, inferred == "string"
+        # Mixed JSON values: numbers count towards the numeric stats and
+        # everything else (strings, arrays, objects) is compared as text
+        is_number = values.map(
+            lambda value: isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+        ).astype(bool)
+        others = values[~is_number]
+        self.other_count += int(
+            others.map(lambda value: isinstance(value, (list, dict))).astype(bool).sum()
+        )
+        return values[is_number].astype("float64"), others.astype(str), False
+
+    def _observe_numbers(self, numbers: pd.Series):
+        array = numbers.to_numpy(dtype=np.float64)
+        self.numeric_count += len(array)
+        self.total += float(array.sum())
+        low, high = float(array.min()), float(array.max())
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+        self.integral = self.integral and bool(np.all(np.mod(array, 1) == 0))
+        # Hash the float64 view so 5 and 5.0 from different chunks agree
+        self.sketch.add_hashes(pd.util.hash_array(array))
+        self._observe_top(numbers)
+
+        # Priority sampling: keep the values with the smallest random keys,
+        # which stays a uniform sample as chunks are merged
+        keys = np.concatenate([self._sample_keys, self.rng.random(len(array))])
+        values = np.concatenate([self._sample_values, array])
+        if len(keys) > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[: self.sample_size]
+            keys, values = keys[keep], values[keep]
+        self._sample_keys, self._sample_values = keys, values
+
+    def _observe_top(self, values: pd.Series):
+        # Per-chunk counts truncated to a bounded candidate set: exact for
+        # low-cardinality columns, approximate for long tails
+        for value, count in values.value_counts().head(self.top_capacity).items():
+            self.top[value] = self.top.get(value, 0) + int(count)
+        if len(self.top) > 2 * self.top_capacity:
+            kept = sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+            self.top = dict(kept[: self.top_capacity])
+
+    def _histogram(self, sample: np.ndarray) -> List[Dict[str, Any]]:
+        if not len(sample):
+            return []
+        counts, edges = np.histogram(
+            sample, bins=HISTOGRAM_BINS, range=(self.minimum, self.maximum)
+        )
+        # Scale sample counts up to the column when the sample is partial
+        scale = self.numeric_count / len(sample)
+        return [
+            {"lower": float(lower), "upper": float(upper), "count": int(round(count * scale))}
+            for lower, upper, count in zip(edges[:-1], edges[1:], counts)
+        ]
+
+
+@dataclass
+class ColumnStats:
+    name: str
+    kind: str  # "numeric", "categorical" or "other"
+    count: int
+    nulls: int
+    distinct: int
+    minimum: Any = None
+    maximum: Any = None
+    mean: Optional[float] = None
+    quantiles: Tuple[float, ...] = ()
+    histogram: List[Dict[str, Any]] = field(default_factory=list)
+    top_values: List[Dict[str, Any]] = field(default_factory=list)
+    integral: bool = False
+
+    @property
+    def non_null(self) -> int:
+        return self.count - self.nulls
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "count": self.count,
+            "nulls": self.nulls,
+            "distinct": self.distinct,
+            "min": self.minimum,
+            "max": self.maximum,
+            "mean": self.mean,
+            "quantiles": list(self.quantiles),
+            "histogram": self.histogram,
+            "top_values": self.top_values,
+            "integral": self.integral,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ColumnStats":
+        return cls(
+            name=data["name"],
+            kind=data["kind"],
+            count=data["count"],
+            nulls=data["nulls"],
+            distinct=data["distinct"],
+            minimum=data.get("min"),
+            maximum=data.get("max"),
+            mean=data.get("mean"),
+            quantiles=tuple(data.get("quantiles") or ()),
+            histogram=data.get("histogram") or [],
+            top_values=data.get("top_values") or [],
+            integral=data.get("integral", False),
+        )
+
+
+@dataclass
+class TableStats:
+    table_name: str
+    row_count: int
+    columns: Dict[str, ColumnStats]
+    updated_at: str = ""
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "table": self.table_name,
+            "row_count": self.row_count,
+            "updated_at": self.updated_at,
+            "columns": [stats.as_dict() for stats in self.columns.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TableStats":
+        columns = [ColumnStats.from_dict(column) for column in data["columns"]]
+        return cls(
+            table_name=data["table"],
+            row_count=data["row_count"],
+            columns={stats.name: stats for stats in columns},
+            updated_at=data.get("updated_at", ""),
+        )
+
+
+class TableStatsCollector:
+    """Accumulates column statistics from the chunks an upload streams through."""
+
+    def __init__(self, sample_size: int = 2048, top_capacity: int = 100, seed: int = 0):
+        self.sample_size = sample_size
+        self.top_capacity = top_capacity
+        self.row_count = 0
+        self._rng = np.random.default_rng(seed)
+        self._columns: Dict[str, _ColumnAccumulator] = {}
+
+    def observe(self, frame: pd.DataFrame):
+        for name in frame.columns:
+            accumulator = self._columns.get(name)
+            if accumulator is None:
+                accumulator = self._columns[name] = _ColumnAccumulator(
+                    name, self.sample_size, self.top_capacity, self._rng
+                )
+                # Columns first seen in a later chunk were missing before it
+                accumulator.count = accumulator.nulls = self.row_count
+            accumulator.observe(frame[name])
+        for name, accumulator in self._columns.items():
+            if name not in frame.columns:
+                accumulator.count += len(frame)
+                accumulator.nulls += len(frame)
+        self.row_count += len(frame)
+
+    def observe_records(self, records: List[Dict[str, Any]]):
+        # Nested documents flatten to dotted paths, matching the Mongo schema;
+        # json_normalize is several times slower, so only nested batches use it
+        nested = any(isinstance(value, dict) for record in records for value in record.values())
+        self.observe(pd.json_normalize(records) if nested else pd.DataFrame(records))
+
+    def finish(self, table_name: str) -> TableStats:
+        return TableStats(
+            table_name=table_name,
+            row_count=self.row_count,
+            columns={name: acc.finish() for name, acc in self._columns.items()},
+            updated_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+
+class ColumnCatalog:
+    """Upload-time column statistics, stored next to the data they describe.
+
+    MySQL databases keep them in a ``_chatdb_column_stats`` table and Mongo
+    databases in a collection of the same name.
+    """
+
+    def __init__(self, mysql_manager, mongo_manager):
+        self.mysql_manager = mysql_manager
+        self.mongo_manager = mongo_manager
+        self._table = Table(
+            METADATA_TABLE,
+            MetaData(),
+            Column("table_name", String(255), primary_key=True),
+            Column("row_count", BigInteger, nullable=False),
+            Column("stats", Text().with_variant(LONGTEXT(), "mysql"), nullable=False),
+            Column("updated_at", String(64), nullable=False),
+        )
+
+    def save(self, db_type: str, database_name: str, stats: TableStats):
+        document = stats.as_dict()
+        if db_type == "mysql":
+            with self.mysql_manager.get_engine(database_name).begin() as conn:
+                self._table.create(conn, checkfirst=True)
+                conn.execute(delete(self._table).where(self._table.c.table_name == stats.table_name))
+                conn.execute(
+                    self._table.insert(),
+                    {
+                        "table_name": stats.table_name,
+                        "row_count": stats.row_count,
+                        "stats": json.dumps(document, default=str),
+                        "updated_at": stats.updated_at,
+                    },
+                )
+        elif db_type == "mongodb":
+            collection = self._collection(database_name)
+            collection.replace_one({"_id": stats.table_name}, document, upsert=True)
+        else:
+            raise ValueError(f"Unsupported database type: {db_type}")
+
+    def get(self, db_type: str, database_name: str, table_name: str) -> Optional[TableStats]:
+        if db_type == "mysql":
+            query = select(self._table.c.stats).where(self._table.c.table_name == table_name)
+            try:
+                with self.mysql_manager.get_engine(database_name).connect() as conn:
+                    raw = conn.execute(query).scalar()
+            except SQLAlchemyError:
+                # No upload has created the metadata table yet
+                return None
+            return TableStats.from_dict(json.loads(raw)) if raw else None
+        if db_type == "mongodb":
+            document = self._collection(database_name).find_one({"_id": table_name})
+            return TableStats.from_dict(document) if document else None
+        raise ValueError(f"Unsupported database type: {db_type}")
+
+    def delete(self, db_type: str, database_name: str, table_name: Optional[str] = None):
+        if db_type == "mysql":
+            statement = delete(self._table)
+            if table_name is not None:
+                statement = statement.where(self._table.c.table_name == table_name)
+            try:
+                with self.mysql_manager.get_engine(database_name).begin() as conn:
+                    conn.execute(statement)
+            except SQLAlchemyError:
+                return
+        elif db_type == "mongodb":
+            query = {} if table_name is None else {"_id": table_name}
+            self._collection(database_name).delete_many(query)
+
+    def _collection(self, database_name: str):
+        return self.mongo_manager.get_database(database_name)[METADATA_TABLE]
@@ -1,8 +1,11 @@
 import pandas as pd
 import json
-from sqlalchemy import Table, Column, Integer, String, Float, MetaData
-from typing import Dict, Any, List, Type
+from sqlalchemy import Integer, String, Float
+from typing import Dict, Any, List, Optional, Tuple, Type
 from sqlalchemy.types import TypeEngine
+from app.services.csv_ingest import CSVIngestPipeline
+from app.services.data_catalog import TableStats, TableStatsCollector
+from app.services.json_ingest import JSONIngestPipeline
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,35 +16,48 @@ class DataUploadService:
         'float64': Float,
         'object': String(255)
     }
-
-    def __init__(self, mysql_manager, mongo_manager):
+    JSON_EXTENSIONS = ('.json', '.ndjson', '.jsonl')
+
+    def __init__(
+        self,
+        mysql_manager,
+        mongo_manager,
+        schema_cache=None,
+        result_cache=None,
+        memory_engine=None,
+        column_catalog=None,
+        index_advisor=None,
+        csv_chunk_rows: int = 50_000,
+        csv_sample_rows: int = 10_000,
+        insert_batch_size: int = 1_000,
+        use_load_data: bool = True,
+        infer_column_types: bool = True,
+        mongo_insert_workers: int = 1,
+    ):
         self.mysql_manager = mysql_manager
         self.mongo_manager = mongo_manager
+        self.schema_cache = schema_cache
+        self.result_cache = result_cache
+        self.memory_engine = memory_engine
+        self.column_catalog = column_catalog
+        self.index_advisor = index_advisor
+        self.csv_pipeline = CSVIngestPipeline(
+            mysql_manager,
+            self._get_sqlalchemy_type,
+            chunk_rows=csv_chunk_rows,
+            sample_rows=csv_sample_rows,
+            insert_batch_size=insert_batch_size,
+            use_load_data=use_load_data,
+            infer_types=infer_column_types,
+        )
+        self.json_pipeline = JSONIngestPipeline(
+            mongo_manager, batch_size=insert_batch_size, workers=mongo_insert_workers
+        )
 
     def upload_to_mysql(self, file_path: str, table_name: str, database_name: str) -> Dict[str, Any]:
         try:
-            if not file_path.lower().endswith('.csv'):
-                raise ValueError("MySQL upload only supports CSV files")
-
-            df = pd.read_csv(file_path)
-            self.mysql_manager.create_database_if_not_exists(database_name)
-            engine = self.mysql_manager.get_engine(database_name)
-
-            metadata = MetaData()
-            columns = [Column(name, self._get_sqlalchemy_type(dtype)) 
-                      for name, dtype in df.dtypes.items()]
-            
-            table = Table(table_name, metadata, *columns)
-            metadata.create_all(engine)
-
-            with engine.connect() as conn:
-                df.to_sql(table_name, conn, if_exists="replace", index=False)
-
-            return {
-                "message": f"Successfully uploaded data to {table_name} in database '{database_name}'",
-                "row_count": df.shape[0],
-                "columns": df.columns.tolist()
-            }
+            result, stats = self._ingest_and_invalidate("mysql", file_path, table_name, database_name)
+            return self.finish_upload("mysql", database_name, table_name, result, stats)
 
         except pd.errors.ParserError as e:
             logger.error(f"Error parsing CSV file: {str(e)}")
@@ -51,31 +67,11 @@ class DataUploadService:
             raise
 
     def upload_to_mongo(self, file_path: str, collection_name: str, database_name: str) -> Dict[str, Any]:
-        if not file_path.lower().endswith('.json'):
-            raise ValueError("MongoDB upload only supports JSON files")
-
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
-                records = data if isinstance(data, list) else [data]
-
-            if not records:
-                return {
-                    "message": f"No data to upload to {collection_name}",
-                    "row_count": 0,
-                    "columns": []
-                }
-
-            db = self.mongo_manager.get_database(database_name)
-            collection = db[collection_name]
-            collection.drop()
-            collection.insert_many(records)
-
-            return {
-                "message": f"Successfully uploaded data to {collection_name} in database '{database_name}'",
-                "row_count": len(records),
-                "columns": list(records[0].keys())
-            }
+            result, stats = self._ingest_and_invalidate(
+                "mongodb", file_path, collection_name, database_name
+            )
+            return self.finish_upload("mongodb", database_name, collection_name, result, stats)
 
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON file: {str(e)}")
@@ -84,6 +80,130 @@ class DataUploadService:
             logger.error(f"Error uploading to MongoDB: {str(e)}")
             raise
 
+    def ingest_file(
+        self,
+        db_type: str,
+        file_path: str,
+        table_name: str,
+        database_name: str,
+        collect_stats: bool = False,
+    ) -> Tuple[Dict[str, Any], Optional[TableStats]]:
+        # Only loads the data: caches, stats and indexes of this process are
+        # left to finish_upload, so this half can run in a worker process
+        self.check_file_type(db_type, file_path)
+        stats = TableStatsCollector() if collect_stats else None
+        if db_type == "mysql":
+            result = self.csv_pipeline.ingest(file_path, table_name, database_name, stats)
+        else:
+            result = self.json_pipeline.ingest(file_path, table_name, database_name, stats)
+        if stats is not None and result["row_count"]:
+            return result, stats.finish(table_name)
+        return result, None
+
+    def finish_upload(
+        self,
+        db_type: str,
+        database_name: str,
+        table_name: str,
+        result: Optional[Dict[str, Any]] = None,
+        stats: Optional[TableStats] = None,
+    ) -> Optional[Dict[str, Any]]:
+        # The table is dropped before loading, so even a failed load
+        # (no result) leaves cached results stale
+        self._invalidate_results(db_type, database_name, table_name)
+        if result is None:
+            return None
+        if db_type == "mongodb" and not result["row_count"]:
+            return {
+                "message": f"No data to upload to {table_name}",
+                "row_count": 0,
+                "columns": []
+            }
+
+        self._save_stats(db_type, database_name, table_name, stats)
+        self._invalidate_schema(db_type, database_name)
+        self._load_in_memory(db_type, database_name, table_name)
+        self._restore_indexes(db_type, database_name, table_name)
+
+        return {
+            "message": f"Successfully uploaded data to {table_name} in database '{database_name}'",
+            **result,
+        }
+
+    def check_file_type(self, db_type: str, file_path: str):
+        if db_type == "mysql":
+            if not file_path.lower().endswith('.csv'):
+                raise ValueError("MySQL upload only supports CSV files")
+        elif db_type == "mongodb":
+            if not file_path.lower().endswith(self.JSON_EXTENSIONS):
+                raise ValueError("MongoDB upload only supports JSON or NDJSON files")
+        else:
+            raise ValueError(f"Unsupported database type: {db_type}")
+
+    def _ingest_and_invalidate(
+        self, db_type: str, file_path: str, table_name: str, database_name: str
+    ) -> Tuple[Dict[str, Any], Optional[TableStats]]:
+        # A rejected file never touched the table
+        self.check_file_type(db_type, file_path)
+        try:
+            return self.ingest_file(
+                db_type, file_path, table_name, database_name, self.column_catalog is not None
+            )
+        except Exception:
+            self.finish_upload(db_type, database_name, table_name)
+            raise
+
+    def _invalidate_schema(self, db_type: str, database_name: str):
+        if self.schema_cache is not None:
+            self.schema_cache.invalidate(db_type, database_name)
+
+    def _invalidate_results(self, db_type: str, database_name: str, table_name: str):
+        if self.result_cache is not None:
+            self.result_cache.invalidate(db_type, database_name, table_name)
+        if self.memory_engine is not None:
+            self.memory_engine.drop(db_type, database_name, table_name)
+        if self.column_catalog is not None:
+            try:
+                self.column_catalog.delete(db_type, database_name, table_name)
+            except Exception as e:
+                logger.warning(
+                    f"Could not clear column stats for {database_name}.{table_name}: {str(e)}"
+                )
+
+    def _save_stats(
+        self, db_type: str, database_name: str, table_name: str, stats: Optional[TableStats]
+    ):
+        if stats is None or self.column_catalog is None:
+            return
+        try:
+            self.column_catalog.save(db_type, database_name, stats)
+        except Exception as e:
+            # Profiles fall back to scanning the table without stored stats
+            logger.warning(
+                f"Could not save column stats for {database_name}.{table_name}: {str(e)}"
+            )
+
+    def _load_in_memory(self, db_type: str, database_name: str, table_name: str):
+        if self.memory_engine is None:
+            return
+        try:
+            self.memory_engine.load(db_type, database_name, table_name)
+        except Exception as e:
+            # Queries still run against the database; the upload itself succeeded
+            logger.warning(
+                f"Could not load {database_name}.{table_name} into memory: {str(e)}"
+            )
+
+    def _restore_indexes(self, db_type: str, database_name: str, table_name: str):
+        if self.index_advisor is None:
+            return
+        try:
+            self.index_advisor.after_upload(db_type, database_name, table_name)
+        except Exception as e:
+            logger.warning(
+                f"Could not apply recommended indexes to {database_name}.{table_name}: {str(e)}"
+            )
+
     def _get_sqlalchemy_type(self, pandas_dtype) -> Type[TypeEngine]:
         return self.TYPE_MAPPING.get(str(pandas_dtype), String(255))
 
@@ -1,19 +1,137 @@
-from typing import Dict, List, Any
+from collections import OrderedDict
+from typing import Dict, List, Any, Callable, Hashable, Optional, Tuple
+import threading
+import time
+import logging
+from app.metrics import stage
+from app.services.column_profiler import ColumnProfiler, TableProfile
+from app.services.data_catalog import TableStats, is_metadata_name
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaCache:
+    def __init__(self, ttl_seconds: float = 300, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_version(self, db_type: str, database_name: str) -> int:
+        with self._lock:
+            return self._versions.get((db_type, database_name), 0)
+
+    def get_or_load(
+        self,
+        db_type: str,
+        database_name: str,
+        key: Hashable,
+        loader: Callable[[], Any],
+    ) -> Any:
+        with self._lock:
+            version = self._versions.get((db_type, database_name), 0)
+            cache_key = (db_type, database_name, version, key)
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[cache_key]
+            self.misses += 1
+
+        # Load outside the lock so a slow database does not block other lookups
+        value = loader()
+
+        with self._lock:
+            # Drop the result if the schema was invalidated while loading
+            if self._versions.get((db_type, database_name), 0) == version:
+                self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, value)
+                self._entries.move_to_end(cache_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def peek(self, db_type: str, database_name: str, key: Hashable) -> Optional[Any]:
+        # The cached value if there is a live one; never loads
+        with self._lock:
+            version = self._versions.get((db_type, database_name), 0)
+            entry = self._entries.get((db_type, database_name, version, key))
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def invalidate(self, db_type: str, database_name: str) -> int:
+        with self._lock:
+            version = self._versions.get((db_type, database_name), 0) + 1
+            self._versions[(db_type, database_name)] = version
+            stale = [
+                k for k in self._entries if k[0] == db_type and k[1] == database_name
+            ]
+            for k in stale:
+                del self._entries[k]
+        logger.info(
+            f"Invalidated schema cache for {db_type}/{database_name} (version {version})"
+        )
+        return version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
 
 
 class DBExplorerService:
-    def __init__(self, mysql_manager, mongo_manager):
+    def __init__(
+        self,
+        mysql_manager,
+        mongo_manager,
+        schema_cache: Optional[SchemaCache] = None,
+        profiler: Optional[ColumnProfiler] = None,
+        column_catalog=None,
+    ):
         self.mysql_manager = mysql_manager
         self.mongo_manager = mongo_manager
+        self.schema_cache = schema_cache or SchemaCache()
+        self.profiler = profiler or ColumnProfiler(mysql_manager, mongo_manager)
+        self.column_catalog = column_catalog
+
+    def get_mysql_catalog(self, database_name: str):
+        return self.schema_cache.get_or_load(
+            "mysql",
+            database_name,
+            ("catalog",),
+            lambda: self._load_mysql_catalog(database_name),
+        )
+
+    def _load_mysql_catalog(self, database_name: str):
+        catalog = self.mysql_manager.get_catalog(database_name)
+        for table_name in [name for name in catalog.tables if is_metadata_name(name)]:
+            del catalog.tables[table_name]
+        return catalog
 
     def get_mysql_tables(self, database_name: str):
-        return self.mysql_manager.get_tables(database_name)
+        return self.get_mysql_catalog(database_name).table_names()
 
     def get_mysql_columns(self, table_name: str, database_name: str):
-        return [
-            col["name"]
-            for col in self.mysql_manager.get_columns(table_name, database_name)
-        ]
+        return self.get_mysql_catalog(database_name).get_column_names(table_name)
 
     def get_mysql_sample_data(
         self, table_name: str, database_name: str, limit: int = 10
@@ -22,29 +140,112 @@ class DBExplorerService:
         return self.mysql_manager.execute_query(query, database_name)
 
     def get_mongo_collections(self, database_name: str):
-        return self.mongo_manager.get_collections(database_name)
+        return self.schema_cache.get_or_load(
+            "mongodb",
+            database_name,
+            ("collections",),
+            lambda: [
+                name
+                for name in self.mongo_manager.get_collections(database_name)
+                if not is_metadata_name(name)
+            ],
+        )
+
+    def get_mongo_schema(self, collection_name: str, database_name: str):
+        # Only samples this collection, unless every schema is cached already
+        schemas = self.schema_cache.peek("mongodb", database_name, ("schemas",))
+        if schemas is not None and collection_name in schemas:
+            return schemas[collection_name]
+        return self.schema_cache.get_or_load(
+            "mongodb",
+            database_name,
+            ("schema", collection_name),
+            lambda: self.mongo_manager.get_schema(collection_name, database_name),
+        )
+
+    def get_mongo_schemas(self, database_name: str):
+        return self.schema_cache.get_or_load(
+            "mongodb",
+            database_name,
+            ("schemas",),
+            lambda: {
+                name: schema
+                for name, schema in self.mongo_manager.get_schemas(database_name).items()
+                if not is_metadata_name(name)
+            },
+        )
 
     def get_mongo_fields(self, collection_name: str, database_name: str):
-        return self.mongo_manager.get_fields(collection_name, database_name)
+        return self.get_mongo_schema(collection_name, database_name).field_names()
 
     def get_mongo_sample_data(
-        self, database_name: str, collection_name: str, limit: int = 10
+        self, database_name: str, collection_name: str, limit: int = 10, clean: bool = True
     ):
-        data = self.mongo_manager.execute_query(collection_name, {}, database_name)
+        data = self.mongo_manager.execute_query(
+            collection_name, {}, database_name, clean=clean
+        )
         return data[:limit]
 
+    def get_columns(self, db_type: str, table_name: str, database_name: str) -> List[str]:
+        with stage("schema_lookup", db_type):
+            if db_type == "mysql":
+                return self.get_mysql_columns(table_name, database_name)
+            if db_type == "mongodb":
+                return self.get_mongo_fields(table_name, database_name)
+        raise ValueError(f"Unsupported database type: {db_type}")
+
     def get_all_tables_and_columns(self, db_type: str, database_name: str):
-        if db_type == "mysql":
-            tables = self.get_mysql_tables(database_name)
-            return {
-                table: self.get_mysql_columns(table, database_name) for table in tables
-            }
+        with stage("schema_lookup", db_type):
+            if db_type == "mysql":
+                return self.get_mysql_catalog(database_name).as_columns_map()
 
-        if db_type == "mongodb":
-            collections = self.get_mongo_collections(database_name)
-            return {
-                collection: self.get_mongo_fields(collection, database_name)
-                for collection in collections
-            }
+            if db_type == "mongodb":
+                return {
+                    name: schema.field_names()
+                    for name, schema in self.get_mongo_schemas(database_name).items()
+                }
 
         raise ValueError(f"Unsupported database type: {db_type}")
+
+    def get_table_profile(
+        self, db_type: str, table_name: str, database_name: str
+    ) -> TableProfile:
+        # Cached with the schema, so an upload to the database re-profiles it.
+        # Stats recorded at upload time are used instead of scanning the table.
+        with stage("profile", db_type):
+            stats = self.get_column_stats(db_type, table_name, database_name)
+            if stats is not None:
+                load = lambda: TableProfile.from_stats(stats)
+            elif db_type == "mysql":
+                load = lambda: self.profiler.profile_mysql(
+                    table_name, database_name, self.get_mysql_catalog(database_name)
+                )
+            elif db_type == "mongodb":
+                load = lambda: self.profiler.profile_mongo(
+                    table_name,
+                    database_name,
+                    self.get_mongo_schema(table_name, database_name),
+                )
+            else:
+                raise ValueError(f"Unsupported database type: {db_type}")
+            return self.schema_cache.get_or_load(
+                db_type, database_name, ("profile", table_name), load
+            )
+
+    def get_column_stats(
+        self, db_type: str, table_name: str, database_name: str
+    ) -> Optional[TableStats]:
+        if self.column_catalog is None:
+            return None
+        return self.schema_cache.get_or_load(
+            db_type,
+            database_name,
+            ("column_stats", table_name),
+            lambda: self.column_catalog.get(db_type, database_name, table_name),
+        )
+
+    def get_schema_version(self, db_type: str, database_name: str) -> int:
+        return self.schema_cache.get_version(db_type, database_name)
+
+    def invalidate_schema(self, db_type: str, database_name: str) -> int:
+        return self.schema_cache.invalidate(db_type, database_name)
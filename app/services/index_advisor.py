@@ -0,0 +1,383 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+import hashlib
+import logging
+import re
+import statistics
+import threading
+import time
+from app.services.csv_ingest import quote_identifier
+
+logger = logging.getLogger(__name__)
+
+MAX_INDEX_NAME = 64
+# Columns MySQL cannot index without a prefix length
+UNINDEXABLE_DATA_TYPES = {
+    "tinytext",
+    "text",
+    "mediumtext",
+    "longtext",
+    "tinyblob",
+    "blob",
+    "mediumblob",
+    "longblob",
+    "json",
+    "geometry",
+}
+MONGO_RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+MONGO_EQUALITY_OPERATORS = {"$eq", "$in"}
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    db_type: str
+    database_name: str
+    table_name: str
+    keys: Tuple[Tuple[str, int], ...]  # (column, 1 ascending / -1 descending)
+
+    @property
+    def columns(self) -> List[str]:
+        return [column for column, _ in self.keys]
+
+    @property
+    def name(self) -> str:
+        name = "ix_chatdb_" + re.sub(r"\W", "_", "_".join(self.columns))
+        if len(name) > MAX_INDEX_NAME:
+            digest = hashlib.sha1(name.encode("utf-8")).hexdigest()[:8]
+            name = f"{name[: MAX_INDEX_NAME - 9]}_{digest}"
+        return name
+
+    @property
+    def statement(self) -> str:
+        if self.db_type == "mysql":
+            columns = ", ".join(quote_identifier(column) for column in self.columns)
+            return (
+                f"CREATE INDEX {quote_identifier(self.name)} "
+                f"ON {quote_identifier(self.table_name)} ({columns})"
+            )
+        keys = ", ".join(f'"{column}": {direction}' for column, direction in self.keys)
+        return f'db.{self.table_name}.createIndex({{{keys}}}, {{"name": "{self.name}"}})'
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "db_type": self.db_type,
+            "database_name": self.database_name,
+            "table_name": self.table_name,
+            "keys": [list(key) for key in self.keys],
+            "name": self.name,
+            "statement": self.statement,
+        }
+
+
+@dataclass
+class _Usage:
+    uses: int = 0
+    intents: Set[str] = field(default_factory=set)
+    exemplar: Any = None
+    last_used: float = 0.0
+
+
+@dataclass
+class IndexResult:
+    spec: IndexSpec
+    created: bool
+    before_ms: Optional[float] = None
+    after_ms: Optional[float] = None
+    error: Optional[str] = None
+    applied_at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> Dict[str, Any]:
+        speedup = None
+        if self.before_ms and self.after_ms:
+            speedup = round(self.before_ms / self.after_ms, 2)
+        return {
+            **self.spec.as_dict(),
+            "created": self.created,
+            "before_ms": self.before_ms,
+            "after_ms": self.after_ms,
+            "speedup": speedup,
+            "error": self.error,
+            "applied_at": self.applied_at,
+        }
+
+
+def mysql_index_keys(intent: str, components: Dict[str, Any]) -> Tuple[Tuple[str, int], ...]:
+    # The columns an index needs for each generated statement shape
+    if intent == "where clause":
+        if components.get("operator") == "!=":
+            return ()
+        return ((components["column"], 1),)
+    if intent == "order by with limit":
+        return ((components["order_by"], 1),)
+    if intent == "group by with count":
+        return ((components["group_by"], 1),)
+    if intent in ("group by with aggregation", "having clause"):
+        # (group, aggregate) covers the query, so the scan never touches rows
+        keys = [(components["group_by"], 1)]
+        if components.get("aggregate") not in (None, components["group_by"]):
+            keys.append((components["aggregate"], 1))
+        return tuple(keys)
+    return ()
+
+
+def mongo_index_keys(query: Any) -> Tuple[Tuple[str, int], ...]:
+    # Equality, sort, range order over the stages Mongo can answer from an
+    # index: the leading $match/$sort before anything reshapes documents
+    stages = query if isinstance(query, list) else [{"$match": query}]
+    equality: List[str] = []
+    ranges: List[str] = []
+    sort: List[Tuple[str, int]] = []
+    for step in stages:
+        if len(step) != 1:
+            break
+        name, spec = next(iter(step.items()))
+        if name == "$match":
+            for path, condition in spec.items():
+                if path.startswith("$"):
+                    continue
+                operators = set(condition) if isinstance(condition, dict) else set()
+                if not operators or operators <= MONGO_EQUALITY_OPERATORS:
+                    equality.append(path)
+                elif operators & MONGO_RANGE_OPERATORS:
+                    ranges.append(path)
+        elif name == "$sort":
+            sort = [(path, -1 if direction == -1 else 1) for path, direction in spec.items()]
+            break
+        elif name not in ("$limit", "$skip"):
+            break
+
+    keys: List[Tuple[str, int]] = []
+    for path, direction in [(p, 1) for p in equality] + sort + [(p, 1) for p in ranges]:
+        if path not in (column for column, _ in keys):
+            keys.append((path, direction))
+    return tuple(keys)
+
+
+class IndexAdvisor:
+    """Recommends indexes from the columns executed queries filter, group and sort on.
+
+    Usage is recorded per table as query shapes run. Recommendations skip
+    small tables and shapes an existing index already serves. Applying a
+    recommendation times the latest query of that shape before and after
+    creating the index.
+    """
+
+    def __init__(
+        self,
+        mysql_manager,
+        mongo_manager,
+        db_explorer_service,
+        min_uses: int = 3,
+        min_rows: int = 1_000,
+        measure_runs: int = 5,
+        auto_apply: bool = False,
+        max_shapes: int = 4_096,
+    ):
+        self.mysql_manager = mysql_manager
+        self.mongo_manager = mongo_manager
+        self.db_explorer_service = db_explorer_service
+        self.min_uses = min_uses
+        self.min_rows = min_rows
+        self.measure_runs = measure_runs
+        self.auto_apply = auto_apply
+        self.max_shapes = max_shapes
+        self._usage: "OrderedDict[IndexSpec, _Usage]" = OrderedDict()
+        self._results: Deque[IndexResult] = deque(maxlen=256)
+        self._lock = threading.Lock()
+
+    def record_intent(
+        self,
+        database_name: str,
+        table_name: str,
+        intent: str,
+        components: Dict[str, Any],
+        statement: str,
+        parameters: Optional[Dict[str, Any]] = None,
+    ):
+        keys = mysql_index_keys(intent, components)
+        if keys:
+            self._record(
+                IndexSpec("mysql", database_name, table_name, keys),
+                intent,
+                (statement, parameters),
+            )
+
+    def record_pipeline(self, database_name: str, collection_name: str, query: Any):
+        keys = mongo_index_keys(query)
+        if keys:
+            self._record(
+                IndexSpec("mongodb", database_name, collection_name, keys), "pipeline", query
+            )
+
+    def databases(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            return sorted({(spec.db_type, spec.database_name) for spec in self._usage})
+
+    def recommend(
+        self, db_type: str, database_name: str, table_name: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        return [
+            {**spec.as_dict(), "uses": usage.uses, "intents": sorted(usage.intents)}
+            for spec, usage in self._candidates(db_type, database_name, table_name)
+        ]
+
+    def apply(
+        self,
+        db_type: str,
+        database_name: str,
+        table_name: Optional[str] = None,
+        measure: bool = True,
+    ) -> List[IndexResult]:
+        results = []
+        for spec, usage in self._candidates(db_type, database_name, table_name):
+            before = self._measure(spec, usage.exemplar) if measure else None
+            try:
+                self._create(spec)
+            except Exception as e:
+                logger.warning(f"Could not create index {spec.name} on {spec.table_name}: {e}")
+                results.append(IndexResult(spec, False, before, error=str(e)))
+                continue
+            # The cached catalog lists indexes, so the new one has to show up
+            self.db_explorer_service.invalidate_schema(db_type, database_name)
+            after = self._measure(spec, usage.exemplar) if measure else None
+            logger.info(
+                f"Created index {spec.name} on {database_name}.{spec.table_name} "
+                f"({before} ms -> {after} ms)"
+            )
+            results.append(IndexResult(spec, True, before, after))
+
+        with self._lock:
+            self._results.extend(results)
+        return results
+
+    def after_upload(self, db_type: str, database_name: str, table_name: str):
+        # Uploads recreate the table without indexes; put back what the
+        # recorded workload asks for
+        if self.auto_apply:
+            self.apply(db_type, database_name, table_name)
+
+    def history(self, db_type: Optional[str] = None, database_name: Optional[str] = None):
+        with self._lock:
+            results = list(self._results)
+        return [
+            result.as_dict()
+            for result in results
+            if (db_type is None or result.spec.db_type == db_type)
+            and (database_name is None or result.spec.database_name == database_name)
+        ]
+
+    def _record(self, spec: IndexSpec, intent: str, exemplar: Any):
+        with self._lock:
+            usage = self._usage.get(spec)
+            if usage is None:
+                usage = self._usage[spec] = _Usage()
+            self._usage.move_to_end(spec)
+            usage.uses += 1
+            usage.intents.add(intent)
+            usage.exemplar = exemplar
+            usage.last_used = time.time()
+            while len(self._usage) > self.max_shapes:
+                self._usage.popitem(last=False)
+
+    def _candidates(
+        self, db_type: str, database_name: str, table_name: Optional[str]
+    ) -> List[Tuple[IndexSpec, _Usage]]:
+        with self._lock:
+            recorded = [
+                (spec, usage)
+                for spec, usage in self._usage.items()
+                if spec.db_type == db_type
+                and spec.database_name == database_name
+                and (table_name is None or spec.table_name == table_name)
+                and usage.uses >= self.min_uses
+            ]
+        # Widest first: one index serves every shape whose columns are its prefix
+        recorded.sort(key=lambda item: (len(item[0].keys), item[1].uses), reverse=True)
+
+        candidates: List[Tuple[IndexSpec, _Usage]] = []
+        for spec, usage in recorded:
+            if any(
+                spec.table_name == chosen.table_name and _is_prefix(spec.keys, chosen.keys)
+                for chosen, _ in candidates
+            ):
+                continue
+            try:
+                if not self._worth_indexing(spec):
+                    continue
+            except Exception as e:
+                logger.debug(f"Skipping index candidate {spec.name}: {e}")
+                continue
+            candidates.append((spec, usage))
+        candidates.sort(key=lambda item: item[1].uses, reverse=True)
+        return candidates
+
+    def _worth_indexing(self, spec: IndexSpec) -> bool:
+        profile = self.db_explorer_service.get_table_profile(
+            spec.db_type, spec.table_name, spec.database_name
+        )
+        if profile.row_count < self.min_rows:
+            return False
+        if spec.db_type == "mysql":
+            table = self.db_explorer_service.get_mysql_catalog(spec.database_name).get_table(
+                spec.table_name
+            )
+            types = {column.name: column.data_type for column in table.columns}
+            if any(types.get(column, "text") in UNINDEXABLE_DATA_TYPES for column in spec.columns):
+                return False
+            existing = [
+                tuple((column, 1) for column in index.columns)
+                for index in table.indexes.values()
+            ]
+        else:
+            fields = set(
+                self.db_explorer_service.get_mongo_fields(spec.table_name, spec.database_name)
+            )
+            if not set(spec.columns) <= fields:
+                return False
+            collection = self.mongo_manager.get_database(spec.database_name)[spec.table_name]
+            existing = [
+                tuple((path, direction) for path, direction in info["key"])
+                for info in collection.index_information().values()
+            ]
+        return not any(_is_prefix(spec.keys, keys) for keys in existing)
+
+    def _create(self, spec: IndexSpec):
+        if spec.db_type == "mysql":
+            engine = self.mysql_manager.get_engine(spec.database_name)
+            with engine.begin() as conn:
+                conn.exec_driver_sql(spec.statement)
+        else:
+            collection = self.mongo_manager.get_database(spec.database_name)[spec.table_name]
+            collection.create_index(list(spec.keys), name=spec.name)
+
+    def _measure(self, spec: IndexSpec, exemplar: Any) -> Optional[float]:
+        if exemplar is None:
+            return None
+        if spec.db_type == "mysql":
+            statement, parameters = exemplar
+            run = lambda: self.mysql_manager.execute_query(
+                statement, spec.database_name, parameters
+            )
+        else:
+            run = lambda: self.mongo_manager.execute_query(
+                spec.table_name, exemplar, spec.database_name, clean=False
+            )
+        try:
+            run()  # warm caches so both timings see the same buffer pool state
+            timings = []
+            for _ in range(self.measure_runs):
+                started = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - started)
+        except Exception as e:
+            logger.warning(f"Could not time the query for index {spec.name}: {e}")
+            return None
+        return round(statistics.median(timings) * 1000, 3)
+
+
+def _is_prefix(keys: Tuple[Tuple[str, int], ...], index_keys: Tuple[Tuple[str, int], ...]) -> bool:
+    # Single-column indexes serve either sort direction
+    if len(keys) == 1:
+        return bool(index_keys) and index_keys[0][0] == keys[0][0]
+    return index_keys[: len(keys)] == keys
@@ -0,0 +1,176 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Pattern, Tuple
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+OPERATOR_MAP = {
+    ">": ">",
+    "greater than": ">",
+    ">=": ">=",
+    "greater than or equal to": ">=",
+    "<": "<",
+    "less than": "<",
+    "<=": "<=",
+    "less than or equal to": "<=",
+    "=": "=",
+    "equals": "=",
+    "equal to": "=",
+    "is": "=",
+    "!=": "!=",
+    "<>": "!=",
+    "not equal to": "!=",
+    "not equals": "!=",
+}
+
+MONGO_OPERATORS = {
+    ">": "$gt",
+    ">=": "$gte",
+    "<": "$lt",
+    "<=": "$lte",
+    "=": "$eq",
+    "!=": "$ne",
+}
+
+
+
+def _operator_pattern(phrase: str) -> Pattern:
+    if phrase[0].isalpha():
+        # Whole words only, so "this" or "list" do not read as "is"
+        return re.compile(rf"\b{re.escape(phrase)}\b")
+    return re.compile(re.escape(phrase))
+
+
+# Symbols before words, as a question can hold both ("where price is > 5",
+# "list rows where price < 5"), then longest first so ">=" is not read as
+# ">" nor "not equal to" as "equal to"
+_OPERATOR_PATTERNS = [
+    (_operator_pattern(phrase), value)
+    for phrase, value in sorted(
+        OPERATOR_MAP.items(), key=lambda item: (item[0][0].isalpha(), -len(item[0]))
+    )
+]
+
+
+def extract_operator(operator_text: str) -> str:
+    operator_text = operator_text.lower()
+    for pattern, value in _OPERATOR_PATTERNS:
+        if pattern.search(operator_text):
+            return value
+    return "="
+
+
+@dataclass(frozen=True)
+class IntentMatch:
+    intent: str
+    components: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class CompiledIntent:
+    name: str
+    patterns: List[Pattern]
+    # Every group must have at least one keyword present as a substring of the
+    # query for any of the patterns to be able to match
+    keyword_groups: List[Tuple[str, ...]]
+
+    def may_match(self, lowered_query: str) -> bool:
+        return all(
+            any(keyword in lowered_query for keyword in group)
+            for group in self.keyword_groups
+        )
+
+    def search(self, query: str) -> Optional[re.Match]:
+        for pattern in self.patterns:
+            match = pattern.search(query)
+            if match:
+                return match
+        return None
+
+
+class IntentMatcher:
+    def __init__(self, query_patterns: Dict[str, Dict]):
+        self.intents = [
+            CompiledIntent(
+                name=name,
+                patterns=[re.compile(p, re.IGNORECASE) for p in info["patterns"]],
+                keyword_groups=[tuple(group) for group in info.get("keywords", [])],
+            )
+            for name, info in query_patterns.items()
+        ]
+        self._by_name = {intent.name: intent for intent in self.intents}
+
+    def candidates(self, processed_query: str) -> List[CompiledIntent]:
+        lowered = processed_query.lower()
+        return [intent for intent in self.intents if intent.may_match(lowered)]
+
+    def match_intent(self, processed_query: str) -> Optional[str]:
+        for intent in self.candidates(processed_query):
+            if intent.search(processed_query):
+                return intent.name
+        return None
+
+    def match(
+        self, processed_query: str, raw_query: Optional[str] = None
+    ) -> Optional[IntentMatch]:
+        # The intent is detected on the normalized text, but components are
+        # captured from the raw text so column names are not lemmatized
+        raw_query = processed_query if raw_query is None else raw_query
+        for intent in self.candidates(processed_query):
+            if not intent.search(processed_query):
+                continue
+            logger.debug(f"Matched intent: {intent.name}")
+            return IntentMatch(intent.name, self.extract(intent.name, raw_query))
+        return None
+
+    def extract(self, intent_name: str, query: str) -> Dict[str, str]:
+        intent = self._by_name.get(intent_name)
+        if intent is None:
+            logger.error(f"Unknown pattern: {intent_name}")
+            return {}
+
+        match = intent.search(query)
+        if not match:
+            logger.warning(f"No components could be extracted from query: {query}")
+            return {}
+        try:
+            return self._components(intent_name, match, query)
+        except IndexError as e:
+            logger.error(f"Error extracting components: {e}")
+            return {}
+
+    def _components(self, intent_name: str, match: re.Match, query: str) -> Dict[str, str]:
+        if intent_name == "group by with aggregation":
+            agg_func = "sum" if any(w in query.lower() for w in ["sum", "total"]) else "avg"
+            return {
+                "aggregate": match.group(1),
+                "group_by": match.group(2),
+                "agg_func": agg_func,
+            }
+        if intent_name == "group by with count":
+            return {"aggregate": match.group(1), "group_by": match.group(2)}
+        if intent_name == "order by with limit":
+            # "top 5 by price" captures the limit first, "sort by price limit 5" last
+            limit, order_by = match.group(1), match.group(2)
+            if not limit.isdigit():
+                limit, order_by = order_by, limit
+            return {"limit": limit, "order_by": order_by}
+        if intent_name == "where clause":
+            return {
+                "column": match.group(1),
+                "operator": extract_operator(query),
+                "value": match.group(2),
+            }
+        if intent_name == "having clause":
+            return {
+                "group_by": match.group(1),
+                "aggregate": match.group(2),
+                "operator": extract_operator(query),
+                "value": match.group(3),
+            }
+        if intent_name == "select columns":
+            columns = match.group(1).replace(" ", "").split(",")
+            return {"columns": ", ".join(columns)}
+        return {}
+
@@ -0,0 +1,154 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+import itertools
+import json
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = " \t\n\r"
+# MongoDB's document size limit; a value still undecodable after buffering
+# this much text is malformed, not just split across reads
+MAX_VALUE_CHARS = 16 * 1024 * 1024
+
+
+def iter_json_records(
+    file_path: str, read_size: int = 64 * 1024, max_value_chars: int = MAX_VALUE_CHARS
+) -> Iterator[Any]:
+    # Yields the elements of a top-level JSON array, or each value of an
+    # NDJSON / concatenated-JSON file, without loading the whole file.
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as f:
+        buffer = ""
+        pos = 0
+        eof = False
+        in_array = None
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+
+            if pos >= len(buffer):
+                if eof:
+                    break
+                chunk = f.read(read_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+
+            if in_array is None:
+                in_array = buffer[pos] == "["
+                if in_array:
+                    pos += 1
+                    continue
+
+            if in_array:
+                if buffer[pos] == ",":
+                    pos += 1
+                    continue
+                if buffer[pos] == "]":
+                    pos += 1
+                    in_array = False
+                    continue
+
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or len(buffer) - pos >= max_value_chars:
+                    raise
+                value, end = None, None
+
+            # A value ending exactly at the buffer edge may be truncated
+            # (e.g. a number split across reads), so read more before yielding.
+            # Reads grow with the pending text so a large value is decoded a
+            # logarithmic rather than linear number of times
+            if end is None or (end == len(buffer) and not eof):
+                chunk = f.read(max(read_size, len(buffer) - pos))
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+
+            pos = end
+            yield value
+
+
+class JSONIngestPipeline:
+    def __init__(self, mongo_manager, batch_size: int = 1_000, workers: int = 1):
+        self.mongo_manager = mongo_manager
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+
+    def ingest(
+        self,
+        file_path: str,
+        collection_name: str,
+        database_name: str,
+        stats: Optional[Any] = None,
+    ) -> Dict[str, Any]:
+        started = time.perf_counter()
+
+        records = iter_json_records(file_path)
+        first = next(records, None)
+        if first is None:
+            return {"row_count": 0, "columns": []}
+
+        db = self.mongo_manager.get_database(database_name)
+        collection = db[collection_name]
+        collection.drop()
+        columns = list(first.keys()) if isinstance(first, dict) else []
+
+        # Bound the number of batches held in memory while workers insert
+        pending = threading.BoundedSemaphore(self.workers * 2)
+        futures: List[Future] = []
+        row_count = 0
+
+        def insert(batch: List[Dict]):
+            try:
+                collection.insert_many(batch, ordered=False)
+            finally:
+                pending.release()
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="mongo-ingest"
+        ) as executor:
+            for batch in self._batches(itertools.chain([first], records)):
+                # Before submitting: insert_many adds _id to the documents
+                if stats is not None:
+                    stats.observe_records(batch)
+                pending.acquire()
+                futures.append(executor.submit(insert, batch))
+                row_count += len(batch)
+
+                # Surface insert errors early instead of after reading the whole file
+                for future in [f for f in futures if f.done()]:
+                    future.result()
+                futures = [f for f in futures if not f.done()]
+
+        for future in futures:
+            future.result()
+
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"Ingested {row_count} documents into {database_name}.{collection_name} "
+            f"in {elapsed:.2f}s"
+        )
+        return {
+            "row_count": row_count,
+            "columns": columns,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(row_count / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def _batches(self, records: Iterator[Any]) -> Iterator[List[Dict]]:
+        batch: List[Dict] = []
+        for record in records:
+            if not isinstance(record, dict):
+                raise ValueError(f"Expected JSON objects, got {type(record).__name__}")
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
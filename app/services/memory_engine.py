@@ -0,0 +1,522 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+import operator
+import threading
+import unicodedata
+import logging
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+from app.metrics import observe_rows, stage
+from app.services.csv_ingest import quote_identifier
+from app.services.sql_builder import COMPARISON_OPERATORS
+
+logger = logging.getLogger(__name__)
+
+# Same cap the managers append to queries without an explicit limit
+DEFAULT_ROW_LIMIT = 30
+
+MONGO_COMPARISONS = {
+    "$eq": operator.eq,
+    "$ne": operator.ne,
+    "$gt": operator.gt,
+    "$gte": operator.ge,
+    "$lt": operator.lt,
+    "$lte": operator.le,
+}
+
+
+class UnsupportedQuery(Exception):
+    pass
+
+
+@dataclass
+class _Table:
+    frame: pd.DataFrame
+    nbytes: int
+    # Columns without nested documents or arrays, and those holding only strings
+    scalar_columns: FrozenSet[str]
+    string_columns: FrozenSet[str]
+    collation_safe: Dict[str, bool] = field(default_factory=dict)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def _fold(value: str) -> str:
+    # Approximates MySQL's default accent/case-insensitive, PAD SPACE collation
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().rstrip(" ")
+
+
+def _records(frame: pd.DataFrame, drop_missing: bool = False) -> List[Dict[str, Any]]:
+    # Column-wise tolist() yields plain Python values and is much cheaper
+    # than boxing the frame to object dtype and calling to_dict("records")
+    names = list(frame.columns)
+    columns = []
+    for name in names:
+        series = frame[name]
+        values = series.tolist()
+        missing = series.isna().to_numpy()
+        if missing.any():
+            for position in np.flatnonzero(missing):
+                values[position] = None
+        columns.append(values)
+    records = [dict(zip(names, row)) for row in zip(*columns)]
+    if drop_missing:
+        # Documents loaded from Mongo only have the fields that were present
+        return [{k: v for k, v in row.items() if v is not None} for row in records]
+    return records
+
+
+class InMemoryEngine:
+    # Keeps a pandas copy of tables loaded through DataUploadService and answers
+    # the query shapes the NLP intents produce without a database round trip.
+    # Anything it cannot reproduce exactly raises UnsupportedQuery internally
+    # and the caller falls back to the database.
+    def __init__(
+        self,
+        mysql_manager,
+        mongo_manager,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_table_bytes: Optional[int] = None,
+        load_chunk_rows: int = 50_000,
+    ):
+        self.mysql_manager = mysql_manager
+        self.mongo_manager = mongo_manager
+        self.max_bytes = max_bytes
+        self.max_table_bytes = min(max_table_bytes or max_bytes // 4, max_bytes)
+        self.load_chunk_rows = load_chunk_rows
+        self._tables: "OrderedDict[Tuple[str, str, str], _Table]" = OrderedDict()
+        # Bumped by drop() so a load that was reading while the table was
+        # replaced does not store the old copy afterwards
+        self._generations: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.loads = 0
+        self.rejected = 0
+        self.evictions = 0
+        self.hits = 0
+        self.fallbacks = 0
+
+    def load(self, db_type: str, database_name: str, table_name: str) -> bool:
+        # Read back what the database stored, so types and values match what
+        # a query against it would return
+        key = (db_type, database_name or "", table_name)
+        self.drop(db_type, database_name, table_name)
+        scopes = (key, key[:2])
+        with self._lock:
+            generations = [self._generations.get(scope, 0) for scope in scopes]
+        with stage("memory_load", db_type):
+            if db_type == "mysql":
+                frame = self._read_mysql(database_name, table_name)
+            else:
+                frame = self._read_mongo(database_name, table_name)
+        if frame is None:
+            with self._lock:
+                self.rejected += 1
+            logger.info(
+                f"Not keeping {db_type}/{database_name}/{table_name} in memory: "
+                f"larger than {self.max_table_bytes} bytes"
+            )
+            return False
+
+        table = self._describe(frame)
+        with self._lock:
+            if [self._generations.get(scope, 0) for scope in scopes] != generations:
+                return False
+            self._tables[key] = table
+            self.bytes += table.nbytes
+            self.loads += 1
+            while self.bytes > self.max_bytes and len(self._tables) > 1:
+                _, evicted = self._tables.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+        logger.info(
+            f"Loaded {len(frame)} rows of {db_type}/{database_name}/{table_name} "
+            f"into memory ({table.nbytes} bytes)"
+        )
+        return True
+
+    def drop(self, db_type: str, database_name: str, table_name: Optional[str] = None):
+        # With no table, drops every table kept for the database
+        database_name = database_name or ""
+        scope = (db_type, database_name)
+        if table_name is not None:
+            scope += (table_name,)
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            stale = [key for key in self._tables if key[: len(scope)] == scope]
+            for key in stale:
+                self.bytes -= self._tables.pop(key).nbytes
+
+    def has_table(self, db_type: str, database_name: str, table_name: str) -> bool:
+        with self._lock:
+            return (db_type, database_name or "", table_name) in self._tables
+
+    def execute_intent(
+        self,
+        db_type: str,
+        database_name: str,
+        table_name: str,
+        intent: str,
+        components: Dict[str, Any],
+    ) -> Optional[List[Dict[str, Any]]]:
+        return self._execute(
+            db_type,
+            database_name,
+            table_name,
+            intent,
+            lambda table: self._run_intent(table, intent, components),
+        )
+
+    def execute_pipeline(
+        self, database_name: str, collection_name: str, query: Any
+    ) -> Optional[List[Dict[str, Any]]]:
+        return self._execute(
+            "mongodb",
+            database_name,
+            collection_name,
+            "pipeline",
+            lambda table: self._run_pipeline(table, query),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            executions = self.hits + self.fallbacks
+            return {
+                "tables": len(self._tables),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_table_bytes": self.max_table_bytes,
+                "loads": self.loads,
+                "rejected": self.rejected,
+                "evictions": self.evictions,
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "hit_ratio": self.hits / executions if executions else 0.0,
+            }
+
+    def _execute(self, db_type, database_name, table_name, label, run):
+        key = (db_type, database_name or "", table_name)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+        if table is None:
+            return None
+
+        try:
+            with stage("memory_execute", db_type, label):
+                rows = run(table)
+        except UnsupportedQuery as e:
+            with self._lock:
+                self.fallbacks += 1
+            logger.debug(f"In-memory engine fell back to {db_type}: {str(e)}")
+            return None
+        with self._lock:
+            self.hits += 1
+        observe_rows("memory_execute", db_type, len(rows))
+        return rows
+
+    # Loading
+
+    def _read_mysql(self, database_name: str, table_name: str) -> Optional[pd.DataFrame]:
+        engine = self.mysql_manager.get_engine(database_name)
+        query = text(f"SELECT * FROM {quote_identifier(table_name)}")
+        chunks, size = [], 0
+        with engine.connect() as conn:
+            for chunk in pd.read_sql_query(query, conn, chunksize=self.load_chunk_rows):
+                size += int(chunk.memory_usage(deep=True).sum())
+                if size > self.max_table_bytes:
+                    return None
+                chunks.append(chunk)
+        return self._combine(chunks)
+
+    def _read_mongo(self, database_name: str, collection_name: str) -> Optional[pd.DataFrame]:
+        collection = self.mongo_manager.get_database(database_name)[collection_name]
+        cursor = collection.find({}, {"_id": 0}).batch_size(self.load_chunk_rows)
+        chunks, size, batch = [], 0, []
+        try:
+            for doc in cursor:
+                batch.append(doc)
+                if len(batch) < self.load_chunk_rows:
+                    continue
+                chunks.append(pd.DataFrame.from_records(batch))
+                batch = []
+                size += int(chunks[-1].memory_usage(deep=True).sum())
+                if size > self.max_table_bytes:
+                    return None
+        finally:
+            cursor.close()
+        if batch:
+            chunks.append(pd.DataFrame.from_records(batch))
+            size += int(chunks[-1].memory_usage(deep=True).sum())
+            if size > self.max_table_bytes:
+                return None
+        return self._combine(chunks)
+
+    def _combine(self, chunks: List[pd.DataFrame]) -> pd.DataFrame:
+        frame = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame()
+        # Nullable dtypes keep integer columns integral when values are missing
+        return frame.convert_dtypes(convert_string=False)
+
+    def _describe(self, frame: pd.DataFrame) -> _Table:
+        scalar, strings = set(), set()
+        for name in frame.columns:
+            series = frame[name]
+            if series.dtype != object:
+                scalar.add(name)
+                if pd.api.types.is_string_dtype(series):
+                    strings.add(name)
+                continue
+            types = set(map(type, series.dropna()))
+            if not types & {dict, list}:
+                scalar.add(name)
+            if types <= {str}:
+                strings.add(name)
+        return _Table(
+            frame,
+            int(frame.memory_usage(deep=True).sum()),
+            frozenset(scalar),
+            frozenset(strings),
+        )
+
+    # Vectorized operations
+
+    def _column(self, table: _Table, frame: pd.DataFrame, name: str) -> pd.Series:
+        if name not in frame.columns:
+            raise UnsupportedQuery(f"Unknown column {name}")
+        if name in table.frame.columns and name not in table.scalar_columns:
+            raise UnsupportedQuery(f"Column {name} holds nested values")
+        return frame[name]
+
+    def _filter(
+        self,
+        table: _Table,
+        frame: pd.DataFrame,
+        name: str,
+        compare,
+        value: Any,
+        missing_matches: bool = False,
+        limit: Optional[int] = None,
+    ) -> pd.DataFrame:
+        series = self._column(table, frame, name)
+        if _is_number(value):
+            if not _is_numeric(series):
+                raise UnsupportedQuery(f"Numeric comparison on non-numeric column {name}")
+        elif isinstance(value, str) and compare in (operator.eq, operator.ne):
+            if name not in table.string_columns:
+                raise UnsupportedQuery(f"String comparison on non-string column {name}")
+        else:
+            raise UnsupportedQuery(f"Unsupported comparison value {value!r}")
+        mask = compare(series, value)
+        if compare is operator.ne and missing_matches:
+            mask = mask.fillna(True) | series.isna()
+        positions = np.flatnonzero(mask.fillna(False).to_numpy(dtype=bool))
+        if limit is not None:
+            # Only the rows that will be returned are taken from the frame
+            positions = positions[:limit]
+        return frame.iloc[positions]
+
+    def _top(
+        self, table: _Table, frame: pd.DataFrame, name: str, count: int, ascending: bool
+    ) -> pd.DataFrame:
+        series = self._column(table, frame, name)
+        if _is_numeric(series):
+            present = int(series.notna().sum())
+            # nlargest/nsmallest skip missing values, which sort last
+            # descending and first ascending
+            if not ascending and present >= count:
+                return frame.loc[series.nlargest(count).index]
+            if ascending and present == len(series):
+                return frame.loc[series.nsmallest(count).index]
+        elif name not in table.string_columns:
+            raise UnsupportedQuery(f"Cannot order mixed-type column {name}")
+        return frame.sort_values(
+            name, ascending=ascending, na_position="first" if ascending else "last", kind="stable"
+        ).head(count)
+
+    def _grouped(self, table: _Table, frame: pd.DataFrame, name: str, fold_strings: bool):
+        self._column(table, frame, name)
+        if fold_strings and name in table.string_columns and not self._collation_safe(table, name):
+            # Values that differ only in case or accents form one MySQL group
+            raise UnsupportedQuery(f"Column {name} has values that collate together")
+        return frame.groupby(name, dropna=False, sort=False)
+
+    def _aggregate(self, table, frame, grouped, func: str, name: str, sql_nulls: bool) -> pd.Series:
+        if not _is_numeric(self._column(table, frame, name)):
+            raise UnsupportedQuery(f"Cannot aggregate non-numeric column {name}")
+        column = grouped[name]
+        if func == "sum":
+            # SQL SUM over only NULLs is NULL; Mongo $sum is 0
+            return column.sum(min_count=1 if sql_nulls else 0)
+        if func == "avg":
+            if sql_nulls and pd.api.types.is_integer_dtype(frame[name]):
+                # MySQL averages integers as DECIMAL with div_precision_increment=4
+                return column.mean().round(4)
+            return column.mean()
+        if func == "min":
+            return column.min()
+        if func == "max":
+            return column.max()
+        raise UnsupportedQuery(f"Unsupported aggregate {func}")
+
+    def _collation_safe(self, table: _Table, name: str) -> bool:
+        if name not in table.collation_safe:
+            values = table.frame[name].dropna().unique()
+            table.collation_safe[name] = len({_fold(v) for v in values}) == len(values)
+        return table.collation_safe[name]
+
+    # Intents (generated SQL)
+
+    def _run_intent(self, table: _Table, intent: str, components: Dict[str, Any]):
+        frame = table.frame
+        if intent == "where clause":
+            compare = COMPARISON_OPERATORS[components["operator"]]
+            result = self._filter(
+                table,
+                frame,
+                components["column"],
+                compare,
+                components["value"],
+                limit=DEFAULT_ROW_LIMIT,
+            )
+            return _records(result)
+
+        if intent == "order by with limit":
+            order_by = components["order_by"]
+            if order_by in table.string_columns:
+                raise UnsupportedQuery("String ordering follows the MySQL collation")
+            result = self._top(table, frame, order_by, int(components["limit"]), ascending=False)
+            return _records(result)
+
+        if intent == "select columns":
+            columns = components["columns"]
+            if isinstance(columns, str):
+                columns = [c.strip() for c in columns.split(",") if c.strip()]
+            columns = [self._column(table, frame, c).name for c in columns]
+            return _records(frame.iloc[:DEFAULT_ROW_LIMIT][columns])
+
+        group_by = components["group_by"]
+        grouped = self._grouped(table, frame, group_by, fold_strings=True)
+        if intent == "group by with count":
+            result = grouped.size().rename("count").reset_index()
+        elif intent == "group by with aggregation":
+            agg_func, aggregate = components["agg_func"], components["aggregate"]
+            values = self._aggregate(table, frame, grouped, agg_func, aggregate, sql_nulls=True)
+            result = values.rename(f"{agg_func}_{aggregate}").reset_index()
+        elif intent == "having clause":
+            totals = self._aggregate(
+                table, frame, grouped, "sum", components["aggregate"], sql_nulls=True
+            )
+            result = totals.rename("total").reset_index()
+            compare = COMPARISON_OPERATORS[components["operator"]]
+            result = result[compare(result["total"], components["value"]).fillna(False).astype(bool)]
+        else:
+            raise UnsupportedQuery(f"Unknown intent {intent}")
+        return _records(result.head(DEFAULT_ROW_LIMIT))
+
+    # Aggregation pipelines (generated Mongo queries)
+
+    def _run_pipeline(self, table: _Table, query: Any):
+        stages = query if isinstance(query, list) else [{"$match": query}]
+        frame = table.frame
+        grouped = has_limit = False
+        for step in stages:
+            if len(step) != 1:
+                raise UnsupportedQuery("Malformed stage")
+            (name, spec), = step.items()
+            if name == "$match":
+                frame = self._mongo_match(table, frame, spec)
+            elif name == "$group":
+                frame = self._mongo_group(table, frame, spec)
+                grouped = True
+            elif name == "$sort":
+                frame = self._mongo_sort(table, frame, spec)
+            elif name == "$limit":
+                frame = frame.head(int(spec))
+                has_limit = True
+            elif name == "$skip":
+                frame = frame.iloc[int(spec):]
+            elif name == "$project":
+                frame = self._mongo_project(table, frame, spec)
+            else:
+                raise UnsupportedQuery(f"Stage {name} is not supported in memory")
+        if not has_limit:
+            frame = frame.head(DEFAULT_ROW_LIMIT)
+        # Cleaned Mongo results never include _id
+        frame = frame.drop(columns=["_id"], errors="ignore")
+        return _records(frame, drop_missing=not grouped)
+
+    def _mongo_match(self, table: _Table, frame: pd.DataFrame, spec: Dict[str, Any]):
+        for name, condition in spec.items():
+            if name.startswith("$"):
+                raise UnsupportedQuery(f"Operator {name} is not supported in memory")
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            for op, value in condition.items():
+                if op not in MONGO_COMPARISONS:
+                    raise UnsupportedQuery(f"Operator {op} is not supported in memory")
+                frame = self._filter(
+                    table, frame, name, MONGO_COMPARISONS[op], value, missing_matches=True
+                )
+        return frame
+
+    def _mongo_group(self, table: _Table, frame: pd.DataFrame, spec: Dict[str, Any]):
+        key = spec.get("_id")
+        if not (isinstance(key, str) and key.startswith("$")):
+            raise UnsupportedQuery("Only single-field group keys are supported in memory")
+        grouped = self._grouped(table, frame, key[1:], fold_strings=False)
+        columns = {}
+        for output, accumulator in spec.items():
+            if output == "_id":
+                continue
+            if not isinstance(accumulator, dict) or len(accumulator) != 1:
+                raise UnsupportedQuery(f"Unsupported accumulator for {output}")
+            (op, argument), = accumulator.items()
+            if op == "$sum" and _is_number(argument):
+                columns[output] = grouped.size() * argument
+            elif isinstance(argument, str) and argument.startswith("$") and op in (
+                "$sum", "$avg", "$min", "$max"
+            ):
+                columns[output] = self._aggregate(
+                    table, frame, grouped, op[1:], argument[1:], sql_nulls=False
+                )
+            else:
+                raise UnsupportedQuery(f"Accumulator {op} is not supported in memory")
+        result = pd.DataFrame(columns) if columns else grouped.size().to_frame().iloc[:, :0]
+        result.index.name = "_id"
+        return result.reset_index()
+
+    def _mongo_sort(self, table: _Table, frame: pd.DataFrame, spec: Dict[str, int]):
+        if len(spec) != 1:
+            raise UnsupportedQuery("Only single-key sorts are supported in memory")
+        (name, direction), = spec.items()
+        return self._top(table, frame, name, len(frame), ascending=direction > 0)
+
+    def _mongo_project(self, table: _Table, frame: pd.DataFrame, spec: Dict[str, Any]):
+        included = {k: v for k, v in spec.items() if k != "_id" and v not in (0, False)}
+        if not included:
+            excluded = [k for k, v in spec.items() if v in (0, False)]
+            return frame.drop(columns=excluded, errors="ignore")
+
+        projected = {}
+        if spec.get("_id", 1) not in (0, False) and "_id" in frame.columns:
+            projected["_id"] = frame["_id"]
+        for name, value in included.items():
+            if value in (1, True):
+                # Missing fields are left out, as Mongo does
+                if name in frame.columns:
+                    projected[name] = frame[name]
+            elif isinstance(value, str) and value.startswith("$") and value[1:] in frame.columns:
+                projected[name] = frame[value[1:]]
+            else:
+                raise UnsupportedQuery(f"Projection of {name} is not supported in memory")
+        return pd.DataFrame(projected, index=frame.index)
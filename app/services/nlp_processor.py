@@ -1,26 +1,142 @@
+from dataclasses import dataclass
 from enum import Enum
-import re
-from typing import List, Dict, Optional, Any
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Tuple
+from app.services.intent_matcher import MONGO_OPERATORS, IntentMatcher, extract_operator
+from app.services.nlp_resources import NLPResources, load_nlp_resources
+from app.services.sql_builder import SQLQuery, SQLQueryBuilder
+from app.metrics import observe_stage, stage
 import logging
-import json
+import threading
+import time
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
-try:
-    nltk.data.find("tokenizers/punkt")
-    nltk.data.find("corpora/stopwords")
-    nltk.data.find("corpora/wordnet")
-except LookupError:
-    nltk.download("punkt")
-    nltk.download("stopwords")
-    nltk.download("wordnet")
+DIGITS = tuple("0123456789")
+
+QUERY_PATTERNS = {
+    "group by with aggregation": {
+        "patterns": [
+            r".*?(?:sum|total|average|avg|mean)\s+(?:of\s+)?(\w+).*?(?:by|per|for\s+each)\s+(\w+)",
+            r".*?(?:calculate|find|get|show).*?(?:sum|total|average|avg|mean)\s+(?:of\s+)?(\w+).*?(?:by|per|for\s+each)\s+(\w+)",
+        ],
+        "keywords": [("sum", "total", "average", "avg", "mean"), ("by", "per", "for")],
+        "mysql_template": "SELECT {group_by}, {agg_func}({aggregate}) FROM {table} GROUP BY {group_by}",
+        "mongodb_template": """[
+            { "$group": { 
+                "_id": "${group_by}",
+                "result": { "${agg_func}": "${aggregate}" }
+            }},
+            { "$project": {
+                "_id": 0,
+                "{group_by}": "$_id",
+                "result": 1
+            }}
+        ]""",
+    },
+    "group by with count": {
+        "patterns": [
+            r".*?(?:count|number\s+of|how\s+many)\s+(\w+).*?(?:by|per|for\s+each)\s+(\w+)",
+        ],
+        "keywords": [("count", "number", "how"), ("by", "per", "for")],
+        "mysql_template": "SELECT {group_by}, COUNT(*) as count FROM {table} GROUP BY {group_by}",
+        "mongodb_template": """[
+            { "$group": { 
+                "_id": "${group_by}",
+                "count": { "$sum": 1 }
+            }},
+            { "$project": {
+                "_id": 0,
+                "{group_by}": "$_id",
+                "count": 1
+            }}
+        ]""",
+    },
+    "order by with limit": {
+        "patterns": [
+            r".*?(?:top|first)\s+(\d+).*?(?:by|sorted|ordered)\s+(?:by\s+)?(\w+)",
+            r".*?(?:order|sort)\s+(?:by\s+)?(\w+).*?(?:top|first|limit)\s+(\d+)",
+        ],
+        "keywords": [("top", "first", "order", "sort"), DIGITS],
+        "mysql_template": "SELECT * FROM {table} ORDER BY {order_by} DESC LIMIT {limit}",
+        "mongodb_template": """[
+            { "$sort": { "{order_by}": -1 }},
+            { "$limit": {limit} },
+            { "$project": {
+                "_id": 0
+            }}
+        ]""",
+    },
+    "where clause": {
+        "patterns": [
+            r".*?where\s+(\w+).*?(?:>|>=|<|<=|!=|=|<>)\s*(\d+)",
+            r".*?where\s+(\w+).*?(?:is|equals?|greater\s+than|less\s+than)\s*(\d+)",
+            r".*?with\s+(\w+).*?(?:>|>=|<|<=|!=|=|<>)\s*(\d+)",
+            r".*?with\s+(\w+).*?(?:is|equals?|greater\s+than|less\s+than)\s*(\d+)",
+        ],
+        "keywords": [("where", "with"), DIGITS],
+        "mysql_template": "SELECT * FROM {table} WHERE {column} {operator} {value}",
+        "mongodb_template": """[
+            { "$match": { "{column}": { "${operator}": {value} }}},
+            { "$project": {
+                "_id": 0
+            }}
+        ]""",
+    },
+    "having clause": {
+        "patterns": [
+            r".*?(?:group|filter)\s+by\s+(\w+).*?(?:having|where).*?(?:total|sum|count)\s+(?:of\s+)?(\w+).*?(?:>|>=|<|<=|=)\s*(\d+)",
+            r".*?groups?\s+of\s+(\w+).*?(?:having|where).*?(?:total|sum|count)\s+(?:of\s+)?(\w+).*?(?:>|>=|<|<=|=)\s*(\d+)",
+        ],
+        "keywords": [("group", "filter"), ("having", "where"), ("total", "sum", "count"), DIGITS],
+        "mysql_template": "SELECT {group_by}, SUM({aggregate}) as total FROM {table} GROUP BY {group_by} HAVING total {operator} {value}",
+        "mongodb_template": """[
+            { "$group": { 
+                "_id": "${group_by}",
+                "total": { "$sum": "${aggregate}" }
+            }},
+            { "$match": {
+                "total": { "${operator}": {value} }
+            }},
+            { "$project": {
+                "_id": 0,
+                "{group_by}": "$_id",
+                "total": 1
+            }}
+        ]""",
+    },
+    "select columns": {
+        "patterns": [
+            r".*?(?:select|show|get|display).*?(?:columns?|fields?)?\s*(\w+(?:\s*,\s*\w+)*)",
+            r".*?(?:columns?|fields?)\s+(\w+(?:\s*,\s*\w+)*)",
+        ],
+        "keywords": [("select", "show", "get", "display", "column", "field")],
+        "mysql_template": "SELECT {columns} FROM {table}",
+        "mongodb_template": """[
+            { "$project": {
+                "_id": 0,
+                {columns_projection}
+            }}
+        ]""",
+    },
+}
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    raw: str
+    tokens: Tuple[str, ...]
+    lemmas: Tuple[str, ...]
+    processed: str
+    intent: Optional[str] = None
+    component_items: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def components(self) -> Dict[str, str]:
+        return dict(self.component_items)
 
 
 class DatabaseType(str, Enum):
@@ -29,9 +145,14 @@ class DatabaseType(str, Enum):
 
 
 class NLPProcessor:
-    def __init__(self):
-        self.lemmatizer = WordNetLemmatizer()
-        self.stop_words = set(stopwords.words("english")) - {
+    def __init__(
+        self,
+        resources: Optional[NLPResources] = None,
+        sql_builder: Optional[SQLQueryBuilder] = None,
+    ):
+        self.resources = resources or load_nlp_resources()
+        self.sql_builder = sql_builder or SQLQueryBuilder()
+        self.stop_words = set(self.resources.stop_words) - {
             "by",
             "in",
             "with",
@@ -61,206 +182,80 @@ class NLPProcessor:
             "limit",
             "filter",
         }
-        self.current_query = ""
-
-        self.query_patterns = {
-            "group by with aggregation": {
-                "patterns": [
-                    r".*?(?:sum|total|average|avg|mean)\s+(?:of\s+)?(\w+).*?(?:by|per|for\s+each)\s+(\w+)",
-                    r".*?(?:calculate|find|get|show).*?(?:sum|total|average|avg|mean)\s+(?:of\s+)?(\w+).*?(?:by|per|for\s+each)\s+(\w+)",
-                ],
-                "mysql_template": "SELECT {group_by}, {agg_func}({aggregate}) FROM {table} GROUP BY {group_by}",
-                "mongodb_template": """[
-                    { "$group": { 
-                        "_id": "${group_by}",
-                        "result": { "${agg_func}": "${aggregate}" }
-                    }},
-                    { "$project": {
-                        "_id": 0,
-                        "{group_by}": "$_id",
-                        "result": 1
-                    }}
-                ]""",
-            },
-            "group by with count": {
-                "patterns": [
-                    r".*?(?:count|number\s+of|how\s+many)\s+(\w+).*?(?:by|per|for\s+each)\s+(\w+)",
-                ],
-                "mysql_template": "SELECT {group_by}, COUNT(*) as count FROM {table} GROUP BY {group_by}",
-                "mongodb_template": """[
-                    { "$group": { 
-                        "_id": "${group_by}",
-                        "count": { "$sum": 1 }
-                    }},
-                    { "$project": {
-                        "_id": 0,
-                        "{group_by}": "$_id",
-                        "count": 1
-                    }}
-                ]""",
-            },
-            "order by with limit": {
-                "patterns": [
-                    r".*?(?:top|first)\s+(\d+).*?(?:by|sorted|ordered)\s+(?:by\s+)?(\w+)",
-                    r".*?(?:order|sort)\s+(?:by\s+)?(\w+).*?(?:top|first|limit)\s+(\d+)",
-                ],
-                "mysql_template": "SELECT * FROM {table} ORDER BY {order_by} DESC LIMIT {limit}",
-                "mongodb_template": """[
-                    { "$sort": { "{order_by}": -1 }},
-                    { "$limit": {limit} },
-                    { "$project": {
-                        "_id": 0
-                    }}
-                ]""",
-            },
-            "where clause": {
-                "patterns": [
-                    r".*?where\s+(\w+).*?(?:>|>=|<|<=|!=|=|<>)\s*(\d+)",
-                    r".*?where\s+(\w+).*?(?:is|equals?|greater\s+than|less\s+than)\s*(\d+)",
-                    r".*?with\s+(\w+).*?(?:>|>=|<|<=|!=|=|<>)\s*(\d+)",
-                    r".*?with\s+(\w+).*?(?:is|equals?|greater\s+than|less\s+than)\s*(\d+)",
-                ],
-                "mysql_template": "SELECT * FROM {table} WHERE {column} {operator} {value}",
-                "mongodb_template": """[
-                    { "$match": { "{column}": { "${operator}": {value} }}},
-                    { "$project": {
-                        "_id": 0
-                    }}
-                ]""",
-            },
-            "having clause": {
-                "patterns": [
-                    r".*?(?:group|filter)\s+by\s+(\w+).*?(?:having|where).*?(?:total|sum|count)\s+(?:of\s+)?(\w+).*?(?:>|>=|<|<=|=)\s*(\d+)",
-                    r".*?groups?\s+of\s+(\w+).*?(?:having|where).*?(?:total|sum|count)\s+(?:of\s+)?(\w+).*?(?:>|>=|<|<=|=)\s*(\d+)",
-                ],
-                "mysql_template": "SELECT {group_by}, SUM({aggregate}) as total FROM {table} GROUP BY {group_by} HAVING total {operator} {value}",
-                "mongodb_template": """[
-                    { "$group": { 
-                        "_id": "${group_by}",
-                        "total": { "$sum": "${aggregate}" }
-                    }},
-                    { "$match": {
-                        "total": { "${operator}": {value} }
-                    }},
-                    { "$project": {
-                        "_id": 0,
-                        "{group_by}": "$_id",
-                        "total": 1
-                    }}
-                ]""",
-            },
-            "select columns": {
-                "patterns": [
-                    r".*?(?:select|show|get|display).*?(?:columns?|fields?)?\s*(\w+(?:\s*,\s*\w+)*)",
-                    r".*?(?:columns?|fields?)\s+(\w+(?:\s*,\s*\w+)*)",
-                ],
-                "mysql_template": "SELECT {columns} FROM {table}",
-                "mongodb_template": """[
-                    { "$project": {
-                        "_id": 0,
-                        {columns_projection}
-                    }}
-                ]""",
-            },
-        }
+        self.query_patterns = QUERY_PATTERNS
+        self.intent_matcher = IntentMatcher(self.query_patterns)
+        self._lemmatize = lru_cache(maxsize=4096)(self.resources.lemmatize)
 
-    def process_query(self, query: str) -> str:
-        logger.info(f"Processing raw query: {query}")
-        self.current_query = query
-        tokens = word_tokenize(query.lower())
-        processed_query = " ".join(
-            [
-                self.lemmatizer.lemmatize(token)
-                for token in tokens
-                if token not in self.stop_words
-            ]
+    def parse(self, query: str) -> ParsedQuery:
+        with stage("tokenize"):
+            tokens = tuple(self.resources.tokenize(query.lower()))
+            lemmas = tuple(
+                self._lemmatize(token) for token in tokens if token not in self.stop_words
+            )
+        processed_query = " ".join(lemmas)
+        started = time.perf_counter()
+        intent_match = self.intent_matcher.match(processed_query, query)
+        # The intent label is only known once matching is done
+        observe_stage(
+            "match",
+            time.perf_counter() - started,
+            intent=intent_match.intent if intent_match else "none",
+        )
+
+        parsed = ParsedQuery(
+            raw=query,
+            tokens=tokens,
+            lemmas=lemmas,
+            processed=processed_query,
+            intent=intent_match.intent if intent_match else None,
+            component_items=tuple(intent_match.components.items()) if intent_match else (),
         )
-        logger.info(f"Processed query: {processed_query}")
-        return processed_query
+        logger.info(f"Parsed query: {processed_query!r} -> {parsed.intent}")
+        return parsed
+
+    def process_query(self, query: str) -> str:
+        return self.parse(query).processed
 
     def match_query_pattern(self, processed_query: str) -> Optional[str]:
-        logger.info(f"Attempting to match query: {processed_query}")
-        for pattern_name, pattern_info in self.query_patterns.items():
-            for pattern in pattern_info["patterns"]:
-                logger.info(f"Trying pattern {pattern_name}: {pattern}")
-                if re.search(pattern, processed_query, re.IGNORECASE):
-                    logger.info(f"Matched pattern: {pattern_name}")
-                    return pattern_name
-        logger.warning("No matching pattern found")
-        return None
+        pattern_name = self.intent_matcher.match_intent(processed_query)
+        if pattern_name is None:
+            logger.warning("No matching pattern found")
+        else:
+            logger.info(f"Matched pattern: {pattern_name}")
+        return pattern_name
 
     def extract_query_components(self, query: str, pattern_name: str) -> Dict[str, str]:
-        logger.info(f"Extracting components for pattern {pattern_name} from query: {query}")
-
-        if pattern_name not in self.query_patterns:
-            logger.error(f"Unknown pattern: {pattern_name}")
-            return {}
-
-        for pattern_regex in self.query_patterns[pattern_name]["patterns"]:
-            match = re.search(pattern_regex, query, re.IGNORECASE)
-            if match:
-                logger.info(f"Found match with pattern: {pattern_regex}")
-                logger.debug(f"Match groups: {match.groups()}")
-
-                try:
-                    if pattern_name == "group by with aggregation":
-                        agg_func = (
-                            "sum"
-                            if any(w in query.lower() for w in ["sum", "total"])
-                            else "avg"
-                        )
-                        components = {
-                            "aggregate": match.group(1),
-                            "group_by": match.group(2),
-                            "agg_func": agg_func,
-                        }
-                    elif pattern_name == "group by with count":
-                        components = {
-                            "aggregate": match.group(1),
-                            "group_by": match.group(2),
-                        }
-                    elif pattern_name == "order by with limit":
-                        components = {
-                            "limit": match.group(1),
-                            "order_by": match.group(2),
-                        }
-                    elif pattern_name == "where clause":
-                        components = {
-                            "column": match.group(1),
-                            "operator": self._extract_operator(query),
-                            "value": match.group(2),
-                        }
-                    elif pattern_name == "having clause":
-                        components = {
-                            "group_by": match.group(1),
-                            "aggregate": match.group(2),
-                            "operator": self._extract_operator(query),
-                            "value": match.group(3),
-                        }
-                    elif pattern_name == "select columns":
-                        columns = match.group(1).replace(" ", "").split(",")
-                        components = {"columns": ", ".join(columns)}
-
-                    logger.info(f"Extracted components: {components}")
-                    return components
-
-                except IndexError as e:
-                    logger.error(f"Error extracting components: {e}")
-                    continue
-
-        logger.warning(f"No components could be extracted from query: {query}")
-        return {}
+        components = self.intent_matcher.extract(pattern_name, query)
+        logger.debug(f"Extracted components: {components}")
+        return components
 
     def validate_columns(self, columns: List[str], required_columns: List[str]) -> bool:
         return all(col in columns for col in required_columns)
 
+    def generate_sql(self, parsed: ParsedQuery, table_name: str) -> SQLQuery:
+        if parsed.intent not in self.query_patterns:
+            raise ValueError(f"Unknown pattern: {parsed.intent}")
+        if not parsed.components:
+            raise ValueError("Could not extract query components")
+        try:
+            with stage("generate", "mysql", parsed.intent):
+                return self.sql_builder.build(parsed.intent, table_name, parsed.components)
+        except KeyError as e:
+            raise ValueError(f"Missing component in template: {e}")
+
     def generate_query(
         self,
-        pattern: str,
+        parsed: ParsedQuery,
         table_name: str,
         columns: List[str],
         db_type: str,
     ) -> str:
+        if db_type == "mysql":
+            query = self.generate_sql(parsed, table_name).render()
+            logger.info(f"Generated query: {query}")
+            return query
+
+        pattern = parsed.intent
         logger.info(f"Generating query for pattern: {pattern}")
 
         if pattern not in self.query_patterns:
@@ -268,18 +263,16 @@ class NLPProcessor:
             logger.error(error_msg)
             raise ValueError(error_msg)
 
-        components = self.extract_query_components(self.current_query, pattern)
+        components = parsed.components
         if not components:
             error_msg = "Could not extract query components"
             logger.error(error_msg)
             raise ValueError(error_msg)
 
-        template = (
-            self.query_patterns[pattern]["mysql_template"]
-            if db_type == "mysql"
-            else self.query_patterns[pattern]["mongodb_template"]
-        )
+        template = self.query_patterns[pattern]["mongodb_template"]
+        operator = MONGO_OPERATORS.get(components.get("operator"), "$eq")
 
+        started = time.perf_counter()
         try:
             query = template.replace("{table}", table_name)
 
@@ -295,25 +288,23 @@ class NLPProcessor:
                 query = query.replace("{limit}", components["limit"])
             elif pattern == "where clause":
                 query = query.replace("{column}", components["column"])
-                query = query.replace("{operator}", components["operator"])
+                query = query.replace("${operator}", operator)
                 query = query.replace("{value}", components["value"])
             elif pattern == "having clause":
                 query = query.replace("{group_by}", components["group_by"])
                 query = query.replace("{aggregate}", components["aggregate"])
-                query = query.replace("{operator}", components["operator"])
+                query = query.replace("${operator}", operator)
                 query = query.replace("{value}", components["value"])
             elif pattern == "select columns":
-                if db_type == "mysql":
-                    query = query.replace("{columns}", components["columns"])
-                else:
-                    columns_dict = {
-                        col.strip(): 1 for col in components["columns"].split(",")
-                    }
-                    projection_str = ", ".join(f'"{k}": {v}' for k, v in columns_dict.items())
-                    query = query.replace(
-                        "{columns_projection}", projection_str
-                    )
+                columns_dict = {
+                    col.strip(): 1 for col in components["columns"].split(",")
+                }
+                projection_str = ", ".join(f'"{k}": {v}' for k, v in columns_dict.items())
+                query = query.replace(
+                    "{columns_projection}", projection_str
+                )
 
+            observe_stage("generate", time.perf_counter() - started, db_type, pattern)
             logger.info(f"Generated query: {query}")
             return query
 
@@ -323,27 +314,24 @@ class NLPProcessor:
             raise ValueError(error_msg)
 
     def _extract_operator(self, operator_text: str) -> str:
-        operator_map = {
-            ">": ">",
-            "greater than": ">",
-            ">=": ">=",
-            "greater than or equal to": ">=",
-            "<": "<",
-            "less than": "<",
-            "<=": "<=",
-            "less than or equal to": "<=",
-            "=": "=",
-            "equals": "=",
-            "equal to": "=",
-            "is": "=",
-            "!=": "!=",
-            "<>": "!=",
-            "not equal to": "!=",
-            "not equals": "!=",
-        }
+        return extract_operator(operator_text)
+
+
+_processors: Dict[Tuple[str, bool], NLPProcessor] = {}
+_processors_lock = threading.Lock()
+
+
+def get_nlp_processor(mode: str = "auto", allow_download: bool = False) -> NLPProcessor:
+    # Built on first use so importing this module never touches NLTK data
+    key = (mode, allow_download)
+    with _processors_lock:
+        if key not in _processors:
+            resources = load_nlp_resources(mode, allow_download=allow_download)
+            logger.info(f"Loaded NLP resources from {resources.source}")
+            _processors[key] = NLPProcessor(resources)
+        return _processors[key]
+
 
-        operator_text = operator_text.lower()
-        for key, value in operator_map.items():
-            if key in operator_text:
-                return value
-        return "="
+def parse_query(query: str, mode: str = "auto", allow_download: bool = False) -> ParsedQuery:
+    # Module-level entry point so translation can be shipped to worker processes
+    return get_nlp_processor(mode, allow_download).parse(query)
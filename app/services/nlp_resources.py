@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List
+import json
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_LEXICON_PATH = os.path.join(os.path.dirname(__file__), "data", "nlp_lexicon.json")
+
+NLTK_PACKAGES = ["punkt_tab", "punkt", "stopwords", "wordnet"]
+
+RESOURCE_MODES = ("auto", "nltk", "bundled")
+
+_TOKEN_RE = re.compile(r"'\w+|\w+(?:\.\d+)?|[<>!]=|<>|[^\w\s]")
+
+
+class NLPResourceError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class NLPResources:
+    source: str
+    tokenize: Callable[[str], List[str]]
+    lemmatize: Callable[[str], str]
+    stop_words: FrozenSet[str]
+
+
+class BundledLemmatizer:
+    # Noun lemmatization from a precomputed exception table plus the regular
+    # English plural rules, for hosts without the WordNet corpus
+    def __init__(self, lemmas: Dict[str, str], invariant: List[str]):
+        self.lemmas = lemmas
+        self.invariant = frozenset(invariant)
+
+    def lemmatize(self, word: str) -> str:
+        if word in self.lemmas:
+            return self.lemmas[word]
+        if (
+            len(word) <= 3
+            or word in self.invariant
+            or not word.isalpha()
+            or word.endswith(("ss", "us", "is"))
+        ):
+            return word
+        if word.endswith("ies") and len(word) > 4:
+            return word[:-3] + "y"
+        if word.endswith(("sses", "xes", "zes", "ches", "shes")):
+            return word[:-2]
+        if word.endswith("s"):
+            return word[:-1]
+        return word
+
+
+def bundled_tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text)
+
+
+def load_bundled_resources() -> NLPResources:
+    with open(BUNDLED_LEXICON_PATH, "r", encoding="utf-8") as f:
+        lexicon = json.load(f)
+    lemmatizer = BundledLemmatizer(lexicon["lemmas"], lexicon["invariant"])
+    return NLPResources(
+        source="bundled",
+        tokenize=bundled_tokenize,
+        lemmatize=lemmatizer.lemmatize,
+        stop_words=frozenset(lexicon["stopwords"]),
+    )
+
+
+def _lookup_summary(error: LookupError) -> str:
+    # NLTK lookup errors are multi-line banners; keep the line naming the resource
+    for line in str(error).splitlines():
+        line = line.strip()
+        if line.startswith("Resource"):
+            return line
+    return str(error).strip()
+
+
+def load_nltk_resources(allow_download: bool = False) -> NLPResources:
+    # Imported here so that importing the NLP modules stays cheap when the
+    # bundled lexicon is used
+    import nltk
+    from nltk.corpus import stopwords
+    from nltk.stem import WordNetLemmatizer
+    from nltk.tokenize import word_tokenize
+
+    lemmatizer = WordNetLemmatizer()
+
+    def probe():
+        # Touch every resource now so a missing corpus fails at startup rather
+        # than on the first user request
+        word_tokenize("probe query")
+        lemmatizer.lemmatize("queries")
+        return frozenset(stopwords.words("english"))
+
+    try:
+        stop_words = probe()
+    except LookupError as e:
+        if not allow_download:
+            raise NLPResourceError(
+                "NLTK resources are missing and downloads are disabled. Install them "
+                f"with `python -m nltk.downloader {' '.join(NLTK_PACKAGES)}` or set "
+                f"NLP_RESOURCES=bundled. ({_lookup_summary(e)})"
+            ) from e
+        for package in NLTK_PACKAGES:
+            nltk.download(package, quiet=True)
+        try:
+            stop_words = probe()
+        except LookupError as e:
+            raise NLPResourceError(
+                f"Could not download NLTK resources ({_lookup_summary(e)})"
+            ) from e
+
+    return NLPResources(
+        source="nltk",
+        tokenize=word_tokenize,
+        lemmatize=lemmatizer.lemmatize,
+        stop_words=stop_words,
+    )
+
+
+def load_nlp_resources(mode: str = "auto", allow_download: bool = False) -> NLPResources:
+    if mode not in RESOURCE_MODES:
+        raise NLPResourceError(
+            f"Unknown NLP resource mode: {mode} (expected one of {', '.join(RESOURCE_MODES)})"
+        )
+
+    if mode == "bundled":
+        return load_bundled_resources()
+
+    try:
+        return load_nltk_resources(allow_download=allow_download)
+    except (NLPResourceError, ImportError) as e:
+        if mode == "nltk":
+            raise
+        logger.warning(f"Falling back to bundled NLP lexicon: {str(e)}")
+        return load_bundled_resources()
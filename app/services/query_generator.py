@@ -1,5 +1,9 @@
-from typing import List, Dict, Tuple, Optional
+from typing import Any, List, Dict, Tuple, Optional
+from dataclasses import dataclass, field
 from enum import Enum
+from app.services.column_profiler import TableProfile
+from app.services.intent_matcher import MONGO_OPERATORS
+from app.services.sql_builder import SQLQuery, SQLQueryBuilder
 import random
 import logging
 
@@ -9,15 +13,36 @@ class DatabaseType(Enum):
     MONGODB = "mongodb"
 
 
+@dataclass
+class _Selection:
+    # Columns and values picked for one generated query
+    columns: List[str] = field(default_factory=list)
+    quantity: Optional[str] = None
+    category: Optional[str] = None
+    n: int = 0
+    operator: Optional[str] = None
+    value: Any = None
+    condition: Optional[str] = None
+    having_condition: Optional[str] = None
+
+
 class QueryGeneratorService:
-    def __init__(self, mysql_manager=None, mongo_manager=None):
+    def __init__(
+        self,
+        mysql_manager=None,
+        mongo_manager=None,
+        db_explorer_service=None,
+        sql_builder: Optional[SQLQueryBuilder] = None,
+    ):
         self.mysql_manager = mysql_manager
         self.mongo_manager = mongo_manager
-        self.query_patterns: List[Tuple[str, Dict[str, str]]] = [
+        self.db_explorer_service = db_explorer_service
+        self.sql_builder = sql_builder or SQLQueryBuilder()
+        self.query_patterns: List[Tuple[str, Dict[str, Any]]] = [
             (
                 "Calculate the total {quantity} grouped by {category}",
                 {
-                    "sql": "SELECT {category}, SUM({quantity}) FROM {table} GROUP BY {category}",
+                    "sql_intent": ("group by with aggregation", "sum"),
                     "mongodb": """[
                         {{ "$group": {{ 
                             "_id": "${category}",
@@ -34,7 +59,7 @@ class QueryGeneratorService:
             (
                 "Find the average {quantity} for each {category}",
                 {
-                    "sql": "SELECT {category}, AVG({quantity}) FROM {table} GROUP BY {category}",
+                    "sql_intent": ("group by with aggregation", "avg"),
                     "mongodb": """[
                         {{ "$group": {{ 
                             "_id": "${category}",
@@ -51,7 +76,7 @@ class QueryGeneratorService:
             (
                 "Count the number of records for each {category}",
                 {
-                    "sql": "SELECT {category}, COUNT(*) as count FROM {table} GROUP BY {category}",
+                    "sql_intent": ("group by with count", None),
                     "mongodb": """[
                         {{ "$group": {{ 
                             "_id": "${category}",
@@ -68,7 +93,7 @@ class QueryGeneratorService:
             (
                 "Show the top {n} records sorted by {quantity} in descending order",
                 {
-                    "sql": "SELECT * FROM {table} ORDER BY {quantity} DESC LIMIT {n}",
+                    "sql_intent": ("order by with limit", None),
                     "mongodb": """[
                         {{ "$sort": {{ "{quantity}": -1 }} }},
                         {{ "$limit": {n} }},
@@ -81,7 +106,7 @@ class QueryGeneratorService:
             (
                 "Filter records where {quantity} is {condition}",
                 {
-                    "sql": "SELECT * FROM {table} WHERE {quantity} {condition}",
+                    "sql_intent": ("where clause", None),
                     "mongodb": """[
                         {{ "$match": {{ "{quantity}": {condition} }} }},
                         {{ "$project": {{
@@ -93,7 +118,7 @@ class QueryGeneratorService:
             (
                 "Group by {category} and filter groups where {quantity} meets {condition}",
                 {
-                    "sql": """SELECT {category}, SUM({quantity}) as total FROM {table} GROUP BY {category} HAVING total {condition}""",
+                    "sql_intent": ("having clause", None),
                     "mongodb": """[
                         {{ "$group": {{ 
                             "_id": "${category}",
@@ -113,7 +138,7 @@ class QueryGeneratorService:
             (
                 "Select specific columns {columns} from {table}",
                 {
-                    "sql": "SELECT {columns} FROM {table}",
+                    "sql_intent": ("select columns", None),
                     "mongodb": """[
                         {{ "$project": {{ 
                             "_id": 0,
@@ -155,22 +180,37 @@ class QueryGeneratorService:
             try:
                 logger.info(f"Processing pattern: {pattern}")
 
-                query = self._fill_query_template(
-                    query_templates[db_type_enum.value],
-                    table_name,
+                intent = query_templates["sql_intent"][0]
+                selection = self._select_values(
                     columns,
-                    db_type_enum,
+                    table_name,
                     database_name,
-                    available_tables,
-                )
-                nl_query = self._fill_nl_template(
-                    pattern, columns, table_name, available_tables
+                    db_type_enum,
+                    intent == "select columns",
+                    intent,
                 )
 
-                if query and nl_query:
-                    queries.append(
-                        {"natural_language": nl_query, f"{db_type}_query": query}
+                sql_query = None
+                if db_type_enum == DatabaseType.SQL:
+                    sql_query = self._build_sql_query(
+                        query_templates["sql_intent"], table_name, selection
                     )
+                    query = sql_query.render() if sql_query else None
+                else:
+                    query = self._fill_query_template(
+                        query_templates[db_type_enum.value],
+                        table_name,
+                        db_type_enum,
+                        selection,
+                    )
+                nl_query = self._fill_nl_template(pattern, table_name, selection)
+
+                if query and nl_query:
+                    entry = {"natural_language": nl_query, f"{db_type}_query": query}
+                    if sql_query is not None:
+                        entry["parameterized_query"] = sql_query.statement
+                        entry["parameters"] = sql_query.parameters
+                    queries.append(entry)
                 else:
                     logger.warning(
                         f"Failed to generate query or nl_query for pattern: {pattern}"
@@ -185,6 +225,25 @@ class QueryGeneratorService:
 
         return queries
 
+    def generate_database_sample_queries(
+        self,
+        db_type: str,
+        database_name: str,
+        available_tables: Dict[str, List[str]],
+        construct: Optional[str] = None,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        return {
+            table_name: self.generate_sample_queries(
+                table_name=table_name,
+                columns=columns,
+                db_type=db_type,
+                database_name=database_name,
+                available_tables=available_tables,
+                construct=construct,
+            )
+            for table_name, columns in sorted(available_tables.items())
+        }
+
     def _filter_patterns_by_construct(
         self, construct: str
     ) -> List[Tuple[str, Dict[str, str]]]:
@@ -239,46 +298,45 @@ class QueryGeneratorService:
         return filtered_patterns
 
     def _get_column_types(
-        self, columns: List[str], table_name: str, database_name: str
+        self,
+        columns: List[str],
+        table_name: str,
+        database_name: str,
+        db_type: DatabaseType = DatabaseType.SQL,
     ) -> Tuple[List[str], List[str]]:
         logger = logging.getLogger(__name__)
 
         try:
-            if hasattr(self, "mysql_manager"):
-                numeric_types = {"int", "decimal", "float", "double", "numeric"}
-                column_info = self.mysql_manager.get_columns(table_name, database_name)
+            if db_type == DatabaseType.SQL and self.mysql_manager is not None:
+                catalog = (
+                    self.db_explorer_service.get_mysql_catalog(database_name)
+                    if self.db_explorer_service is not None
+                    else self.mysql_manager.get_catalog(database_name)
+                )
 
                 numeric_cols = []
                 categorical_cols = []
 
-                for col in column_info:
-                    col_type = str(col["type"]).lower()
-                    if any(num_type in col_type for num_type in numeric_types):
-                        numeric_cols.append(col["name"])
+                for col in catalog.get_table(table_name).columns:
+                    if col.is_numeric:
+                        numeric_cols.append(col.name)
                     else:
-                        categorical_cols.append(col["name"])
-
-            elif hasattr(self, "mongo_manager"):
+                        categorical_cols.append(col.name)
 
-                sample_data = self.mongo_manager.get_sample_data(
-                    table_name, database_name
+            elif self.mongo_manager is not None:
+                schema = (
+                    self.db_explorer_service.get_mongo_schema(table_name, database_name)
+                    if self.db_explorer_service is not None
+                    else self.mongo_manager.get_schema(table_name, database_name)
                 )
-                if sample_data:
-                    numeric_cols = []
-                    categorical_cols = []
-
-                    # Use the first document to infer types
-                    first_doc = sample_data[0]
-                    for col in columns:
-                        if col in first_doc:
-                            value = first_doc[col]
-                            if isinstance(value, (int, float)):
-                                numeric_cols.append(col)
-                            else:
-                                categorical_cols.append(col)
-                else:
+                if not schema.sample_size:
                     logger.warning("No sample data available for type inference")
                     return columns, columns
+
+                numeric_fields = set(schema.numeric_fields())
+                categorical_fields = set(schema.categorical_fields())
+                numeric_cols = [col for col in columns if col in numeric_fields]
+                categorical_cols = [col for col in columns if col in categorical_fields]
             else:
                 logger.warning("No database manager available for type inference")
                 return columns, columns
@@ -294,78 +352,156 @@ class QueryGeneratorService:
         self,
         template: str,
         table_name: str,
-        columns: List[str],
         db_type: DatabaseType,
-        database_name: str,
-        available_tables: Optional[Dict[str, List[str]]] = None,
+        selection: _Selection,
     ) -> Optional[str]:
         try:
             logger = logging.getLogger(__name__)
-            numeric_cols, categorical_cols = self._get_column_types(
-                columns, table_name, database_name
-            )
-            logger.info(
-                f"Numeric columns: {numeric_cols}, Categorical columns: {categorical_cols}"
-            )
-
-            if not numeric_cols:
-                numeric_cols = columns
-            if not categorical_cols:
-                categorical_cols = columns
 
             # Handle specific columns selection pattern
             if "{columns}" in template or "{columns_projection}" in template:
-                selected_columns = random.sample(
-                    columns, min(random.randint(2, 4), len(columns))
-                )
                 if db_type == DatabaseType.SQL:
-                    columns_str = ", ".join(selected_columns)
-                    self.selected_columns = selected_columns
+                    columns_str = ", ".join(selection.columns)
                     return template.format(table=table_name, columns=columns_str)
                 else:  # MongoDB
                     columns_projection = ", ".join(
-                        f'"{col}": 1' for col in selected_columns
+                        f'"{col}": 1' for col in selection.columns
                     )
-                    self.selected_columns = selected_columns
                     return template.format(columns_projection=columns_projection)
 
-            # Handle other patterns
-            self.selected_quantity = random.choice(numeric_cols)
-            self.selected_category = random.choice(categorical_cols)
-            self.selected_n = random.randint(3, 10)
-            self.selected_condition = self._generate_condition(
-                self.selected_quantity, numeric_cols, db_type
-            )
-            self.selected_having_condition = self._generate_having_condition(
-                self.selected_quantity, db_type
-            )
-
             return template.format(
                 table=table_name,
-                category=self.selected_category,
-                quantity=self.selected_quantity,
-                condition=self.selected_condition,
-                n=self.selected_n,
-                having_condition=self.selected_having_condition,
+                category=selection.category,
+                quantity=selection.quantity,
+                condition=selection.condition,
+                n=selection.n,
+                having_condition=selection.having_condition,
             )
         except Exception as e:
             logger.error(f"Error in _fill_query_template: {str(e)}", exc_info=True)
             return None
 
-    def _fill_nl_template(
+    def _build_sql_query(
+        self,
+        sql_intent: Tuple[str, Optional[str]],
+        table_name: str,
+        selection: _Selection,
+    ) -> Optional[SQLQuery]:
+        intent, agg_func = sql_intent
+        try:
+            if intent == "select columns":
+                components = {"columns": selection.columns}
+            else:
+                # The having pattern filters on the same condition the
+                # natural-language text describes
+                components = {
+                    "group_by": selection.category,
+                    "aggregate": selection.quantity,
+                    "agg_func": agg_func,
+                    "order_by": selection.quantity,
+                    "limit": selection.n,
+                    "column": selection.quantity,
+                    "operator": selection.operator,
+                    "value": selection.value,
+                }
+            return self.sql_builder.build(intent, table_name, components)
+        except Exception as e:
+            logging.getLogger(__name__).error(
+                f"Error in _build_sql_query: {str(e)}", exc_info=True
+            )
+            return None
+
+    def _select_values(
         self,
-        template: str,
         columns: List[str],
         table_name: str,
-        available_tables: Optional[Dict[str, List[str]]] = None,
+        database_name: str,
+        db_type: DatabaseType,
+        select_columns: bool,
+        intent: Optional[str] = None,
+    ) -> _Selection:
+        if select_columns:
+            return _Selection(
+                columns=random.sample(columns, min(random.randint(2, 4), len(columns)))
+            )
+
+        logger = logging.getLogger(__name__)
+        profile = self._get_profile(table_name, database_name, db_type)
+        if profile is not None:
+            numeric_cols = profile.measures(columns)
+            categorical_cols = profile.groupings(columns)
+        else:
+            numeric_cols, categorical_cols = self._get_column_types(
+                columns, table_name, database_name, db_type
+            )
+        logger.info(
+            f"Numeric columns: {numeric_cols}, Categorical columns: {categorical_cols}"
+        )
+
+        if not numeric_cols:
+            numeric_cols = columns
+        if not categorical_cols:
+            categorical_cols = columns
+
+        selection = _Selection()
+        selection.quantity = random.choice(numeric_cols)
+        selection.category = random.choice(
+            [col for col in categorical_cols if col != selection.quantity]
+            or categorical_cols
+        )
+        selection.n = random.randint(3, 10)
+        if profile is not None and profile.row_count:
+            selection.n = min(selection.n, profile.row_count)
+
+        threshold = None
+        if profile is not None:
+            threshold = (
+                profile.group_total(selection.quantity, selection.category)
+                if intent == "having clause"
+                else profile.threshold(selection.quantity)
+            )
+        if threshold is not None:
+            selection.operator = random.choice([">", "<", ">=", "<="])
+            selection.value = threshold
+        else:
+            selection.operator, selection.value = self._generate_condition(
+                selection.quantity, numeric_cols
+            )
+        selection.condition = self._format_condition(
+            selection.operator, selection.value, db_type
+        )
+        selection.having_condition = self._format_condition(
+            *self._generate_having_condition(), db_type
+        )
+        return selection
+
+    def _get_profile(
+        self, table_name: str, database_name: str, db_type: DatabaseType
+    ) -> Optional[TableProfile]:
+        if self.db_explorer_service is None or not database_name:
+            return None
+        try:
+            return self.db_explorer_service.get_table_profile(
+                "mysql" if db_type == DatabaseType.SQL else "mongodb",
+                table_name,
+                database_name,
+            )
+        except Exception as e:
+            logging.getLogger(__name__).warning(
+                f"Column profile unavailable for {table_name}, using column types: {e}"
+            )
+            return None
+
+    def _fill_nl_template(
+        self, template: str, table_name: str, selection: _Selection
     ) -> Optional[str]:
         try:
             logger = logging.getLogger(__name__)
 
             # Handle specific columns selection pattern
             if "{columns}" in template:
-                if hasattr(self, "selected_columns"):
-                    columns_str = ", ".join(self.selected_columns)
+                if selection.columns:
+                    columns_str = ", ".join(selection.columns)
                     return template.format(
                         table=table_name,
                         columns=columns_str,
@@ -376,16 +512,13 @@ class QueryGeneratorService:
                 return None
 
             # Format MongoDB condition for natural language display
-            condition = self.selected_condition
+            condition = selection.condition
             if isinstance(condition, str) and condition.startswith("{"):
                 try:
                     # Extract operator and value from MongoDB condition
                     import json
 
-                    condition_dict = json.loads(condition.replace("'", '"'))
-                    operator = list(condition_dict.values())[
-                        0
-                    ]  # Get first operator (e.g., "$lt")
+                    operator = json.loads(condition.replace("'", '"'))
                     value = list(operator.values())[0]  # Get the value
 
                     # Convert MongoDB operators to readable format
@@ -414,9 +547,9 @@ class QueryGeneratorService:
 
             # Use generated conditions and placeholders consistently
             return template.format(
-                category=self.selected_category,
-                quantity=self.selected_quantity,
-                n=self.selected_n,
+                category=selection.category,
+                quantity=selection.quantity,
+                n=selection.n,
                 condition=condition,
             )
         except Exception as e:
@@ -424,40 +557,20 @@ class QueryGeneratorService:
             return None
 
     def _generate_condition(
-        self, column: str, numeric_cols: List[str], db_type: DatabaseType
-    ) -> str:
+        self, column: str, numeric_cols: List[str]
+    ) -> Tuple[str, int]:
         if column in numeric_cols:
-            value = random.randint(1, 100)
             operators = [">", "<", ">=", "<=", "="]
-            op = random.choice(operators)
-
-            if db_type == DatabaseType.MONGODB:
-                mongo_ops = {
-                    ">": "$gt",
-                    "<": "$lt",
-                    ">=": "$gte",
-                    "<=": "$lte",
-                    "=": "$eq",
-                }
-                return f'{{ "{mongo_ops[op]}": {value} }}'
-            return f"{op} {value}"
-        else:
-            value = random.randint(40, 50)
-            if db_type == DatabaseType.MONGODB:
-                return value
-            return f"= {value}"
+            return random.choice(operators), random.randint(1, 100)
+        return "=", random.randint(40, 50)
 
-    def _generate_having_condition(self, column: str, db_type: DatabaseType) -> str:
-        value = random.randint(10, 200)
+    def _generate_having_condition(self) -> Tuple[str, int]:
         operators = [">", "<", ">=", "<="]
-        op = random.choice(operators)
+        return random.choice(operators), random.randint(10, 200)
 
+    def _format_condition(self, op: str, value: int, db_type: DatabaseType) -> str:
+        # SQL conditions are only used for display; the generated statements
+        # bind the value instead
         if db_type == DatabaseType.MONGODB:
-            mongo_ops = {
-                ">": "$gt",
-                "<": "$lt",
-                ">=": "$gte",
-                "<=": "$lte",
-            }
-            return f'{{ "{mongo_ops[op]}": {value} }}'
+            return f'{{ "{MONGO_OPERATORS[op]}": {value} }}'
         return f"{op} {value}"
@@ -0,0 +1,193 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+import json
+import re
+import threading
+import time
+import logging
+from app.services.result_encoder import dumps
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_SQL_TABLE_RE = re.compile(r"\b(?:FROM|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+_SQL_READ_PREFIXES = ("select", "with", "show", "describe", "explain")
+_SQL_DDL_PREFIXES = ("create", "alter", "drop", "truncate", "rename")
+
+
+def normalize_query_text(query: str) -> str:
+    # Whitespace only: case and quoting can be significant inside literals
+    return _WHITESPACE_RE.sub(" ", query.strip()).rstrip(";").strip()
+
+
+def is_read_only_sql(query: str) -> bool:
+    return normalize_query_text(query).lower().startswith(_SQL_READ_PREFIXES)
+
+
+def is_ddl_sql(query: str) -> bool:
+    return normalize_query_text(query).lower().startswith(_SQL_DDL_PREFIXES)
+
+
+def sql_tables(query: str) -> FrozenSet[str]:
+    return frozenset(_SQL_TABLE_RE.findall(query))
+
+
+def pipeline_collections(query: Any) -> FrozenSet[str]:
+    # Collections a Mongo pipeline reads besides its own ($lookup sources)
+    found = set()
+
+    def walk(value):
+        if isinstance(value, dict):
+            lookup = value.get("$lookup")
+            if isinstance(lookup, dict) and isinstance(lookup.get("from"), str):
+                found.add(lookup["from"])
+            for item in value.values():
+                walk(item)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                walk(item)
+
+    walk(query)
+    return frozenset(found)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires: float
+    tables: FrozenSet[Tuple[str, str, str]]
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 60,
+        max_entry_bytes: Optional[int] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_entry_bytes = max_entry_bytes or max_bytes // 8
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        # Bumped on invalidation so a query that was running while its table
+        # was replaced does not store a stale result afterwards
+        self._generations: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.oversized = 0
+
+    def make_key(
+        self,
+        db_type: str,
+        database_name: Optional[str],
+        table_name: str,
+        query: str,
+        parameters: Optional[Dict[str, Any]] = None,
+        variant: Any = None,
+    ) -> Tuple:
+        return (
+            db_type,
+            database_name or "",
+            table_name,
+            normalize_query_text(query),
+            json.dumps(parameters, sort_keys=True, default=str) if parameters else "",
+            variant,
+        )
+
+    def get_or_execute(
+        self,
+        key: Tuple,
+        tables: Iterable[str],
+        loader: Callable[[], Any],
+    ) -> Any:
+        db_type, database_name = key[0], key[1]
+        scopes = frozenset((db_type, database_name, table) for table in tables)
+        watched = scopes | {(db_type, database_name)}
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry.value
+                self._remove(key)
+                self.expirations += 1
+            self.misses += 1
+            generations = {scope: self._generations.get(scope, 0) for scope in watched}
+
+        value = loader()
+        size = len(dumps(value))
+
+        with self._lock:
+            if size > self.max_entry_bytes:
+                self.oversized += 1
+                return value
+            if any(self._generations.get(scope, 0) != gen for scope, gen in generations.items()):
+                return value
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                value, size, time.monotonic() + self.ttl_seconds, scopes
+            )
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def invalidate(self, db_type: str, database_name: str, table_name: Optional[str] = None) -> int:
+        # With no table, drops everything cached for the database
+        database_name = database_name or ""
+        if table_name is not None:
+            scope = (db_type, database_name, table_name)
+        else:
+            scope = (db_type, database_name)
+        with self._lock:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            stale = [
+                k for k, e in self._entries.items()
+                if (scope in e.tables if table_name is not None else k[:2] == scope)
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += 1
+        logger.info(
+            f"Invalidated {len(stale)} cached results for {db_type}/{database_name}"
+            + (f"/{table_name}" if table_name else "")
+        )
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_entry_bytes": self.max_entry_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "oversized": self.oversized,
+            }
+
+    def _remove(self, key: Tuple):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
@@ -0,0 +1,140 @@
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import json
+import math
+from bson import Decimal128, ObjectId
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+
+def encode_value(value: Any) -> Any:
+    # Mirrors MongoManager._handle_non_json_values, plus the scalar types the
+    # MySQL driver returns, in one pass without copying JSON-safe values
+    if value is None or isinstance(value, (str, int)):
+        return value
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+        return value
+    if isinstance(value, dict):
+        return {key: encode_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal128):
+        value = value.to_decimal()
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else str(value)
+    if isinstance(value, (ObjectId, bytes)):
+        return str(value)
+    return str(value)
+
+
+def value_type(value: Any) -> str:
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, (float, Decimal, Decimal128)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "datetime"
+    if isinstance(value, date):
+        return "date"
+    if isinstance(value, dict):
+        return "object"
+    if isinstance(value, (list, tuple)):
+        return "array"
+    if isinstance(value, ObjectId):
+        return "objectId"
+    if isinstance(value, bytes):
+        return "binary"
+    return "string"
+
+
+def encode_columnar(
+    rows: Iterable[Dict],
+    include_types: bool = True,
+    exclude: Sequence[str] = (),
+) -> Dict[str, Any]:
+    columns: List[str] = []
+    index: Dict[str, int] = {}
+    types: List[Optional[str]] = []
+    encoded_rows: List[List[Any]] = []
+    excluded = set(exclude)
+
+    for row in rows:
+        encoded = [None] * len(columns)
+        for key, value in row.items():
+            if key in excluded:
+                continue
+            position = index.get(key)
+            if position is None:
+                # Documents may introduce new fields part way through
+                position = index[key] = len(columns)
+                columns.append(key)
+                types.append(None)
+                encoded.append(None)
+            if value is not None and types[position] is None:
+                types[position] = value_type(value)
+            encoded[position] = encode_value(value)
+        encoded_rows.append(encoded)
+
+    width = len(columns)
+    for encoded in encoded_rows:
+        if len(encoded) < width:
+            encoded.extend([None] * (width - len(encoded)))
+
+    result: Dict[str, Any] = {"columns": columns, "rows": encoded_rows}
+    if include_types:
+        result["column_types"] = [t or "null" for t in types]
+    return result
+
+
+def _finite(value: Any) -> Any:
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(content: Any) -> str:
+    return json.dumps(
+        content,
+        default=encode_value,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        allow_nan=False,
+    )
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=encode_value, option=orjson.OPT_NON_STR_KEYS)
+    try:
+        text = _stdlib_dumps(content)
+    except ValueError:
+        # NaN/Infinity are not JSON; write them as null like orjson does
+        text = _stdlib_dumps(_finite(content))
+    return text.encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    # Returned directly from handlers so FastAPI skips its jsonable_encoder walk
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,228 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional, Tuple
+import operator
+import re
+import threading
+from sqlalchemy import bindparam, column, func, literal_column, select, table
+from sqlalchemy.dialects import mysql
+from sqlalchemy.sql.elements import quoted_name
+
+COMPARISON_OPERATORS = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+
+AGGREGATE_FUNCTIONS = {"sum": func.sum, "avg": func.avg, "min": func.min, "max": func.max}
+
+_PLACEHOLDER_RE = re.compile(r":(\w+)\b")
+
+_BOUND_PARAMETERS = {
+    "order by with limit": {"limit"},
+    "where clause": {"value"},
+    "having clause": {"value"},
+}
+
+
+@dataclass(frozen=True)
+class SQLQuery:
+    statement: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+
+    def render(self) -> str:
+        # Literal form for display; execution binds the parameters instead
+        def literal(match: re.Match) -> str:
+            name = match.group(1)
+            if name not in self.parameters:
+                return match.group(0)
+            value = self.parameters[name]
+            if isinstance(value, str):
+                return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+            return str(value)
+
+        return _PLACEHOLDER_RE.sub(literal, self.statement)
+
+
+def to_number(value: Any):
+    if isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _identifier(name: str):
+    return column(quoted_name(name.strip(), quote=True))
+
+
+def _table(name: str):
+    return table(quoted_name(name, quote=True))
+
+
+class SQLQueryBuilder:
+    # Statements are built as SQLAlchemy Core constructs with identifiers
+    # quoted and values bound, then compiled once per (intent, table, shape)
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.dialect = mysql.dialect(paramstyle="named")
+        self._statements: "OrderedDict[Tuple[Hashable, ...], str]" = OrderedDict()
+        # Reverse index so a generated statement sent back for execution can
+        # be mapped to the intent that produced it
+        self._keys: Dict[str, Tuple[Hashable, ...]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def build(self, intent: str, table_name: str, components: Dict[str, Any]) -> SQLQuery:
+        shape, parameters = self._shape(intent, components)
+        key = (intent, table_name, shape)
+        with self._lock:
+            statement = self._statements.get(key)
+            if statement is not None:
+                self._statements.move_to_end(key)
+                self.hits += 1
+                return SQLQuery(statement, parameters)
+            self.misses += 1
+
+        compiled = self._construct(intent, table_name, shape).compile(dialect=self.dialect)
+        # Values are never inlined, so collapsing whitespace cannot touch a literal
+        statement = " ".join(str(compiled).split())
+        with self._lock:
+            self._statements[key] = statement
+            self._keys[statement] = key
+            while len(self._statements) > self.max_entries:
+                _, evicted = self._statements.popitem(last=False)
+                self._keys.pop(evicted, None)
+        return SQLQuery(statement, parameters)
+
+    def describe(
+        self, statement: str, parameters: Optional[Dict[str, Any]] = None
+    ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        # (intent, table, components) for a statement this builder produced,
+        # or None for anything else
+        with self._lock:
+            key = self._keys.get(" ".join(statement.split()).rstrip(";"))
+        if key is None:
+            return None
+        intent, table_name, shape = key
+        parameters = parameters or {}
+        if set(parameters) != _BOUND_PARAMETERS.get(intent, set()):
+            return None
+        try:
+            values = {name: to_number(value) for name, value in parameters.items()}
+        except (TypeError, ValueError):
+            return None
+
+        if intent == "group by with aggregation":
+            group_by, agg_func, aggregate = shape
+            components = {"group_by": group_by, "agg_func": agg_func, "aggregate": aggregate}
+        elif intent == "group by with count":
+            components = {"group_by": shape[0]}
+        elif intent == "order by with limit":
+            components = {"order_by": shape[0], "limit": int(values["limit"])}
+        elif intent == "where clause":
+            column_name, op = shape
+            components = {"column": column_name, "operator": op, "value": values["value"]}
+        elif intent == "having clause":
+            group_by, aggregate, op = shape
+            components = {
+                "group_by": group_by,
+                "aggregate": aggregate,
+                "operator": op,
+                "value": values["value"],
+            }
+        else:
+            components = {"columns": list(shape)}
+        return intent, table_name, components
+
+    def _shape(self, intent: str, components: Dict[str, Any]):
+        # Split components into the structural part (identifiers, operators)
+        # that selects a statement and the values that are bound at execution
+        if intent == "group by with aggregation":
+            agg_func = components["agg_func"].lower()
+            if agg_func not in AGGREGATE_FUNCTIONS:
+                raise ValueError(f"Unsupported aggregate function: {agg_func}")
+            return (components["group_by"], agg_func, components["aggregate"]), {}
+        if intent == "group by with count":
+            return (components["group_by"],), {}
+        if intent == "order by with limit":
+            return (components["order_by"],), {"limit": int(to_number(components["limit"]))}
+        if intent in ("where clause", "having clause"):
+            op = components["operator"]
+            if op not in COMPARISON_OPERATORS:
+                raise ValueError(f"Unsupported operator: {op}")
+            parameters = {"value": to_number(components["value"])}
+            if intent == "where clause":
+                return (components["column"], op), parameters
+            return (components["group_by"], components["aggregate"], op), parameters
+        if intent == "select columns":
+            columns = components["columns"]
+            if isinstance(columns, str):
+                columns = columns.split(",")
+            return tuple(c.strip() for c in columns if c.strip()), {}
+        raise ValueError(f"Unknown pattern: {intent}")
+
+    def _construct(self, intent: str, table_name: str, shape: Tuple):
+        source = _table(table_name)
+        if intent == "group by with aggregation":
+            group_by, agg_func, aggregate = shape
+            return (
+                select(
+                    _identifier(group_by),
+                    AGGREGATE_FUNCTIONS[agg_func](_identifier(aggregate)).label(
+                        f"{agg_func}_{aggregate}"
+                    ),
+                )
+                .select_from(source)
+                .group_by(_identifier(group_by))
+            )
+        if intent == "group by with count":
+            (group_by,) = shape
+            return (
+                select(_identifier(group_by), func.count().label("count"))
+                .select_from(source)
+                .group_by(_identifier(group_by))
+            )
+        if intent == "order by with limit":
+            (order_by,) = shape
+            return (
+                select(literal_column("*"))
+                .select_from(source)
+                .order_by(_identifier(order_by).desc())
+                .limit(bindparam("limit"))
+            )
+        if intent == "where clause":
+            column_name, op = shape
+            return (
+                select(literal_column("*"))
+                .select_from(source)
+                .where(COMPARISON_OPERATORS[op](_identifier(column_name), bindparam("value")))
+            )
+        if intent == "having clause":
+            group_by, aggregate, op = shape
+            return (
+                select(_identifier(group_by), func.sum(_identifier(aggregate)).label("total"))
+                .select_from(source)
+                .group_by(_identifier(group_by))
+                .having(COMPARISON_OPERATORS[op](literal_column("total"), bindparam("value")))
+            )
+        if intent == "select columns":
+            return select(*(_identifier(c) for c in shape)).select_from(source)
+        raise ValueError(f"Unknown pattern: {intent}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._statements),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
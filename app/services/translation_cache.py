@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import os
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+# Part of every key; bumped when the key format changes so persisted entries
+# made under the old format are never served
+_KEY_VERSION = "2"
+
+
+def normalize_question(question: str) -> str:
+    return _WHITESPACE_RE.sub(" ", question.strip()).rstrip("?.! ")
+
+
+def schema_fingerprint(columns: List[str]) -> str:
+    return hashlib.sha1("\x1f".join(columns).encode("utf-8")).hexdigest()[:16]
+
+
+class TranslationCache:
+    def __init__(self, max_entries: int = 2048, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if persist_path:
+            self.load()
+
+    def make_key(
+        self,
+        question: str,
+        db_type: str,
+        database_name: Optional[str],
+        table_name: str,
+        columns: List[str],
+    ) -> str:
+        # Components are captured case-preserving from the question text (not
+        # its lemmas) and end up as field names and values, which MongoDB
+        # compares case-sensitively, so only whitespace and trailing
+        # punctuation differences may share an entry. The column fingerprint
+        # acts as the schema version and survives restarts.
+        return "\x1e".join(
+            [
+                _KEY_VERSION,
+                db_type,
+                database_name or "",
+                table_name,
+                schema_fingerprint(columns),
+                normalize_question(question),
+            ]
+        )
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "persist_path": self.persist_path,
+            }
+
+    def load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable translation cache {self.persist_path}: {str(e)}")
+            return
+        with self._lock:
+            for key, value in entries[-self.max_entries :]:
+                self._entries[key] = value
+        logger.info(f"Loaded {len(self._entries)} cached translations from {self.persist_path}")
+
+    def save(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = f"{self.persist_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.persist_path)
+        logger.info(f"Saved {len(entries)} cached translations to {self.persist_path}")
@@ -0,0 +1,229 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+import re
+import numpy as np
+import pandas as pd
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Date,
+    DateTime,
+    Float,
+    Integer,
+    Numeric,
+    SmallInteger,
+    String,
+    Text,
+)
+from sqlalchemy.dialects import mysql
+from sqlalchemy.types import TypeEngine
+
+# Signed ranges; unsigned columns turn `a - b` into an out-of-range error
+INTEGER_WIDTHS = (
+    (-(2**7), 2**7 - 1, lambda: SmallInteger().with_variant(mysql.TINYINT(), "mysql")),
+    (-(2**15), 2**15 - 1, SmallInteger),
+    (-(2**23), 2**23 - 1, lambda: Integer().with_variant(mysql.MEDIUMINT(), "mysql")),
+    (-(2**31), 2**31 - 1, Integer),
+    (-(2**63), 2**63 - 1, BigInteger),
+)
+VARCHAR_LENGTHS = (16, 32, 64, 128, 255)
+# Longer than this and a string column is TEXT, off the row
+MAX_VARCHAR_LENGTH = VARCHAR_LENGTHS[-1]
+ENUM_MAX_VALUES = 32
+# An ENUM needs each value to repeat, or it is just a short string column
+ENUM_MIN_ROWS_PER_VALUE = 4
+MAX_DECIMAL_SCALE = 6
+MAX_DECIMAL_PRECISION = 18
+# Longest repr of a float64
+FLOAT_TEXT_LENGTH = 24
+# Only ISO text is typed as a date: MySQL accepts it as-is, also through
+# LOAD DATA, and other layouts are ambiguous (is 03/04 March or April?)
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+DATETIME_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?$")
+
+
+@dataclass(frozen=True)
+class InferredColumn:
+    name: str
+    # "integer", "decimal", "float", "boolean", "date", "datetime", "enum",
+    # "string" or "text"
+    kind: str
+    type: TypeEngine
+
+
+class _ColumnSummary:
+    def __init__(self):
+        self.non_null = 0
+        self.numeric = True
+        self.integral = True
+        self.boolean = True
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+        self.scale = 0
+        self.dates = True
+        self.datetimes = True
+        self.fractional = False
+        self.max_length = 0
+        self.values: Optional[Set[str]] = set()
+
+    def observe(self, series: pd.Series):
+        values = series.dropna()
+        if values.empty:
+            return
+        self.non_null += len(values)
+        if values.dtype == object:
+            # Blanks turn a bool or int column into objects; the rest of
+            # the values still have their own type
+            values = values.infer_objects()
+        kind = values.dtype.kind
+        if kind != "b":
+            self.boolean = False
+        if kind in "biuf":
+            self._observe_numbers(values.to_numpy())
+        else:
+            self.numeric = self.integral = False
+            self._observe_text(values.astype(str))
+
+    def _observe_numbers(self, numbers: np.ndarray):
+        if numbers.dtype.kind == "b":
+            numbers = numbers.astype(np.int64)
+        low, high = numbers.min(), numbers.max()
+        # Only matters if the column ends up as text: room for the longest
+        # rendering, and no ENUM of a mixed column
+        if numbers.dtype.kind == "f":
+            self.max_length = max(self.max_length, FLOAT_TEXT_LENGTH)
+        else:
+            self.max_length = max(self.max_length, len(str(low)), len(str(high)))
+        self.values = None
+        self.dates = self.datetimes = False
+
+        if numbers.dtype.kind == "f":
+            if not np.isfinite(numbers).all():
+                self.numeric = self.integral = False
+                return
+            if self.integral and not (numbers == np.round(numbers)).all():
+                self.integral = False
+            self.scale = max(self.scale, _decimal_scale(numbers))
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def _observe_text(self, text: pd.Series):
+        self.max_length = max(self.max_length, int(text.str.len().max()))
+        if self.values is not None:
+            self.values.update(text.unique().tolist())
+            if len(self.values) > ENUM_MAX_VALUES:
+                self.values = None
+        if self.dates and not _all_parse(text, DATE_PATTERN, "%Y-%m-%d"):
+            self.dates = False
+        if self.datetimes and not _all_parse(text, DATETIME_PATTERN, "ISO8601"):
+            self.datetimes = False
+        if self.datetimes and not self.fractional:
+            self.fractional = bool(text.str.contains(".", regex=False).any())
+
+    def infer(self, name: str) -> InferredColumn:
+        if not self.non_null:
+            return InferredColumn(name, "string", String(MAX_VARCHAR_LENGTH))
+        if self.boolean:
+            return InferredColumn(name, "boolean", Boolean(create_constraint=False))
+        if self.numeric:
+            return self._infer_numeric(name)
+        if self.dates:
+            return InferredColumn(name, "date", Date())
+        if self.datetimes:
+            # MySQL drops fractional seconds unless the column keeps them
+            fsp = 6 if self.fractional else None
+            return InferredColumn(
+                name, "datetime", DateTime().with_variant(mysql.DATETIME(fsp=fsp), "mysql")
+            )
+        if self.max_length > MAX_VARCHAR_LENGTH:
+            return InferredColumn(name, "text", Text())
+        length = next(size for size in VARCHAR_LENGTHS if size >= self.max_length)
+        if self._enumerable():
+            members = sorted(self.values)
+            return InferredColumn(
+                name, "enum", String(length).with_variant(mysql.ENUM(*members), "mysql")
+            )
+        return InferredColumn(name, "string", String(length))
+
+    def _infer_numeric(self, name: str) -> InferredColumn:
+        if self.integral:
+            for low, high, factory in INTEGER_WIDTHS:
+                if low <= self.minimum and self.maximum <= high:
+                    return InferredColumn(name, "integer", factory())
+        digits = len(str(int(max(abs(self.minimum), abs(self.maximum)))))
+        if self.scale <= MAX_DECIMAL_SCALE and digits + self.scale <= MAX_DECIMAL_PRECISION:
+            return InferredColumn(
+                name, "decimal", Numeric(digits + self.scale, self.scale, asdecimal=False)
+            )
+        return InferredColumn(name, "float", Float().with_variant(mysql.DOUBLE(), "mysql"))
+
+    def _enumerable(self) -> bool:
+        if self.values is None or len(self.values) < 2:
+            return False
+        if self.non_null < len(self.values) * ENUM_MIN_ROWS_PER_VALUE:
+            return False
+        # MySQL compares ENUM members case-insensitively and strips trailing
+        # spaces, so such near-duplicates cannot both be members
+        folded = {value.rstrip(" ").casefold() for value in self.values}
+        return len(folded) == len(self.values) and all(value for value in folded)
+
+
+def _decimal_scale(numbers: np.ndarray) -> int:
+    # Fewest decimal places that represent every value, or one more than
+    # MAX_DECIMAL_SCALE when none does
+    for scale in range(MAX_DECIMAL_SCALE + 1):
+        scaled = numbers * 10**scale
+        if np.allclose(scaled, np.round(scaled), rtol=0, atol=1e-6):
+            return scale
+    return MAX_DECIMAL_SCALE + 1
+
+
+def _all_parse(text: pd.Series, pattern: re.Pattern, fmt: str) -> bool:
+    if not text.str.match(pattern).all():
+        return False
+    return not pd.to_datetime(text, format=fmt, errors="coerce").isna().any()
+
+
+class SchemaInferrer:
+    """Narrowest MySQL column types that hold every value seen.
+
+    Fed the whole file chunk by chunk, so the types fit all rows rather
+    than a sample. Integers get the smallest signed width, numbers with a
+    few decimals DECIMAL, ISO dates DATE/DATETIME, strings with a handful of
+    repeated values ENUM and other strings a VARCHAR sized to the longest
+    value. On other dialects the MySQL-only types fall back to their
+    generic equivalents.
+    """
+
+    def __init__(self):
+        self._columns: Dict[str, _ColumnSummary] = {}
+
+    def observe(self, frame: pd.DataFrame):
+        for name in frame.columns:
+            summary = self._columns.get(name)
+            if summary is None:
+                summary = self._columns[name] = _ColumnSummary()
+            summary.observe(frame[name])
+
+    def finish(self) -> List[InferredColumn]:
+        return [summary.infer(name) for name, summary in self._columns.items()]
+
+
+def convert_chunk(chunk: pd.DataFrame, columns: List[InferredColumn]) -> pd.DataFrame:
+    # Values as the column types bind them: whole numbers as ints rather than
+    # floats, dates as date/datetime objects rather than strings
+    converted = {}
+    for column in columns:
+        series = chunk[column.name]
+        if column.kind == "integer" and series.dtype.kind == "f":
+            converted[column.name] = series.astype("Int64")
+        elif column.kind == "date":
+            converted[column.name] = pd.to_datetime(series, format="%Y-%m-%d").dt.date
+        elif column.kind == "datetime":
+            parsed = pd.to_datetime(series, format="ISO8601")
+            converted[column.name] = pd.Series(
+                parsed.dt.to_pydatetime(), index=series.index, dtype=object
+            )
+    if not converted:
+        return chunk
+    return chunk.assign(**converted)
@@ -0,0 +1,96 @@
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Endpoints whose requests make up the query workload
+RECORDED_PATHS = frozenset(
+    {"/natural-language-query", "/execute-query", "/sample-queries"}
+)
+# Bodies larger than this are recorded without the body
+MAX_BODY_BYTES = 64 * 1024
+
+
+class WorkloadRecorder:
+    """Append-only JSON Lines log of workload requests and their timings.
+
+    One compact object per request: ``ts`` (epoch seconds), ``method``,
+    ``path``, ``params`` and ``body`` (as sent), ``status`` and ``ms``
+    (server-side latency). The file is flushed at most every
+    ``flush_seconds``; once it passes ``max_bytes`` it is moved to
+    ``<path>.1`` and a new one is started.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 64 * 1024 * 1024, flush_seconds: float = 1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._flushed = time.monotonic()
+        self.recorded = 0
+
+    def wants(self, path: str) -> bool:
+        return path in RECORDED_PATHS
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, Any],
+        body: bytes,
+        status: int,
+        seconds: float,
+        started: Optional[float] = None,
+    ):
+        entry: Dict[str, Any] = {
+            "ts": round(started if started is not None else time.time(), 3),
+            "method": method,
+            "path": path,
+        }
+        if params:
+            entry["params"] = params
+        if body and len(body) <= MAX_BODY_BYTES:
+            try:
+                entry["body"] = json.loads(body)
+            except ValueError:
+                entry["body_text"] = body.decode("utf-8", errors="replace")
+        entry["status"] = status
+        entry["ms"] = round(seconds * 1000, 3)
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self._size += len(line)
+            self.recorded += 1
+            now = time.monotonic()
+            if now - self._flushed >= self.flush_seconds:
+                self._file.flush()
+                self._flushed = now
+            if self._size >= self.max_bytes:
+                self._rotate()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rotate(self):
+        self._file.close()
+        try:
+            os.replace(self.path, self.path + ".1")
+        except OSError as e:
+            logger.warning(f"Could not rotate workload log {self.path}: {str(e)}")
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+        self._flushed = time.monotonic()
@@ -0,0 +1,119 @@
+"""Mongo ingest benchmark over the bundled sample files.
+
+Compares whole-file ``json.load`` against the streaming parser used by
+``JSONIngestPipeline`` (wall time and peak Python heap), and optionally
+loads the files into a live MongoDB with different batch sizes and
+worker counts.
+
+    python -m benchmarks.ingest_benchmark
+    python -m benchmarks.ingest_benchmark --mongo-uri mongodb://localhost:27017
+"""
+import argparse
+import glob
+import json
+import os
+import time
+import tracemalloc
+
+from app.services.json_ingest import JSONIngestPipeline, iter_json_records
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "sample", "mongodb")
+
+
+def measure(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def bench_parse(path: str):
+    def load_whole():
+        with open(path) as f:
+            return len(json.load(f))
+
+    def load_streaming():
+        return sum(1 for _ in iter_json_records(path))
+
+    rows = []
+    for name, fn in (("json.load", load_whole), ("streaming", load_streaming)):
+        count, elapsed, peak = measure(fn)
+        rows.append(
+            {
+                "file": os.path.basename(path),
+                "parser": name,
+                "records": count,
+                "seconds": round(elapsed, 4),
+                "records_per_sec": round(count / elapsed, 1),
+                "peak_mb": round(peak / 1024 / 1024, 2),
+            }
+        )
+    return rows
+
+
+def bench_mongo(path: str, mongo_uri: str, database_name: str, batch_sizes, workers):
+    from app.database.mongo_manager import MongoManager
+
+    manager = MongoManager(mongo_uri)
+    collection_name = os.path.splitext(os.path.basename(path))[0]
+    rows = []
+    for batch_size in batch_sizes:
+        for worker_count in workers:
+            pipeline = JSONIngestPipeline(manager, batch_size=batch_size, workers=worker_count)
+            result = pipeline.ingest(path, collection_name, database_name)
+            rows.append(
+                {
+                    "file": os.path.basename(path),
+                    "batch_size": batch_size,
+                    "workers": worker_count,
+                    "records": result["row_count"],
+                    "seconds": result["elapsed_seconds"],
+                    "records_per_sec": result["rows_per_sec"],
+                }
+            )
+    manager.client.drop_database(database_name)
+    return rows
+
+
+def print_rows(rows):
+    if not rows:
+        return
+    headers = list(rows[0])
+    print("  ".join(f"{h:>16}" for h in headers))
+    for row in rows:
+        print("  ".join(f"{str(row[h]):>16}" for h in headers))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", nargs="*", default=sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.json"))))
+    parser.add_argument("--mongo-uri")
+    parser.add_argument("--database", default="chatdb_ingest_benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[100, 1000])
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 4])
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {"parse": [], "mongo": []}
+    for path in args.files:
+        results["parse"].extend(bench_parse(path))
+    print_rows(results["parse"])
+
+    if args.mongo_uri:
+        for path in args.files:
+            results["mongo"].extend(
+                bench_mongo(path, args.mongo_uri, args.database, args.batch_sizes, args.workers)
+            )
+        print_rows(results["mongo"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Per-query NL translation latency: legacy regex loop vs compiled matcher.
+
+The legacy path reproduces the original ``NLPProcessor`` behaviour: every
+raw pattern string is passed to ``re.search`` with an INFO log per attempt,
+and the matched intent's patterns are searched again to extract components.
+The compiled path uses ``IntentMatcher`` (precompiled patterns, keyword
+prefilter, one call for intent and components).
+
+    python -m benchmarks.nlp_benchmark [--iterations 2000] [--output results.json]
+"""
+import argparse
+import io
+import json
+import logging
+import re
+import statistics
+import time
+
+from app.services.intent_matcher import IntentMatcher
+from app.services.nlp_processor import QUERY_PATTERNS
+
+QUERIES = [
+    "What is the total price by category",
+    "Show the average rating per merchant_name",
+    "count products by origin_country",
+    "how many users for each subscription_plan",
+    "top 10 products sorted by units_sold",
+    "order by rating limit 5",
+    "find products where price > 20",
+    "users with age greater than 30",
+    "group by product_color having total units_sold > 1000",
+    "select columns title, price, rating",
+    "tell me something interesting",
+    "list everything",
+]
+
+legacy_logger = logging.getLogger("benchmarks.legacy_nlp")
+
+
+def legacy_translate(query: str):
+    processed = query.lower()
+    legacy_logger.info(f"Attempting to match query: {processed}")
+    intent = None
+    for pattern_name, pattern_info in QUERY_PATTERNS.items():
+        for pattern in pattern_info["patterns"]:
+            legacy_logger.info(f"Trying pattern {pattern_name}: {pattern}")
+            if re.search(pattern, processed, re.IGNORECASE):
+                intent = pattern_name
+                break
+        if intent:
+            break
+    if intent is None:
+        return None
+    for pattern in QUERY_PATTERNS[intent]["patterns"]:
+        match = re.search(pattern, query, re.IGNORECASE)
+        if match:
+            legacy_logger.info(f"Found match with pattern: {pattern}")
+            return intent, match.groups()
+    return intent, ()
+
+
+def compiled_translate(matcher: IntentMatcher, query: str):
+    return matcher.match(query.lower(), query)
+
+
+def run(fn, iterations: int):
+    latencies = []
+    for _ in range(iterations):
+        for query in QUERIES:
+            started = time.perf_counter_ns()
+            fn(query)
+            latencies.append(time.perf_counter_ns() - started)
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "mean_us": round(statistics.fmean(latencies) / 1000, 2),
+        "p50_us": round(latencies[len(latencies) // 2] / 1000, 2),
+        "p99_us": round(latencies[int(len(latencies) * 0.99)] / 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    # Emit log records as a deployed worker would, but into a throwaway stream
+    for name in ("benchmarks.legacy_nlp", "app.services.intent_matcher"):
+        log = logging.getLogger(name)
+        log.setLevel(logging.INFO)
+        log.addHandler(logging.StreamHandler(io.StringIO()))
+        log.propagate = False
+
+    matcher = IntentMatcher(QUERY_PATTERNS)
+    for query in QUERIES:
+        legacy = legacy_translate(query)
+        compiled = compiled_translate(matcher, query)
+        assert (legacy is None) == (compiled is None), query
+        if compiled is not None:
+            assert legacy[0] == compiled.intent, query
+
+    results = {
+        "legacy": run(legacy_translate, args.iterations),
+        "compiled": run(lambda q: compiled_translate(matcher, q), args.iterations),
+    }
+    results["speedup"] = round(results["legacy"]["mean_us"] / results["compiled"]["mean_us"], 2)
+
+    for name in ("legacy", "compiled"):
+        print(f"{name:>10}: " + ", ".join(f"{k}={v}" for k, v in results[name].items()))
+    print(f"{'speedup':>10}: {results['speedup']}x")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Replay a recorded workload against a running API.
+
+Reads the JSON Lines log written with ``WORKLOAD_RECORD_PATH`` set (see
+``app.services.workload_recorder``) and sends the requests again with
+asyncio, at most ``--concurrency`` in flight:
+
+* ``--rate N`` sends N requests per second on a fixed schedule
+* ``--speed F`` keeps the recorded gaps between requests, F times faster
+* neither sends as fast as the concurrency limit allows
+
+With a schedule, latency is measured from when a request was due rather
+than when it was sent, so queueing behind the concurrency limit counts.
+Reports throughput, latency percentiles and error rates overall and per
+endpoint; requests whose status differs from the recorded one are counted
+as mismatches. Needs ``httpx``.
+
+    python -m benchmarks.replay workload.jsonl [--base-url http://localhost:8000]
+        [--concurrency 16] [--rate 50 | --speed 2] [--loops 1] [--output replay.json]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+
+
+def load_entries(paths, endpoints=None):
+    entries = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A partly written last line
+                    continue
+                if endpoints and entry.get("path") not in endpoints:
+                    continue
+                entries.append(entry)
+    entries.sort(key=lambda entry: entry.get("ts", 0))
+    return entries
+
+
+def schedule(entries, loops: int, rate: float = 0, speed: float = 0):
+    # (seconds after start the request is due, entry); None when unpaced
+    if not entries:
+        return []
+    first = entries[0].get("ts", 0)
+    span = entries[-1].get("ts", 0) - first
+    # Keep a recorded gap between loops
+    span += span / len(entries)
+    plan = []
+    for loop in range(loops):
+        for entry in entries:
+            if rate > 0:
+                due = len(plan) / rate
+            elif speed > 0:
+                due = (loop * span + entry.get("ts", 0) - first) / speed
+            else:
+                due = None
+            plan.append((due, entry))
+    return plan
+
+
+async def send(client, entry, timeout: float):
+    return await client.request(
+        entry.get("method", "GET"),
+        entry["path"],
+        params=entry.get("params"),
+        json=entry.get("body"),
+        timeout=timeout,
+    )
+
+
+async def replay(client, plan, concurrency: int, timeout: float = 60):
+    # One result per request: (entry, status or None, latency seconds, error)
+    results = []
+    slots = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    async def run(due, entry):
+        begin = loop.time()
+        try:
+            response = await send(client, entry, timeout)
+            end = loop.time()
+            status, error = response.status_code, None
+            if status >= 500:
+                error = f"HTTP {status}"
+        except Exception as e:
+            end = loop.time()
+            status, error = None, type(e).__name__
+        finally:
+            slots.release()
+        measured_from = started + due if due is not None else begin
+        results.append((entry, status, end - measured_from, error))
+
+    tasks = []
+    for due, entry in plan:
+        if due is not None:
+            delay = started + due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await slots.acquire()
+        tasks.append(asyncio.create_task(run(due, entry)))
+    await asyncio.gather(*tasks)
+    return results, loop.time() - started
+
+
+def summarize(results, elapsed: float, **extra):
+    latencies = sorted(latency for _, _, latency, _ in results)
+    count = len(latencies)
+    if not count:
+        return {**extra, "count": 0}
+
+    def percentile(p):
+        return round(latencies[min(count - 1, int(count * p))] * 1000, 3)
+
+    errors = sum(1 for _, _, _, error in results if error)
+    client_errors = sum(1 for _, status, _, _ in results if status and 400 <= status < 500)
+    mismatches = sum(
+        1
+        for entry, status, _, _ in results
+        if "status" in entry and status is not None and status != entry["status"]
+    )
+    return {
+        **extra,
+        "count": count,
+        "per_sec": round(count / elapsed, 1) if elapsed > 0 else None,
+        "mean_ms": round(sum(latencies) / count * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "error_rate": round(errors / count, 4),
+        "4xx_rate": round(client_errors / count, 4),
+        "mismatches": mismatches,
+    }
+
+
+def report(results, elapsed: float):
+    rows = [summarize(results, elapsed, endpoint="all")]
+    for path in sorted({entry["path"] for entry, _, _, _ in results}):
+        rows.append(
+            summarize([r for r in results if r[0]["path"] == path], elapsed, endpoint=path)
+        )
+    return rows
+
+
+def print_rows(title, rows):
+    if not rows:
+        return
+    print(title)
+    headers = list(rows[0])
+    widths = [max(12, *(len(str(row.get(h))) for row in rows)) for h in headers]
+    print("  ".join(f"{h:>{w}}" for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(f"{str(row.get(h)):>{w}}" for h, w in zip(headers, widths)))
+    print()
+
+
+async def replay_logs(args, entries):
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("benchmarks.replay needs httpx: pip install httpx")
+
+    plan = schedule(entries, args.loops, args.rate, args.speed)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits) as client:
+        return await replay(client, plan, args.concurrency, args.timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("logs", nargs="+", help="workload JSON Lines files")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=16)
+    pacing = parser.add_mutually_exclusive_group()
+    pacing.add_argument("--rate", type=float, default=0, help="requests per second")
+    pacing.add_argument(
+        "--speed", type=float, default=0, help="replay the recorded timing this many times faster"
+    )
+    parser.add_argument("--loops", type=int, default=1)
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        dest="endpoints",
+        help="only replay this path (repeatable)",
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    entries = load_entries(args.logs, args.endpoints)
+    if not entries:
+        sys.exit("No recorded requests to replay")
+    results, elapsed = asyncio.run(replay_logs(args, entries))
+
+    rows = report(results, elapsed)
+    print_rows(f"replay ({len(results)} requests in {elapsed:.2f}s)", rows)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {
+                    "environment": {
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "base_url": args.base_url,
+                        "logs": args.logs,
+                        "concurrency": args.concurrency,
+                        "rate": args.rate,
+                        "speed": args.speed,
+                        "loops": args.loops,
+                    },
+                    "elapsed_s": round(elapsed, 3),
+                    "results": rows,
+                },
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
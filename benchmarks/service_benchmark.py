@@ -0,0 +1,384 @@
+"""End-to-end service benchmark against in-process database stand-ins.
+
+Loads ``app/sample/mysql/*.csv`` into SQLite behind the ``MySQLManager``
+interface and ``app/sample/mongodb/*.json`` into an in-process Mongo store
+(see ``benchmarks.standins``), then measures with the same service objects
+the API wires together:
+
+* upload ingest (``DataUploadService``)
+* sample-query generation (``QueryGeneratorService``)
+* NL translation (parse plus query generation)
+* query execution and response serialization, with the result cache bypassed
+
+Latencies are reported as mean/p50/p95/p99 in milliseconds. ``--output``
+writes the results as JSON for regression tracking.
+
+    python -m benchmarks.service_benchmark [--iterations 20] [--output results.json]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+
+from app.database.mongo_pipeline import MongoQueryCompiler
+from app.services.data_catalog import ColumnCatalog
+from app.services.data_upload import DataUploadService
+from app.services.db_explorer import DBExplorerService, SchemaCache
+from app.services.memory_engine import InMemoryEngine
+from app.services.nlp_processor import get_nlp_processor
+from app.services.query_generator import DatabaseType, QueryGeneratorService
+from app.services.result_cache import ResultCache
+from app.services.result_encoder import dumps, encode_columnar
+from app.services.sql_builder import SQLQueryBuilder
+from benchmarks.standins import MemoryMongoManager, SQLiteMySQLManager
+
+SAMPLE_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "sample")
+
+# Phrasings the intent patterns understand, filled per table
+NL_TEMPLATES = [
+    "What is the total {quantity} by {category}",
+    "Show the average {quantity} per {category}",
+    "count {quantity} by {category}",
+    "top 5 records sorted by {quantity}",
+    "find records where {quantity} > 20",
+    "group by {category} having total {quantity} > 100",
+    "select columns {category}, {quantity}",
+    "tell me something interesting",
+]
+
+
+def summarize(latencies, **extra):
+    latencies = sorted(latencies)
+    count = len(latencies)
+    if not count:
+        return {**extra, "count": 0}
+
+    def percentile(p):
+        return round(latencies[min(count - 1, int(count * p))] * 1000, 3)
+
+    total = sum(latencies)
+    return {
+        **extra,
+        "count": count,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "per_sec": round(count / total, 1) if total > 0 else None,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+class Harness:
+    def __init__(
+        self,
+        database_name: str,
+        nlp_resources: str,
+        memory_engine: bool = False,
+        column_stats: bool = True,
+    ):
+        self.database_name = database_name
+        self.mysql_manager = SQLiteMySQLManager()
+        self.mongo_manager = MemoryMongoManager()
+        self.schema_cache = SchemaCache()
+        self.memory_engine = (
+            InMemoryEngine(self.mysql_manager, self.mongo_manager) if memory_engine else None
+        )
+        self.column_catalog = (
+            ColumnCatalog(self.mysql_manager, self.mongo_manager) if column_stats else None
+        )
+        self.upload = DataUploadService(
+            self.mysql_manager,
+            self.mongo_manager,
+            self.schema_cache,
+            ResultCache(),
+            self.memory_engine,
+            self.column_catalog,
+            use_load_data=False,
+        )
+        self.explorer = DBExplorerService(
+            self.mysql_manager,
+            self.mongo_manager,
+            self.schema_cache,
+            column_catalog=self.column_catalog,
+        )
+        self.sql_builder = SQLQueryBuilder()
+        self.generator = QueryGeneratorService(
+            self.mysql_manager, self.mongo_manager, self.explorer, self.sql_builder
+        )
+        self.nlp = get_nlp_processor(nlp_resources)
+        self.mongo_compiler = MongoQueryCompiler()
+
+    def tables(self):
+        for db_type in ("mysql", "mongodb"):
+            available = self.explorer.get_all_tables_and_columns(db_type, self.database_name)
+            for table_name, columns in sorted(available.items()):
+                yield db_type, table_name, columns, available
+
+    def ingest(self, files, runs: int):
+        rows = []
+        for path in files:
+            table_name = os.path.splitext(os.path.basename(path))[0]
+            db_type = "mysql" if path.endswith(".csv") else "mongodb"
+            upload = (
+                self.upload.upload_to_mysql if db_type == "mysql" else self.upload.upload_to_mongo
+            )
+            latencies, row_count = [], 0
+            for _ in range(runs):
+                result, elapsed = timed(upload, path, table_name, self.database_name)
+                latencies.append(elapsed)
+                row_count = result["row_count"]
+            summary = summarize(latencies, db_type=db_type, table=table_name, rows=row_count)
+            summary["rows_per_sec"] = round(row_count / statistics.fmean(latencies), 1)
+            rows.append(summary)
+        return rows
+
+    def sample_queries(self, iterations: int):
+        rows, generated = [], {}
+        for db_type, table_name, columns, available in self.tables():
+            latencies = []
+            for _ in range(iterations):
+                queries, elapsed = timed(
+                    self.generator.generate_sample_queries,
+                    table_name=table_name,
+                    columns=columns,
+                    db_type=db_type,
+                    database_name=self.database_name,
+                    available_tables=available,
+                )
+                latencies.append(elapsed)
+                generated.setdefault((db_type, table_name), []).extend(queries)
+            rows.append(summarize(latencies, db_type=db_type, table=table_name))
+        return rows, generated
+
+    def translate(self, query: str, db_type: str, table_name: str, columns):
+        parsed = self.nlp.parse(query)
+        if not parsed.intent:
+            return None
+        try:
+            if db_type == "mysql":
+                return self.sql_builder.build(parsed.intent, table_name, parsed.components)
+            return self.nlp.generate_query(parsed, table_name, columns, db_type)
+        except ValueError:
+            return None
+
+    def nl_translation(self, iterations: int, generated):
+        rows = []
+        for db_type, table_name, columns, _ in self.tables():
+            numeric, categorical = self.generator._get_column_types(
+                columns,
+                table_name,
+                self.database_name,
+                DatabaseType.SQL if db_type == "mysql" else DatabaseType.MONGODB,
+            )
+            fill = {
+                "quantity": (numeric or columns)[0],
+                "category": (categorical or columns)[0],
+            }
+            queries = [template.format(**fill) for template in NL_TEMPLATES]
+            queries += [q["natural_language"] for q in generated.get((db_type, table_name), [])][:20]
+
+            latencies, translated = [], 0
+            for _ in range(iterations):
+                for query in queries:
+                    result, elapsed = timed(self.translate, query, db_type, table_name, columns)
+                    latencies.append(elapsed)
+                    translated += result is not None
+            summary = summarize(latencies, db_type=db_type, table=table_name)
+            summary["translated_ratio"] = round(translated / len(latencies), 3)
+            rows.append(summary)
+        return rows
+
+    def execute(self, iterations: int, generated, result_format: str):
+        rows = []
+        for (db_type, table_name), queries in sorted(generated.items()):
+            # Each distinct generated query once per iteration
+            distinct = list({json.dumps(q, sort_keys=True, default=str): q for q in queries}.values())
+            execute_latencies, serialize_latencies = [], []
+            row_count = byte_count = errors = 0
+            for _ in range(iterations):
+                for entry in distinct:
+                    try:
+                        result, elapsed = timed(self._run_query, db_type, table_name, entry)
+                    except Exception:
+                        errors += 1
+                        continue
+                    execute_latencies.append(elapsed)
+                    if result_format == "columnar":
+                        exclude = ("_id",) if db_type == "mongodb" else ()
+                        body, elapsed = timed(
+                            lambda: dumps(encode_columnar(result, exclude=exclude))
+                        )
+                    else:
+                        body, elapsed = timed(dumps, {"result": result})
+                    serialize_latencies.append(elapsed)
+                    row_count += len(result)
+                    byte_count += len(body)
+            rows.append(
+                {
+                    "db_type": db_type,
+                    "table": table_name,
+                    "queries": len(distinct),
+                    "errors": errors,
+                    "rows": row_count,
+                    "bytes": byte_count,
+                    "execute": summarize(execute_latencies),
+                    "serialize": summarize(serialize_latencies),
+                    "end_to_end": summarize(
+                        [e + s for e, s in zip(execute_latencies, serialize_latencies)]
+                    ),
+                }
+            )
+        return rows
+
+    def _run_query(self, db_type: str, table_name: str, entry):
+        rows = self._run_in_memory(db_type, table_name, entry)
+        if rows is not None:
+            return rows
+        if db_type == "mysql":
+            return self.mysql_manager.execute_query(
+                entry.get("parameterized_query", entry["mysql_query"]),
+                self.database_name,
+                entry.get("parameters"),
+            )
+        compiled = self.mongo_compiler.compile(entry["mongodb_query"])
+        return self.mongo_manager.execute_query(
+            table_name, compiled.query, self.database_name, clean=False
+        )
+
+    def _run_in_memory(self, db_type: str, table_name: str, entry):
+        # Mirrors the routing in app.api.routes._execute_in_memory
+        if self.memory_engine is None:
+            return None
+        if db_type == "mongodb":
+            compiled = self.mongo_compiler.compile(entry["mongodb_query"])
+            return self.memory_engine.execute_pipeline(
+                self.database_name, table_name, compiled.query
+            )
+        plan = self.sql_builder.describe(
+            entry.get("parameterized_query", entry["mysql_query"]), entry.get("parameters")
+        )
+        if plan is None:
+            return None
+        intent, plan_table, components = plan
+        return self.memory_engine.execute_intent(
+            "mysql", self.database_name, plan_table, intent, components
+        )
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_rows(title, rows):
+    if not rows:
+        return
+    print(title)
+    headers = [h for h in rows[0] if not isinstance(rows[0][h], dict)]
+    print("  ".join(f"{h:>12}" for h in headers))
+    for row in rows:
+        print("  ".join(f"{str(row.get(h)):>12}" for h in headers))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--files",
+        nargs="*",
+        default=sorted(glob.glob(os.path.join(SAMPLE_DIR, "mysql", "*.csv")))
+        + sorted(glob.glob(os.path.join(SAMPLE_DIR, "mongodb", "*.json"))),
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--ingest-runs", type=int, default=3)
+    parser.add_argument("--format", choices=("rows", "columnar"), default="rows")
+    parser.add_argument("--nlp-resources", default="bundled")
+    parser.add_argument(
+        "--memory-engine",
+        action="store_true",
+        help="answer generated queries from the in-memory engine where it can",
+    )
+    parser.add_argument(
+        "--no-column-stats",
+        action="store_true",
+        help="skip upload-time column statistics (profiles scan the tables instead)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", default="chatdb_benchmark")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    # The services log every generated query at INFO
+    logging.disable(logging.INFO)
+    random.seed(args.seed)
+
+    harness = Harness(
+        args.database, args.nlp_resources, args.memory_engine, not args.no_column_stats
+    )
+    results = {
+        "environment": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backends": {"mysql": "sqlite (in-memory)", "mongodb": "in-process stand-in"},
+            "iterations": args.iterations,
+            "ingest_runs": args.ingest_runs,
+            "format": args.format,
+            "memory_engine": args.memory_engine,
+            "column_stats": not args.no_column_stats,
+            "nlp_resources": harness.nlp.resources.source,
+            "seed": args.seed,
+        }
+    }
+
+    results["ingest"] = harness.ingest(args.files, args.ingest_runs)
+    print_rows("ingest", results["ingest"])
+
+    results["sample_queries"], generated = harness.sample_queries(args.iterations)
+    print_rows("sample_queries", results["sample_queries"])
+
+    results["nl_translation"] = harness.nl_translation(args.iterations, generated)
+    print_rows("nl_translation", results["nl_translation"])
+
+    results["execute"] = harness.execute(args.iterations, generated, args.format)
+    print_rows(
+        "execute (end to end)",
+        [
+            {**{k: v for k, v in row.items() if not isinstance(v, dict)}, **row["end_to_end"]}
+            for row in results["execute"]
+        ],
+    )
+
+    if harness.memory_engine is not None:
+        results["memory_engine"] = harness.memory_engine.stats()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
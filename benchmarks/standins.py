@@ -0,0 +1,443 @@
+"""In-process stand-ins for MySQL and MongoDB used by the offline benchmarks.
+
+``SQLiteMySQLManager`` keeps one in-memory SQLite database per database name
+behind the ``MySQLManager`` interface. ``MemoryMongoManager`` swaps the
+pymongo client for ``MemoryMongoClient``, which implements the subset of the
+collection API the services use (``insert_many``, ``find``, ``aggregate`` with
+the stages the query generator and schema inference emit).
+
+Absolute numbers are not comparable with a real server; they are meant for
+tracking regressions in the service code between runs on the same machine.
+"""
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import random
+import threading
+
+from bson import ObjectId
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database.engine_registry import pool_status
+from app.database.mongo_manager import MongoManager
+from app.database.mongo_schema import MongoSchemaInferer
+from app.database.mysql_catalog import ColumnInfo, IndexInfo, MySQLCatalog, TableInfo
+from app.database.mysql_manager import MySQLManager
+
+
+class SQLiteMySQLManager(MySQLManager):
+    def __init__(self):
+        self.base_connection_string = "sqlite://"
+        self.local_infile = False
+        self._engines: Dict[str, Engine] = {}
+        self._lock = threading.Lock()
+
+    def get_engine(self, database_name: str) -> Engine:
+        if not database_name:
+            raise ValueError("Database name is required")
+        with self._lock:
+            engine = self._engines.get(database_name)
+            if engine is None:
+                # A single shared connection keeps the in-memory database alive
+                engine = self._engines[database_name] = create_engine(
+                    "sqlite://",
+                    poolclass=StaticPool,
+                    connect_args={"check_same_thread": False},
+                )
+            return engine
+
+    def get_session(self, database_name: str):
+        return sessionmaker(bind=self.get_engine(database_name))()
+
+    def get_catalog(self, database_name: str) -> MySQLCatalog:
+        # SQLite has no information_schema, so build the catalog from the inspector
+        inspector = inspect(self.get_engine(database_name))
+        catalog = MySQLCatalog(database_name)
+        for table_name in inspector.get_table_names():
+            table = catalog.tables[table_name] = TableInfo(table_name)
+            for col in inspector.get_columns(table_name):
+                type_name = str(col["type"]).lower()
+                table.columns.append(
+                    ColumnInfo(
+                        name=col["name"],
+                        type=type_name,
+                        data_type=type_name.split("(")[0],
+                        nullable=bool(col["nullable"]),
+                        default=col.get("default"),
+                    )
+                )
+            for index in inspector.get_indexes(table_name):
+                table.indexes[index["name"]] = IndexInfo(
+                    index["name"], bool(index["unique"]), list(index["column_names"])
+                )
+        return catalog
+
+    def create_database_if_not_exists(self, database_name: str):
+        self.get_engine(database_name)
+
+    def engine_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            engines = dict(self._engines)
+        return {
+            "engines": len(engines),
+            "databases": {name: pool_status(engine) for name, engine in engines.items()},
+        }
+
+    def dispose(self):
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
+
+
+_MISSING = object()
+
+
+def _get_path(doc: Any, path: str) -> Any:
+    value = doc
+    for part in path.split("."):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return _MISSING
+    return value
+
+
+def _evaluate(expr: Any, doc: Dict[str, Any]) -> Any:
+    if isinstance(expr, str) and expr.startswith("$"):
+        value = _get_path(doc, expr[1:])
+        return None if value is _MISSING else value
+    if isinstance(expr, dict):
+        return {key: _evaluate(value, doc) for key, value in expr.items()}
+    return expr
+
+
+def _sort_key(value: Any):
+    # BSON comparison order for the types found in the samples
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (4, value)
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, str(value))
+
+
+def _compare(op: str, value: Any, operand: Any) -> bool:
+    if op == "$eq":
+        return value == operand or (isinstance(value, list) and operand in value)
+    if op == "$ne":
+        return not _compare("$eq", value, operand)
+    if op == "$in":
+        return any(_compare("$eq", value, item) for item in operand)
+    if op == "$nin":
+        return not _compare("$in", value, operand)
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+    except TypeError:
+        # Mongo only compares values of the same type bracket
+        return False
+    raise NotImplementedError(f"Query operator {op} is not supported by the stand-in")
+
+
+def _matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$and":
+            if not all(_matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$nor":
+            if any(_matches(doc, sub) for sub in condition):
+                return False
+        else:
+            value = _get_path(doc, key)
+            if isinstance(condition, dict) and condition and all(
+                op.startswith("$") for op in condition
+            ):
+                if not all(_compare(op, value, operand) for op, operand in condition.items()):
+                    return False
+            elif not _compare("$eq", None if value is _MISSING else value, condition):
+                return False
+    return True
+
+
+def _numbers(values: Iterable[Any]) -> List[float]:
+    return [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+
+
+ACCUMULATORS: Dict[str, Callable[[List[Any]], Any]] = {
+    "$sum": lambda values: sum(_numbers(values)),
+    "$avg": lambda values: (
+        sum(_numbers(values)) / len(_numbers(values)) if _numbers(values) else None
+    ),
+    "$min": lambda values: min((v for v in values if v is not None), key=_sort_key, default=None),
+    "$max": lambda values: max((v for v in values if v is not None), key=_sort_key, default=None),
+    "$first": lambda values: values[0] if values else None,
+    "$last": lambda values: values[-1] if values else None,
+    "$push": list,
+    "$addToSet": lambda values: list({repr(v): v for v in values}.values()),
+}
+
+
+def _group(docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    keys: Dict[str, Any] = {}
+    for doc in docs:
+        key = _evaluate(spec["_id"], doc)
+        marker = repr(key)
+        groups.setdefault(marker, []).append(doc)
+        keys[marker] = key
+
+    results = []
+    for marker, members in groups.items():
+        result = {"_id": keys[marker]}
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            (op, expr), = accumulator.items()
+            if op == "$count":
+                result[name] = len(members)
+                continue
+            if op not in ACCUMULATORS:
+                raise NotImplementedError(f"Accumulator {op} is not supported by the stand-in")
+            result[name] = ACCUMULATORS[op]([_evaluate(expr, doc) for doc in members])
+        results.append(result)
+    return results
+
+
+def _project(docs: List[Dict[str, Any]], spec: Dict[str, Any]) -> List[Dict[str, Any]]:
+    inclusion = any(value not in (0, False) for key, value in spec.items() if key != "_id")
+    results = []
+    for doc in docs:
+        if inclusion:
+            projected = {} if spec.get("_id", 1) in (0, False) else {"_id": doc.get("_id")}
+            for key, value in spec.items():
+                if key == "_id":
+                    continue
+                if value in (1, True):
+                    found = _get_path(doc, key)
+                    if found is not _MISSING:
+                        projected[key] = found
+                else:
+                    projected[key] = _evaluate(value, doc)
+        else:
+            projected = {k: v for k, v in doc.items() if k not in spec}
+        results.append(projected)
+    return results
+
+
+def _sort(docs: List[Dict[str, Any]], spec: Dict[str, int]) -> List[Dict[str, Any]]:
+    docs = list(docs)
+    # Stable sorts applied from the last key to the first
+    for field, direction in reversed(list(spec.items())):
+        docs.sort(key=lambda doc: _sort_key(_get_path(doc, field)), reverse=direction < 0)
+    return docs
+
+
+def _unwind(docs: List[Dict[str, Any]], spec: Any) -> List[Dict[str, Any]]:
+    path = (spec["path"] if isinstance(spec, dict) else spec)[1:]
+    results = []
+    for doc in docs:
+        values = doc.get(path)
+        if not isinstance(values, list):
+            if values is not None:
+                results.append(doc)
+            continue
+        for value in values:
+            results.append({**doc, path: value})
+    return results
+
+
+def run_pipeline(docs: List[Dict[str, Any]], pipeline: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for stage in pipeline:
+        (name, spec), = stage.items()
+        if name == "$match":
+            docs = [doc for doc in docs if _matches(doc, spec)]
+        elif name == "$group":
+            docs = _group(docs, spec)
+        elif name == "$project":
+            docs = _project(docs, spec)
+        elif name in ("$set", "$addFields"):
+            docs = [{**doc, **_evaluate(spec, doc)} for doc in docs]
+        elif name == "$unset":
+            fields = {spec} if isinstance(spec, str) else set(spec)
+            docs = [{k: v for k, v in doc.items() if k not in fields} for doc in docs]
+        elif name == "$sort":
+            docs = _sort(docs, spec)
+        elif name == "$limit":
+            docs = docs[:spec]
+        elif name == "$skip":
+            docs = docs[spec:]
+        elif name == "$sample":
+            docs = random.sample(docs, min(spec["size"], len(docs)))
+        elif name == "$count":
+            docs = [{spec: len(docs)}] if docs else []
+        elif name == "$unwind":
+            docs = _unwind(docs, spec)
+        else:
+            raise NotImplementedError(f"Stage {name} is not supported by the stand-in")
+    return docs
+
+
+class MemoryCursor:
+    def __init__(self, documents: List[Dict[str, Any]]):
+        self._documents = documents
+        self._limit = 0
+        self._iterator: Optional[Iterator[Dict[str, Any]]] = None
+
+    def limit(self, count: int) -> "MemoryCursor":
+        self._limit = count
+        return self
+
+    def batch_size(self, size: int) -> "MemoryCursor":
+        return self
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if self._iterator is None:
+            documents = self._documents[: self._limit] if self._limit else self._documents
+            self._iterator = (dict(doc) for doc in documents)
+        return next(self._iterator)
+
+    def close(self):
+        self._iterator = iter(())
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._documents: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = True):
+        batch = []
+        for doc in documents:
+            # pymongo adds the generated _id to the caller's document as well
+            doc.setdefault("_id", ObjectId())
+            batch.append(dict(doc))
+        with self._lock:
+            self._documents.extend(batch)
+
+    def insert_one(self, document: Dict[str, Any]):
+        self.insert_many([document])
+
+    def find(self, query: Optional[Dict[str, Any]] = None, *args, **kwargs) -> MemoryCursor:
+        documents = self._snapshot()
+        if query:
+            documents = [doc for doc in documents if _matches(doc, query)]
+        return MemoryCursor(documents)
+
+    def find_one(self, query: Optional[Dict[str, Any]] = None, *args, **kwargs):
+        return next(self.find(query), None)
+
+    def replace_one(self, query: Dict[str, Any], document: Dict[str, Any], upsert: bool = False):
+        with self._lock:
+            for position, doc in enumerate(self._documents):
+                if _matches(doc, query):
+                    self._documents[position] = {"_id": doc["_id"], **document}
+                    return
+            if upsert:
+                self._documents.append({**query, **document})
+
+    def create_index(self, keys: List[Tuple[str, int]], name: Optional[str] = None) -> str:
+        # Recorded for index_information only; scans stay full scans
+        name = name or "_".join(f"{path}_{direction}" for path, direction in keys)
+        with self._lock:
+            self._indexes[name] = {"key": list(keys)}
+        return name
+
+    def index_information(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {"_id_": {"key": [("_id", 1)]}, **self._indexes}
+
+    def delete_many(self, query: Dict[str, Any]):
+        with self._lock:
+            self._documents = [doc for doc in self._documents if not _matches(doc, query)]
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], **kwargs) -> MemoryCursor:
+        return MemoryCursor(run_pipeline(self._snapshot(), pipeline))
+
+    def count_documents(self, query: Dict[str, Any]) -> int:
+        return sum(1 for doc in self._snapshot() if _matches(doc, query))
+
+    def drop(self):
+        with self._lock:
+            self._documents = []
+            self._indexes = {}
+
+    def _snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._documents)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self._collections: Dict[str, MemoryCollection] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = MemoryCollection(name)
+            return self._collections[name]
+
+    def list_collection_names(self) -> List[str]:
+        with self._lock:
+            return [name for name, coll in self._collections.items() if coll._documents]
+
+    def drop_collection(self, name: str):
+        with self._lock:
+            self._collections.pop(name, None)
+
+
+class MemoryMongoClient:
+    def __init__(self):
+        self._databases: Dict[str, MemoryDatabase] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        with self._lock:
+            if name not in self._databases:
+                self._databases[name] = MemoryDatabase(name)
+            return self._databases[name]
+
+    def list_database_names(self) -> List[str]:
+        with self._lock:
+            return list(self._databases)
+
+    def drop_database(self, name: str):
+        with self._lock:
+            self._databases.pop(name, None)
+
+    def close(self):
+        pass
+
+
+class MemoryMongoManager(MongoManager):
+    def __init__(self, schema_sample_size: int = 200, schema_max_workers: int = 8):
+        self.client = MemoryMongoClient()
+        self.schema_inferer = MongoSchemaInferer(
+            self, sample_size=schema_sample_size, max_workers=schema_max_workers
+        )
+
@@ -0,0 +1,72 @@
+"""NLP stack cold-start benchmark.
+
+Each measurement runs in a fresh interpreter so import caches do not leak
+between runs. Reports the time to import ``app.services.nlp_processor``,
+to build the processor for a resource mode, and to parse the first query.
+
+    python -m benchmarks.startup_benchmark [--modes bundled nltk] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+started = time.perf_counter()
+from app.services.nlp_processor import get_nlp_processor
+imported = time.perf_counter()
+processor = get_nlp_processor({mode!r})
+loaded = time.perf_counter()
+processor.parse("what is the total price by category")
+parsed = time.perf_counter()
+print(json.dumps({{
+    "source": processor.resources.source,
+    "import_ms": (imported - started) * 1000,
+    "load_ms": (loaded - imported) * 1000,
+    "first_parse_ms": (parsed - loaded) * 1000,
+}}))
+"""
+
+
+def run_once(mode: str):
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(mode=mode)],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="*", default=["bundled", "nltk"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = {}
+    for mode in args.modes:
+        runs = [run_once(mode) for _ in range(args.runs)]
+        failures = [r["error"] for r in runs if "error" in r]
+        if failures:
+            results[mode] = {"error": failures[0]}
+            print(f"{mode:>8}: failed ({failures[0]})")
+            continue
+        summary = {"source": runs[0]["source"]}
+        for key in ("import_ms", "load_ms", "first_parse_ms"):
+            summary[key] = round(statistics.median(r[key] for r in runs), 2)
+        summary["total_ms"] = round(summary["import_ms"] + summary["load_ms"] + summary["first_parse_ms"], 2)
+        results[mode] = summary
+        print(f"{mode:>8}: " + ", ".join(f"{k}={v}" for k, v in summary.items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -96,7 +96,16 @@ export function ChatLayout() {
           if (data.generated_query) {
             setMessages(prev => [...prev, {
               type: 'assistant',
-              content: <GeneratedQuery query={data.generated_query} onExecute={executeQuery} />
+              content: (
+                <GeneratedQuery
+                  query={data.generated_query}
+                  onExecute={(query) =>
+                    data.parameterized_query
+                      ? executeQuery(data.parameterized_query, data.parameters)
+                      : executeQuery(query)
+                  }
+                />
+              )
             }]);
           } else {
             setMessages(prev => [...prev, {
@@ -228,7 +237,7 @@ export function ChatLayout() {
     }
   };
 
-  const executeQuery = async (query: string) => {
+  const executeQuery = async (query: string, parameters?: Record<string, unknown>) => {
     try {
       const response = await fetch(
         `${config.backendUrl}${config.api.executeQuery}`,
@@ -237,6 +246,7 @@ export function ChatLayout() {
           headers: { 'Content-Type': 'application/json' },
           body: JSON.stringify({
             query,
+            parameters,
             db_type: dbType,
             table_name: selectedTable,
             database_name: databaseName,
@@ -3,7 +3,7 @@ import { Button } from "@/components/ui/button";
 interface SampleQueriesListProps {
   queries: any[];
   dbType: string;
-  onExecute: (query: string) => void;
+  onExecute: (query: string, parameters?: Record<string, unknown>) => void;
 }
 
 export function SampleQueriesList({ queries, dbType, onExecute }: SampleQueriesListProps) {
@@ -17,7 +17,9 @@ export function SampleQueriesList({ queries, dbType, onExecute }: SampleQueriesL
           </pre>
           <Button
             onClick={() =>
-              onExecute(dbType === 'mysql' ? query.mysql_query : query.mongodb_query)
+              dbType === 'mysql' && query.parameterized_query
+                ? onExecute(query.parameterized_query, query.parameters)
+                : onExecute(dbType === 'mysql' ? query.mysql_query : query.mongodb_query)
             }
             className="mt-2"
             size="sm"
@@ -0,0 +1,32 @@
+import pytest
+from app.services.intent_matcher import extract_operator
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("where discount > 10", ">"),
+        ("list items where price > 100", ">"),
+        ("rows in this table where price < 5", "<"),
+        ("show this list where price >= 5", ">="),
+        ("this is where price <= 5", "<="),
+        ("find items where status != 3", "!="),
+        ("find items where status <> 3", "!="),
+        ("this item where price = 7", "="),
+        ("where price is > 5", ">"),
+        ("where price is greater than 5", ">"),
+        ("where price is greater than or equal to 5", ">="),
+        ("where price is less than 5", "<"),
+        ("where price is less than or equal to 5", "<="),
+        ("where price is not equal to 5", "!="),
+        ("where price not equals 5", "!="),
+        ("where price equals 5", "="),
+        ("where price is 5", "="),
+        ("Where Price Is Less Than 5", "<"),
+        # "is" and "equals" only count as whole words
+        ("list this history where thesis 5", "="),
+        ("where status equalsies 5", "="),
+    ],
+)
+def test_extract_operator(question, expected):
+    assert extract_operator(question) == expected
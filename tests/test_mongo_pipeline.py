@@ -0,0 +1,181 @@
+import pytest
+from benchmarks.standins import run_pipeline
+from app.database.mongo_pipeline import (
+    PipelineValidationError,
+    optimize_pipeline,
+    parse_query_text,
+)
+
+GROUP_BY_CITY = {"$group": {"_id": "$city", "total": {"$sum": "$price"}}}
+SORT_BY_PRICE = {"$sort": {"price": -1}}
+
+
+@pytest.mark.parametrize(
+    "stages, expected",
+    [
+        # Not even on the group key, which may hold arrays
+        (
+            [GROUP_BY_CITY, {"$match": {"_id": "Oslo"}}],
+            [GROUP_BY_CITY, {"$match": {"_id": "Oslo"}}],
+        ),
+        (
+            [SORT_BY_PRICE, GROUP_BY_CITY, {"$match": {"_id": "Oslo"}}],
+            [SORT_BY_PRICE, GROUP_BY_CITY, {"$match": {"_id": "Oslo"}}],
+        ),
+        (
+            [GROUP_BY_CITY, {"$match": {"total": {"$gt": 10}}}],
+            [GROUP_BY_CITY, {"$match": {"total": {"$gt": 10}}}],
+        ),
+        (
+            [GROUP_BY_CITY, {"$match": {"_id": "Oslo", "total": {"$gt": 10}}}],
+            [GROUP_BY_CITY, {"$match": {"_id": "Oslo", "total": {"$gt": 10}}}],
+        ),
+        (
+            [
+                {"$group": {"_id": {"city": "$city"}, "n": {"$sum": 1}}},
+                {"$match": {"_id.city": "Oslo"}},
+            ],
+            [
+                {"$group": {"_id": {"city": "$city"}, "n": {"$sum": 1}}},
+                {"$match": {"_id.city": "Oslo"}},
+            ],
+        ),
+    ],
+)
+def test_match_past_group(stages, expected):
+    assert optimize_pipeline(stages) == expected
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [GROUP_BY_CITY, {"$match": {"_id": "Oslo"}}],
+        [GROUP_BY_CITY, {"$match": {"_id": ["Oslo", "Bergen"]}}],
+        [{"$group": {"_id": "$city", "n": {"$sum": 1}}}, {"$match": {"n": {"$gt": 1}}}],
+        [SORT_BY_PRICE, {"$match": {"city": "Oslo"}}],
+        [{"$addFields": {"total": 1}}, {"$match": {"city": "Bergen"}}],
+    ],
+)
+def test_optimized_pipeline_returns_same_rows(stages):
+    # Includes documents whose group key is an array
+    documents = [
+        {"city": "Oslo", "price": 5},
+        {"city": ["Oslo", "Bergen"], "price": 7},
+        {"city": "Bergen", "price": 3},
+        {"city": ["Oslo", "Bergen"], "price": 1},
+        {"price": 2},
+    ]
+    assert run_pipeline(documents, optimize_pipeline(stages)) == run_pipeline(
+        documents, stages
+    )
+
+
+@pytest.mark.parametrize(
+    "project, match, pushed",
+    [
+        ({"city": 1, "price": 1}, {"city": "Oslo"}, True),
+        ({"address": 1}, {"address.city": "Oslo"}, True),
+        ({"city": 1}, {"_id": 7}, True),
+        ({"price": 0}, {"city": "Oslo"}, True),
+        # The projection drops the field, so the filter would see a value
+        # that is gone by the time the original $match runs
+        ({"price": 1}, {"city": "Oslo"}, False),
+        ({"_id": 1}, {"city": "Oslo"}, False),
+        ({"city": 0}, {"city": "Oslo"}, False),
+        ({"address.city": 0}, {"address": {"$exists": True}}, False),
+        ({"address.city": 1}, {"address": {"$exists": True}}, False),
+        ({"_id": 0, "city": 1}, {"_id": 7}, False),
+        # Computed fields
+        ({"city": {"$toUpper": "$city"}}, {"city": "OSLO"}, False),
+        ({"city": "$address.city"}, {"city": "Oslo"}, False),
+        ({"city": 1, "label": {"$literal": 1}}, {"city": "Oslo"}, False),
+    ],
+)
+def test_match_past_project(project, match, pushed):
+    stages = [{"$project": project}, {"$match": match}]
+    expected = [{"$match": match}, {"$project": project}] if pushed else stages
+    assert optimize_pipeline(stages) == expected
+
+
+@pytest.mark.parametrize("stage_name", ["$addFields", "$set"])
+@pytest.mark.parametrize(
+    "fields, match, pushed",
+    [
+        ({"total": {"$multiply": ["$price", 2]}}, {"city": "Oslo"}, True),
+        ({"total": {"$multiply": ["$price", 2]}}, {"total": {"$gt": 10}}, False),
+        ({"total": 1}, {"$or": [{"city": "Oslo"}, {"total": 1}]}, False),
+        ({"address.zip": "0150"}, {"address": {"$exists": True}}, False),
+        ({"address": {"zip": "0150"}}, {"address.city": "Oslo"}, False),
+        ({"total": 1}, {"$expr": {"$gt": ["$price", 10]}}, False),
+    ],
+)
+def test_match_past_add_fields(stage_name, fields, match, pushed):
+    stages = [{stage_name: fields}, {"$match": match}]
+    expected = [{"$match": match}, {stage_name: fields}] if pushed else stages
+    assert optimize_pipeline(stages) == expected
+
+
+@pytest.mark.parametrize(
+    "stages, expected",
+    [
+        (
+            [SORT_BY_PRICE, {"$match": {"city": "Oslo"}}],
+            [{"$match": {"city": "Oslo"}}, SORT_BY_PRICE],
+        ),
+        (
+            [
+                {"$addFields": {"total": 1}},
+                SORT_BY_PRICE,
+                {"$match": {"city": "Oslo"}},
+            ],
+            [{"$match": {"city": "Oslo"}}, {"$addFields": {"total": 1}}, SORT_BY_PRICE],
+        ),
+        (
+            [{"$match": {"city": "Oslo"}}, SORT_BY_PRICE, {"$match": {"price": {"$gt": 1}}}],
+            [{"$match": {"city": "Oslo", "price": {"$gt": 1}}}, SORT_BY_PRICE],
+        ),
+        (
+            [{"$match": {"price": {"$gt": 1}}}, {"$match": {"price": {"$lt": 9}}}],
+            [{"$match": {"$and": [{"price": {"$gt": 1}}, {"price": {"$lt": 9}}]}}],
+        ),
+        # Order-sensitive stages keep the filter behind them
+        (
+            [{"$limit": 5}, {"$match": {"city": "Oslo"}}],
+            [{"$limit": 5}, {"$match": {"city": "Oslo"}}],
+        ),
+        (
+            [{"$unwind": "$tags"}, {"$match": {"tags": "new"}}],
+            [{"$unwind": "$tags"}, {"$match": {"tags": "new"}}],
+        ),
+    ],
+)
+def test_match_ordering(stages, expected):
+    assert optimize_pipeline(stages) == expected
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('{"city": "Oslo"}', {"city": "Oslo"}),
+        ("{'city': 'Oslo', 'open': True, 'zip': None}", {"city": "Oslo", "open": True, "zip": None}),
+        ("[{'$match': {'tags': ('a', 'b')}}]", [{"$match": {"tags": ["a", "b"]}}]),
+    ],
+)
+def test_parse_query_text(text, expected):
+    assert parse_query_text(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "{'tags': {'a', 'b'}}",
+        "{'raw': b'abc'}",
+        "{'n': 1j}",
+        "{('a', 'b'): 1}",
+        "{'city': __import__('os')}",
+        "{'city': ",
+    ],
+)
+def test_parse_query_text_rejects(text):
+    with pytest.raises(PipelineValidationError):
+        parse_query_text(text)
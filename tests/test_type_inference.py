@@ -0,0 +1,103 @@
+import io
+import pandas as pd
+import pytest
+from sqlalchemy.dialects import mysql
+from app.services.type_inference import SchemaInferrer
+
+
+def _infer(*chunks):
+    # Each chunk is the raw CSV text of one column, one value per line and
+    # blank for a missing value, read the way the CSV ingest reads it
+    inferrer = SchemaInferrer()
+    for chunk in chunks:
+        text = "c\n" + "\n".join(chunk) + "\n"
+        inferrer.observe(pd.read_csv(io.StringIO(text), skip_blank_lines=False))
+    (column,) = inferrer.finish()
+    return column.kind, column.type.compile(dialect=mysql.dialect())
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["-128", "127"], "TINYINT"),
+        (["128"], "SMALLINT"),
+        (["-129"], "SMALLINT"),
+        (["-32768", "32767"], "SMALLINT"),
+        (["32768"], "MEDIUMINT"),
+        (["-8388608", "8388607"], "MEDIUMINT"),
+        (["8388608"], "INTEGER"),
+        (["-2147483648", "2147483647"], "INTEGER"),
+        (["2147483648"], "BIGINT"),
+        (["-2147483649"], "BIGINT"),
+        (["9223372036854775807"], "BIGINT"),
+    ],
+)
+def test_integer_width_boundaries(values, expected):
+    assert _infer(values) == ("integer", expected)
+
+
+@pytest.mark.parametrize(
+    "values, expected_kind",
+    [
+        (["red", "green"] * 4, "enum"),
+        # Too few rows per value to be worth an ENUM
+        (["red", "green"] * 3, "string"),
+        # MySQL would treat these as the same member
+        (["red", "Red"] * 4, "string"),
+        (["red", "red "] * 4, "string"),
+        (["x", " "] * 4, "string"),
+        ([str(i % 40) + "a" for i in range(400)], "string"),
+    ],
+)
+def test_enum_members(values, expected_kind):
+    assert _infer(values)[0] == expected_kind
+
+
+def test_enum_lists_sorted_members():
+    assert _infer(["red", "green", "blue"] * 4) == ("enum", "ENUM('blue','green','red')")
+
+
+@pytest.mark.parametrize(
+    "values, expected",
+    [
+        (["2024-01-31", "1999-12-01"], ("date", "DATE")),
+        (["2024-01-31 08:15", "2024-01-31T08:15:30"], ("datetime", "DATETIME")),
+        (["2024-01-31 08:15:30.25"], ("datetime", "DATETIME(6)")),
+        # Other layouts are ambiguous, and impossible dates are not dates
+        (["01/31/2024"], ("string", "VARCHAR(16)")),
+        (["31.01.2024"], ("string", "VARCHAR(16)")),
+        (["2024-02-30"], ("string", "VARCHAR(16)")),
+        (["2024-01-31", "2024-01-31 08:15"], ("string", "VARCHAR(16)")),
+    ],
+)
+def test_only_iso_dates(values, expected):
+    assert _infer(values) == expected
+
+
+@pytest.mark.parametrize(
+    "chunks, expected",
+    [
+        ((["1.0", "2.0"], ["2.5"]), ("decimal", "NUMERIC(2, 1)")),
+        ((["1", "2"], ["2.25"]), ("decimal", "NUMERIC(3, 2)")),
+        ((["1.0", ""], ["300"]), ("integer", "SMALLINT")),
+        ((["1.5"], ["2.0"]), ("decimal", "NUMERIC(2, 1)")),
+        ((["1.0"], ["0.1234567"]), ("float", "DOUBLE")),
+        ((["1"], ["inf"]), ("string", "VARCHAR(32)")),
+    ],
+)
+def test_numbers_across_chunks(chunks, expected):
+    assert _infer(*chunks) == expected
+
+
+@pytest.mark.parametrize(
+    "chunks, expected_kind",
+    [
+        ((["True", "False"], ["False", "True"]), "boolean"),
+        ((["True", "False"], ["True", ""]), "boolean"),
+        ((["", "True"], ["False"]), "boolean"),
+        ((["True", "False"], ["maybe"]), "string"),
+        ((["True", "False"], ["2"]), "integer"),
+    ],
+)
+def test_booleans_across_chunks(chunks, expected_kind):
+    assert _infer(*chunks)[0] == expected_kind